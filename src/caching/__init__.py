@@ -4,8 +4,9 @@ Request caching and deduplication system.
 This module provides functionality for:
 - Generating request signatures for deduplication
 - Handling duplicate requests
-- Caching responses
+- Caching completed responses of deterministic requests
 - Managing concurrent request processing
+- Sharing in-flight requests between worker processes
 """
 
 from .deduplication import (
@@ -16,8 +17,10 @@ from .deduplication import (
     complete_and_cleanup_request_delayed,
     handle_duplicate_request,
     simulate_testing_delay,
-    extract_content_from_sse_chunks
+    extract_content_from_sse_chunks,
+    cross_worker_publisher
 )
+from .response_cache import ResponseCache, is_cacheable_request, response_cache, response_cache_key
 
 __all__ = [
     "cleanup_stuck_requests",
@@ -27,5 +30,10 @@ __all__ = [
     "complete_and_cleanup_request_delayed",
     "handle_duplicate_request",
     "extract_content_from_sse_chunks",
-    "simulate_testing_delay"
+    "simulate_testing_delay",
+    "ResponseCache",
+    "is_cacheable_request",
+    "response_cache",
+    "response_cache_key",
+    "cross_worker_publisher"
 ]
\ No newline at end of file
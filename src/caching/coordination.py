@@ -0,0 +1,342 @@
+"""Cross-worker request coordination over a shared SQLite (WAL) file."""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Dict, List, Mapping, Optional, Union
+
+from utils.logging.handlers import warning, LogRecord, LogEvent
+
+from .persistent_cache import resolve_cache_path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leaders (
+    signature TEXT PRIMARY KEY,
+    leader_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS streams (
+    leader_id TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    worker_id TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    is_stream INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    result_kind TEXT,
+    result BLOB,
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    leader_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (leader_id, seq)
+);
+CREATE INDEX IF NOT EXISTS streams_updated_at ON streams (updated_at);
+"""
+
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class RemoteLeader:
+    """另一个worker上正在处理同一签名的原始请求"""
+    leader_id: str
+    worker_id: str
+    pid: int
+    is_stream: bool
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _error_event(message: str) -> bytes:
+    error_response = {"type": "error", "error": {"type": "api_error", "message": message}}
+    return f"event: error\ndata: {json.dumps(error_response)}\n\n".encode("utf-8")
+
+
+class WorkerCoordinator:
+    """多个 uvicorn worker 之间共享在途请求
+
+    同一台机器上的所有worker打开同一个SQLite文件（WAL模式）：
+    - claim(): 按签名竞争 leader，返回 None 表示当前worker成为 leader，否则返回其他worker上的 leader
+    - publish()/finish(): leader 写入流式chunks（后台线程批量提交）和最终结果
+    - subscribe()/wait_result(): 其他worker上的 follower 轮询读取 leader 的流或结果
+
+    leader 所在进程已退出（按pid检测）或超过去重超时仍未完成时视为失效，下一个请求接管。
+    所有数据库操作都在单个后台线程中执行，不阻塞事件循环。
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.05, retention: float = 30,
+                 worker_id: Optional[str] = None, pid: Optional[int] = None):
+        self.path = resolve_cache_path(path)
+        self.poll_interval = poll_interval
+        self.retention = retention  # 已结束的流和结果保留多久（供仍在读取的 follower 使用）
+        self.worker_id = worker_id or uuid.uuid4().hex
+        self.pid = pid if pid is not None else os.getpid()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dedup-coordinator")
+        self._pending_chunks: Dict[str, List[bytes]] = {}
+        self._next_seq: Dict[str, int] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_scheduled = False
+        self._closed = False
+        self._executor.submit(self._guarded, self._open).result()
+
+    def configure(self, settings: Mapping[str, Any]):
+        self.poll_interval = settings.get('poll_interval', 0.05)
+        self.retention = settings.get('retention', 30)
+
+    # ===== 事件循环侧接口 =====
+
+    async def claim(self, signature: str, request_id: str, is_stream: bool, timeout: float) -> Optional[RemoteLeader]:
+        """竞争该签名的 leader；返回 None 表示当前worker成为 leader（leader_id 为 request_id）"""
+        return await self._call(self._claim, signature, request_id, is_stream, timeout)
+
+    def publish(self, leader_id: str, chunk: Union[str, bytes]):
+        """追加一个流式chunk（批量写入，不等待）"""
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        with self._pending_lock:
+            self._pending_chunks.setdefault(leader_id, []).append(chunk)
+            if self._flush_scheduled or self._closed:
+                return
+            self._flush_scheduled = True
+        self._executor.submit(self._guarded, self._flush_chunks)
+
+    def finish(self, leader_id: str, result: Any) -> Optional[Future]:
+        """记录 leader 的最终结果（在已提交的chunks之后写入）"""
+        if self._closed:
+            return None
+        return self._executor.submit(self._guarded, self._finish, leader_id, result)
+
+    async def wait_result(self, leader_id: str, timeout: float) -> Any:
+        """等待 leader 结束并返回其结果：dict、SSE文本列表、字符串或 Exception"""
+        deadline = time.monotonic() + timeout
+        while True:
+            row = await self._call(self._read_stream, leader_id)
+            if row is None:
+                return Exception("Original request on another worker is no longer available")
+            state, result_kind, result, pid, _ = row
+            if state == DONE:
+                if result_kind == "stream":
+                    chunks = await self._call(self._read_chunks, leader_id, -1) or []
+                    return [b"".join(data for _, data in chunks).decode("utf-8", errors="replace")]
+                return self._decode_result(result_kind, result)
+            if state == FAILED:
+                return Exception(result.decode("utf-8", errors="replace") if result else "Original request failed")
+            if not _pid_alive(pid):
+                return Exception("Original request on another worker ended unexpectedly")
+            if time.monotonic() >= deadline:
+                raise asyncio.TimeoutError()
+            await asyncio.sleep(self.poll_interval)
+
+    async def subscribe(self, leader_id: str, timeout: float) -> AsyncGenerator[bytes, None]:
+        """跟随另一个worker上的流式 leader：先回放已有chunks，再实时读取新chunks"""
+        deadline = time.monotonic() + timeout
+        last_seq = -1
+        while True:
+            chunks = await self._call(self._read_chunks, leader_id, last_seq) or []
+            for seq, data in chunks:
+                last_seq = seq
+                yield data
+            if chunks:
+                continue
+            row = await self._call(self._read_stream, leader_id)
+            if row is None:
+                yield _error_event("Original request on another worker is no longer available")
+                return
+            state, _, result, pid, _ = row
+            if state != RUNNING:
+                # 结束状态写在最后一个chunk之后：再读一次，确保没有遗漏
+                for seq, data in await self._call(self._read_chunks, leader_id, last_seq) or []:
+                    yield data
+                if state == FAILED:
+                    yield _error_event(result.decode("utf-8", errors="replace") if result else "Original request failed")
+                return
+            if not _pid_alive(pid):
+                yield _error_event("Original request on another worker ended unexpectedly, please retry the request")
+                return
+            if time.monotonic() >= deadline:
+                yield _error_event("Request timed out waiting for duplicate processing")
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    def flush(self):
+        """阻塞直到之前提交的操作全部完成"""
+        if not self._closed:
+            self._executor.submit(lambda: None).result()
+
+    def close(self):
+        if self._closed:
+            return
+        self._executor.submit(self._guarded, self._flush_chunks)
+        self._closed = True
+        self._executor.submit(self._close)
+        self._executor.shutdown(wait=True)
+
+    async def _call(self, fn, *args):
+        if self._closed:
+            return None
+        return await asyncio.wrap_future(self._executor.submit(self._guarded, fn, *args))
+
+    # ===== 后台线程 =====
+
+    def _guarded(self, fn, *args):
+        # 协调层出错只记录日志，请求退回到单worker去重
+        try:
+            if self._conn is None and fn != self._open:
+                # 数据库没能打开：协调层不可用
+                return None
+            return fn(*args)
+        except Exception as e:
+            warning(
+                LogRecord(
+                    LogEvent.CROSS_WORKER_DEDUP_ERROR.value,
+                    f"Cross-worker deduplication operation failed: {type(e).__name__}: {e}",
+                    None,
+                    {"path": self.path, "operation": fn.__name__.lstrip("_"), "worker_id": self.worker_id}
+                )
+            )
+            return None
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._conn = conn
+
+    def _claim(self, signature: str, request_id: str, is_stream: bool, timeout: float) -> Optional[RemoteLeader]:
+        conn = self._conn
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT s.leader_id, s.worker_id, s.pid, s.is_stream, s.state, s.started_at"
+                " FROM leaders l JOIN streams s ON s.leader_id = l.leader_id WHERE l.signature = ?",
+                (signature,)
+            ).fetchone()
+            if row is not None:
+                leader_id, worker_id, pid, leader_is_stream, state, started_at = row
+                # 当前worker自己的条目由本地去重处理，这里能看到说明本地已结束
+                if (state == RUNNING and worker_id != self.worker_id
+                        and now - started_at < timeout and _pid_alive(pid)):
+                    conn.execute("COMMIT")
+                    return RemoteLeader(leader_id, worker_id, pid, bool(leader_is_stream))
+                if state == RUNNING:
+                    conn.execute(
+                        "UPDATE streams SET state = ?, result = ?, updated_at = ? WHERE leader_id = ?",
+                        (FAILED, b"Original request was abandoned", now, leader_id)
+                    )
+            conn.execute("INSERT OR REPLACE INTO leaders (signature, leader_id) VALUES (?, ?)", (signature, request_id))
+            conn.execute(
+                "INSERT OR REPLACE INTO streams (leader_id, signature, worker_id, pid, is_stream, state, started_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (request_id, signature, self.worker_id, self.pid, int(is_stream), RUNNING, now, now)
+            )
+            self._purge_finished(now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return None
+
+    def _purge_finished(self, now: float):
+        stale = [leader_id for (leader_id,) in self._conn.execute(
+            "SELECT leader_id FROM streams WHERE state != ? AND updated_at < ?", (RUNNING, now - self.retention)
+        )]
+        for leader_id in stale:
+            self._conn.execute("DELETE FROM chunks WHERE leader_id = ?", (leader_id,))
+            self._conn.execute("DELETE FROM streams WHERE leader_id = ?", (leader_id,))
+            self._conn.execute("DELETE FROM leaders WHERE leader_id = ?", (leader_id,))
+
+    def _flush_chunks(self):
+        with self._pending_lock:
+            pending, self._pending_chunks = self._pending_chunks, {}
+            self._flush_scheduled = False
+        if not pending:
+            return
+        rows = []
+        for leader_id, chunks in pending.items():
+            seq = self._next_seq.get(leader_id, 0)
+            for chunk in chunks:
+                rows.append((leader_id, seq, chunk))
+                seq += 1
+            self._next_seq[leader_id] = seq
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO chunks (leader_id, seq, data) VALUES (?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _finish(self, leader_id: str, result: Any):
+        self._flush_chunks()
+        self._next_seq.pop(leader_id, None)
+        if isinstance(result, Exception):
+            state, kind, data = FAILED, None, str(result).encode("utf-8", errors="replace")
+        else:
+            state = DONE
+            kind, data = self._encode_result(result)
+        self._conn.execute(
+            "UPDATE streams SET state = ?, result_kind = ?, result = ?, updated_at = ? WHERE leader_id = ?",
+            (state, kind, data, time.time(), leader_id)
+        )
+
+    @staticmethod
+    def _encode_result(result: Any):
+        if isinstance(result, dict):
+            return "json", json.dumps(result, ensure_ascii=False, default=str).encode("utf-8", "surrogatepass")
+        if isinstance(result, list):
+            return "sse", "".join(
+                chunk.decode("utf-8", errors="replace") if isinstance(chunk, bytes) else chunk for chunk in result
+            ).encode("utf-8", "surrogatepass")
+        if isinstance(result, str):
+            return "text", result.encode("utf-8", "surrogatepass")
+        # 流式结果（StreamBuffer）：内容已经作为chunks写入
+        return "stream", None
+
+    @staticmethod
+    def _decode_result(kind: Optional[str], data: Optional[bytes]) -> Any:
+        text = data.decode("utf-8", "surrogatepass") if data is not None else ""
+        if kind == "json":
+            return json.loads(text)
+        if kind == "sse":
+            return [text]
+        return text
+
+    def _read_stream(self, leader_id: str):
+        return self._conn.execute(
+            "SELECT state, result_kind, result, pid, is_stream FROM streams WHERE leader_id = ?", (leader_id,)
+        ).fetchone()
+
+    def _read_chunks(self, leader_id: str, after_seq: int):
+        return self._conn.execute(
+            "SELECT seq, data FROM chunks WHERE leader_id = ? AND seq > ? ORDER BY seq", (leader_id, after_seq)
+        ).fetchall()
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,228 @@
+"""SQLite-backed persistent tier for the response cache."""
+
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+from utils.logging.handlers import warning, LogRecord, LogEvent
+
+from .response_cache import CachedResponse
+
+# 相对路径以项目根目录为基准（与 config.yaml 的查找方式一致）
+_PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    provider TEXT,
+    request_id TEXT,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+def resolve_cache_path(path: str) -> str:
+    return path if os.path.isabs(path) else str(_PROJECT_ROOT / path)
+
+
+def _encode_content(entry: CachedResponse) -> "tuple[str, bytes]":
+    if isinstance(entry.content, dict):
+        return "json", json.dumps(entry.content, ensure_ascii=False, default=str).encode('utf-8', 'surrogatepass')
+    return "sse", "".join(entry.content).encode('utf-8', 'surrogatepass')
+
+
+def _decode_content(kind: str, data: bytes) -> Any:
+    text = data.decode('utf-8', 'surrogatepass')
+    return json.loads(text) if kind == "json" else [text]
+
+
+class PersistentResponseCache:
+    """持久化的响应缓存层，进程重启（如开发模式 reload）后仍然有效
+
+    响应以 zlib 压缩后存入本地 SQLite 文件，按缓存键建主键索引，按最近访问时间淘汰，
+    压缩后的总大小不超过 max_bytes。所有数据库操作都在单个后台线程中执行，
+    事件循环只等待结果，不会被磁盘I/O阻塞。ttl 为 0 时条目永不过期（用于录制流量回放）。
+    """
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024, ttl: float = 86400,
+                 compression_level: int = 6):
+        self.path = resolve_cache_path(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compression_level = compression_level
+        self.total_bytes = 0  # 只在后台线程中读写
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response-cache-db")
+        self._closed = False
+        self._submit(self._open)
+
+    def configure(self, settings: Mapping[str, Any]):
+        self.max_bytes = settings.get('max_bytes', 512 * 1024 * 1024)
+        self.ttl = settings.get('ttl', 86400)
+        self.compression_level = settings.get('compression_level', 6)
+        self._submit(self._evict)
+
+    # ===== 事件循环侧接口 =====
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        if self._closed:
+            return None
+        entry = await asyncio.wrap_future(self._submit(self._get, key))
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: CachedResponse) -> Optional[Future]:
+        """后台写入，不等待完成"""
+        if self._closed:
+            return None
+        return self._submit(self._put, key, entry)
+
+    def flush(self):
+        """阻塞直到之前提交的操作全部完成"""
+        if not self._closed:
+            self._executor.submit(lambda: None).result()
+
+    def clear(self) -> Optional[Future]:
+        if self._closed:
+            return None
+        return self._submit(self._clear)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.submit(self._close)
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+    # ===== 后台线程 =====
+
+    def _submit(self, fn, *args) -> Future:
+        return self._executor.submit(self._guarded, fn, *args)
+
+    def _guarded(self, fn, *args):
+        # 磁盘缓存出错只记录日志，不影响请求处理
+        try:
+            if self._conn is None and fn != self._open:
+                # 数据库没能打开：缓存层不可用
+                return None
+            return fn(*args)
+        except Exception as e:
+            warning(
+                LogRecord(
+                    LogEvent.RESPONSE_CACHE_DISK_ERROR.value,
+                    f"Persistent response cache operation failed: {type(e).__name__}: {e}",
+                    None,
+                    {"path": self.path, "operation": fn.__name__.lstrip("_")}
+                )
+            )
+            return None
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._conn = conn
+        # ttl 为 0 时写入的条目 expires_at 为 0，不参与过期清理
+        conn.execute("DELETE FROM responses WHERE expires_at > 0 AND expires_at <= ?", (time.time(),))
+        self.total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._evict()
+
+    def _get(self, key: str) -> Optional[CachedResponse]:
+        row = self._conn.execute(
+            "SELECT kind, payload, provider, request_id, created_at, expires_at FROM responses WHERE key = ?",
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        kind, payload, provider, request_id, created_at, expires_at = row
+        now = time.time()
+        if expires_at and now >= expires_at:
+            self._delete(key)
+            return None
+        self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        data = zlib.decompress(payload)
+        return CachedResponse(
+            _decode_content(kind, data), len(data), expires_at or float("inf"),
+            provider, request_id, created_at
+        )
+
+    def _put(self, key: str, entry: CachedResponse):
+        kind, data = _encode_content(entry)
+        payload = zlib.compress(data, self.compression_level)
+        if len(payload) > self.max_bytes:
+            return
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl > 0 else 0
+        self._delete(key)
+        self._conn.execute(
+            "INSERT INTO responses (key, kind, payload, size, provider, request_id, created_at, expires_at, last_access)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, kind, payload, len(payload), entry.provider_name, entry.request_id, entry.created_at, expires_at, now)
+        )
+        self.total_bytes += len(payload)
+        self.writes += 1
+        self._evict()
+
+    def _delete(self, key: str):
+        row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.total_bytes -= row[0]
+
+    def _evict(self):
+        """删除最久未访问的条目，直到压缩后的总大小不超过 max_bytes"""
+        while self.total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self.total_bytes = 0
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.total_bytes -= size
+                self.evictions += 1
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def _clear(self):
+        self._conn.execute("DELETE FROM responses")
+        self.total_bytes = 0
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,251 @@
+"""Completed-response cache for deterministic requests."""
+
+import json
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Union
+
+from .signature import signature_engine
+
+# 客户端显式允许缓存的请求头（值为 true/1/yes）
+CACHE_OPT_IN_HEADER = "x-cache-response"
+
+# SSE 的 data 行是单行JSON，事件名只会出现在行首
+_MESSAGE_STOP_EVENT = re.compile(r"^event: message_stop\s*$", re.MULTILINE)
+_ERROR_EVENT = re.compile(r"^event: error\s*$", re.MULTILINE)
+
+
+@dataclass
+class CachedResponse:
+    """一个已完成的成功响应
+
+    content 与去重 follower 收到的结果格式相同：流式响应是完整的SSE文本（单元素列表），
+    非流式响应是JSON字典。相同模式的请求原样返回；只有纯文本响应才会转换给另一种模式的请求，
+    tool_use、thinking 等内容块在转换中会丢失。
+    """
+    content: Union[List[str], Dict[str, Any]]
+    size: int
+    expires_at: float
+    provider_name: Optional[str] = None
+    request_id: Optional[str] = None  # 产生该响应的原始请求
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+def is_cacheable_request(body: Mapping[str, Any], headers: Mapping[str, str], settings: Mapping[str, Any]) -> bool:
+    """请求是否可使用响应缓存：temperature 为 0（确定性输出）或客户端通过请求头显式允许"""
+    if not settings.get('enabled', False):
+        return False
+    header_value = headers.get(CACHE_OPT_IN_HEADER, "")
+    if header_value.strip().lower() in ("1", "true", "yes"):
+        return True
+    # 未指定 temperature 时上游默认为 1.0，不视为确定性请求
+    temperature = body.get("temperature")
+    return type(temperature) in (int, float) and temperature == 0
+
+
+def response_cache_key(body: Mapping[str, Any]) -> str:
+    """响应缓存的键：除 stream/provider 外的全部请求字段
+
+    去重签名为了识别客户端重试，忽略了 max_tokens、thinking 等字段；缓存的生命周期更长，
+    这些字段不同的请求不能共享响应。
+    """
+    return signature_engine.signature({k: v for k, v in body.items() if k not in ("stream", "provider")})
+
+
+def _stream_text(result: Any) -> Optional[str]:
+    """StreamBuffer 或SSE chunk列表的完整文本；不是流式结果时返回 None"""
+    if isinstance(result, list) and all(isinstance(chunk, str) for chunk in result):
+        return "".join(result)
+    text = getattr(result, "text", None)
+    if callable(text) and not getattr(result, "truncated", False):
+        return text()
+    return None
+
+
+def is_text_only(content: Union[List[str], Dict[str, Any]]) -> bool:
+    """响应是否只包含不带引用的 text 内容块（只有这种响应能在流式/非流式之间无损转换）"""
+    if isinstance(content, dict):
+        return all(
+            block.get("type") == "text" and not block.get("citations")
+            for block in content.get("content") or []
+        )
+    for line in "".join(content).splitlines():
+        if not line.startswith("data:"):
+            continue
+        if "citations_delta" in line:
+            return False
+        if "content_block_start" in line:
+            try:
+                block = json.loads(line[5:]).get("content_block") or {}
+            except (ValueError, AttributeError):
+                return False
+            if block.get("type") != "text" or block.get("citations"):
+                return False
+    return True
+
+
+def _servable_as(entry: CachedResponse, is_stream: Optional[bool]) -> bool:
+    if is_stream is None or is_stream == isinstance(entry.content, list):
+        return True
+    return is_text_only(entry.content)
+
+
+class ResponseCache:
+    """按缓存键缓存已完成响应的 LRU，带 TTL 和字节预算
+
+    只缓存完整的成功响应：非流式为 type == "message" 的JSON，流式为包含 message_stop
+    且没有 error 事件的SSE文本。客户端断开、截断或出错的响应都不会进入缓存。
+    """
+
+    def __init__(self, ttl: float = 300, max_bytes: int = 64 * 1024 * 1024, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        # 可选的持久化层（SQLite），内存未命中时查询，写入时同步写入
+        self.persistent = None
+
+    def configure(self, settings: Mapping[str, Any]):
+        """应用 settings.response_cache 中的容量与TTL配置，并按需打开/关闭持久化层"""
+        self.ttl = settings.get('ttl', 300)
+        self.max_bytes = settings.get('max_bytes', 64 * 1024 * 1024)
+        self.max_entries = settings.get('max_entries', 1000)
+        self._evict()
+
+        persistent_settings = settings.get('persistent', {})
+        path = persistent_settings.get('path', 'cache/responses.sqlite3')
+        # 只接受显式的 enabled: true 和字符串路径，避免错误的配置对象在任意位置创建数据库文件
+        if settings.get('enabled') is not True or persistent_settings.get('enabled') is not True \
+                or not isinstance(path, str):
+            self.close()
+            return
+        from .persistent_cache import PersistentResponseCache, resolve_cache_path
+        path = resolve_cache_path(path)
+        if self.persistent is not None and self.persistent.path == path:
+            self.persistent.configure(persistent_settings)
+            return
+        self.close()
+        self.persistent = PersistentResponseCache(
+            path,
+            max_bytes=persistent_settings.get('max_bytes', 512 * 1024 * 1024),
+            ttl=persistent_settings.get('ttl', 86400),
+            compression_level=persistent_settings.get('compression_level', 6),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, is_stream: Optional[bool] = None) -> Optional[CachedResponse]:
+        """is_stream 指定请求模式时，不能无损转换成该模式的条目视为未命中"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if time.time() >= entry.expires_at:
+            self._remove(key)
+            self.misses += 1
+            return None
+        if not _servable_as(entry, is_stream):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        entry.hits += 1
+        self.hits += 1
+        return entry
+
+    async def lookup(self, key: str, is_stream: Optional[bool] = None) -> Optional[CachedResponse]:
+        """先查内存，未命中时查持久化层；持久化层命中的条目提升到内存"""
+        entry = self.get(key, is_stream)
+        if entry is not None or self.persistent is None or key in self._entries:
+            # 内存中有条目但模式不符时，持久化层中是同一个响应，不必再查
+            return entry
+        entry = await self.persistent.get(key)
+        if entry is None:
+            return None
+        entry.expires_at = min(entry.expires_at, time.time() + self.ttl)
+        self._insert(key, entry)
+        return entry if _servable_as(entry, is_stream) else None
+
+    def store(self, key: str, result: Any, provider_name: Optional[str] = None,
+              request_id: Optional[str] = None) -> bool:
+        """缓存一个已完成的结果；不是完整的成功响应或超出预算时返回 False"""
+        if getattr(result, "size", 0) > self.max_bytes and self.persistent is None:
+            # 超出整个预算的流，不必读出文本
+            return False
+
+        if isinstance(result, dict):
+            if result.get("type") != "message":
+                return False
+            content: Union[List[str], Dict[str, Any]] = result
+            size = len(json.dumps(result, ensure_ascii=False, default=str))
+        else:
+            text = _stream_text(result)
+            if text is None or not _MESSAGE_STOP_EVENT.search(text) or _ERROR_EVENT.search(text):
+                return False
+            content = [text]
+            size = len(text)
+
+        entry = CachedResponse(content, size, time.time() + self.ttl, provider_name, request_id)
+        if self.persistent is not None:
+            self.persistent.put(key, entry)
+        stored = self._insert(key, entry)
+        if stored or self.persistent is not None:
+            self.stores += 1
+            return True
+        return False
+
+    def _insert(self, key: str, entry: CachedResponse) -> bool:
+        if self.ttl <= 0 or self.max_entries <= 0 or entry.size > self.max_bytes:
+            return False
+        self._remove(key)
+        self._entries[key] = entry
+        self.total_bytes += entry.size
+        self._evict()
+        return True
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+
+    def _evict(self):
+        now = time.time()
+        for key in [k for k, e in self._entries.items() if now >= e.expires_at]:
+            self._remove(key)
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry.size
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+        if self.persistent is not None:
+            self.persistent.clear()
+
+    def close(self):
+        """关闭持久化层（等待未完成的写入）"""
+        if self.persistent is not None:
+            self.persistent.close()
+            self.persistent = None
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+        }
+        if self.persistent is not None:
+            stats["persistent"] = self.persistent.stats()
+        return stats
+
+
+response_cache = ResponseCache()
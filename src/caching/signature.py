@@ -0,0 +1,135 @@
+"""Incremental request signatures with per-message digest memoization."""
+
+import hashlib
+import json
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+_first = itemgetter(0)
+
+# 签名格式版本，写在哈希输入的最前面；格式变化时递增
+SIGNATURE_VERSION = b"request-signature-v2\x00"
+
+
+def _canonical_json(value: Any) -> str:
+    """规范化序列化：与旧的整体签名使用相同的 json.dumps 参数"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def _encode(text: str) -> bytes:
+    # surrogatepass：孤立代理字符（来自 "\ud800" 这样的转义）也能无损、确定地编码
+    return text.encode('utf-8', 'surrogatepass')
+
+
+def _structural_key(value: Any) -> Hashable:
+    """把 JSON 值转换成可哈希、与键顺序无关的结构键
+
+    两个值的结构键相等，当且仅当它们的规范化 JSON 相等：字典按键排序，
+    标量带上类型（区分 1 / 1.0 / true），浮点数用 repr（区分 0.0 / -0.0）。
+    字符串直接引用原对象，不做复制，也不做转义。
+    """
+    value_type = type(value)
+    if value_type is str:
+        return value
+    if value_type is dict:
+        return (dict, tuple(sorted([(k, _structural_key(v)) for k, v in value.items()], key=_first)))
+    if value_type is list:
+        return (list, tuple([_structural_key(v) for v in value]))
+    if value_type is float:
+        return (float, repr(value))
+    return (value_type, value)
+
+
+class DigestCache:
+    """按结构键缓存 JSON 值摘要的有界 LRU
+
+    容量同时受条目数和字节数（值的规范化 JSON 长度，近似于键引用的字符串内存）限制。
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[bytes, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def digest(self, value: Any) -> bytes:
+        """返回值的规范化 JSON 的 SHA-256 摘要，命中缓存时不再序列化"""
+        key = _structural_key(value)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        encoded = _encode(_canonical_json(value))
+        digest = hashlib.sha256(encoded).digest()
+        size = len(encoded)
+        if size <= self.max_bytes and self.max_entries > 0:
+            self._entries[key] = (digest, size)
+            self.total_bytes += size
+            self._evict()
+        return digest
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.total_bytes -= size
+
+    def configure(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class RequestSignatureEngine:
+    """增量计算请求签名
+
+    长对话的每次请求都会重发全部历史消息。这里逐条计算消息摘要并缓存，
+    再把摘要按顺序串成哈希链，因此只有新消息（以及变化过的 system/tools）需要序列化。
+    签名只取决于内容：相同内容（无论键顺序）得到相同签名，任何字段变化都会改变签名。
+    """
+
+    def __init__(self, cache: Optional[DigestCache] = None):
+        self.cache = cache if cache is not None else DigestCache()
+
+    def signature(self, signature_data: Dict[str, Any]) -> str:
+        """signature_data 与旧的整体签名相同；messages/system/tools 走摘要缓存，其余字段直接序列化"""
+        header = {k: v for k, v in signature_data.items() if k not in ("messages", "system", "tools")}
+        messages = signature_data.get("messages", [])
+        if type(messages) is not list:
+            # 非列表的 messages 作为一个整体值参与签名
+            messages = [messages]
+            header["messages_shape"] = "value"
+
+        chain = hashlib.sha256(SIGNATURE_VERSION)
+        chain.update(_encode(_canonical_json(header)))
+        # 规范化 JSON 中不会出现原始 NUL（控制字符会被转义），用作头部与摘要之间的分隔
+        chain.update(b"\x00")
+        chain.update(self.cache.digest(signature_data.get("system", "")))
+        chain.update(self.cache.digest(signature_data.get("tools", [])))
+        chain.update(len(messages).to_bytes(8, "big"))
+        for message in messages:
+            chain.update(self.cache.digest(message))
+        return chain.hexdigest()
+
+
+signature_engine = RequestSignatureEngine()
@@ -25,6 +25,10 @@ from .helpers import (
     serialize_tool_result_content_for_openai
 )
 
+from .body_passthrough import (
+    build_anthropic_passthrough_body
+)
+
 __all__ = [
     # Token counting
     "get_token_encoder",
@@ -44,5 +48,8 @@ __all__ = [
     "build_anthropic_error_response",
     
     # Helpers
-    "serialize_tool_result_content_for_openai"
+    "serialize_tool_result_content_for_openai",
+    
+    # Request body passthrough
+    "build_anthropic_passthrough_body"
 ]
\ No newline at end of file
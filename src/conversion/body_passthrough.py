@@ -0,0 +1,107 @@
+"""Byte-level request body passthrough for Anthropic-compatible providers.
+
+Claude Code request bodies are routinely hundreds of KB to several MB. Re-serializing
+the parsed dict for every upstream attempt costs a full ``json.dumps`` + UTF-8 encode,
+so for Anthropic providers the client's raw bytes are forwarded as-is and only the
+top-level ``model`` value / ``provider`` key are spliced when they must change.
+"""
+
+import json
+import re
+from json.decoder import scanstring
+from typing import Optional, Tuple
+
+# A top-level key is preceded by '{' or ',' (optionally followed by whitespace). Inside a
+# JSON string every quote is escaped, so the unescaped pattern `"key"<ws>:` can only be
+# an object key; it may still belong to a nested object, which is why a splice is only
+# attempted when the key occurs exactly once in the body.
+_MODEL_KEY = re.compile(rb'(?<=[{,\s])"model"\s*:\s*')
+_PROVIDER_KEY = re.compile(rb'(?<=[{,\s])"provider"\s*:\s*')
+_WHITESPACE = b' \t\r\n'
+
+
+def _find_unique_string_value(raw_body: bytes, pattern: re.Pattern, expected: str) -> Optional[Tuple[int, int, int]]:
+    """Locate the only occurrence of a string-valued key.
+
+    Returns (key_start, value_start, value_end) or None when the key is missing,
+    ambiguous, not a string, or does not hold the expected value.
+    """
+    matches = pattern.finditer(raw_body)
+    match = next(matches, None)
+    if match is None or next(matches, None) is not None:
+        return None
+
+    value_start = match.end()
+    if raw_body[value_start:value_start + 1] != b'"':
+        return None
+    try:
+        # scanstring works on str; decode just the bounded tail we need to inspect
+        tail = raw_body[value_start + 1:value_start + 1 + 6 * len(expected) + 64].decode('utf-8', errors='ignore')
+        value, end = scanstring(tail, 0)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if value != expected:
+        return None
+    value_end = value_start + 1 + len(tail[:end].encode('utf-8'))
+    return match.start(), value_start, value_end
+
+
+def _remove_key(raw_body: bytes, key_start: int, value_end: int) -> Optional[bytes]:
+    """Remove a `"key": value` member together with one adjacent comma."""
+    after = value_end
+    while after < len(raw_body) and raw_body[after] in _WHITESPACE:
+        after += 1
+    if raw_body[after:after + 1] == b',':
+        # Member followed by another one: drop through the trailing comma
+        after += 1
+        while after < len(raw_body) and raw_body[after] in _WHITESPACE:
+            after += 1
+        return raw_body[:key_start] + raw_body[after:]
+
+    # Last member: drop the preceding comma instead
+    before = key_start
+    while before > 0 and raw_body[before - 1] in _WHITESPACE:
+        before -= 1
+    if raw_body[before - 1:before] != b',':
+        return None
+    return raw_body[:before - 1] + raw_body[value_end:]
+
+
+def build_anthropic_passthrough_body(
+    raw_body: bytes,
+    requested_model: str,
+    target_model: str,
+    provider_name: Optional[str] = None,
+) -> Optional[bytes]:
+    """Build the upstream body for an Anthropic provider directly from the client bytes.
+
+    Args:
+        raw_body: Original request body as received from the client
+        requested_model: Model name sent by the client
+        target_model: Model the selected route maps to (same as requested for passthrough)
+        provider_name: Value of the balancer-only ``provider`` field, if the client sent one
+
+    Returns:
+        The bytes to send, or None when the body cannot be spliced safely and the caller
+        should fall back to re-serializing the parsed request.
+    """
+    body = raw_body
+    if provider_name is not None:
+        if not isinstance(provider_name, str):
+            return None
+        location = _find_unique_string_value(body, _PROVIDER_KEY, provider_name)
+        if location is None:
+            return None
+        key_start, _, value_end = location
+        body = _remove_key(body, key_start, value_end)
+        if body is None:
+            return None
+
+    if target_model != requested_model:
+        location = _find_unique_string_value(body, _MODEL_KEY, requested_model)
+        if location is None:
+            return None
+        _, value_start, value_end = location
+        body = body[:value_start] + json.dumps(target_model, ensure_ascii=False).encode('utf-8') + body[value_end:]
+
+    return body
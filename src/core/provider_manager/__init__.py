@@ -1,6 +1,8 @@
 """Provider Manager module for Claude Code Provider Balancer."""
 
 from .manager import ProviderManager, ProviderType, AuthType, SelectionStrategy, StreamingMode, ModelRoute, Provider
+from .client_pool import ProviderClientPool
+from .warmer import ConnectionWarmer
 
 __all__ = [
     'ProviderManager',
@@ -9,5 +11,7 @@ __all__ = [
     'SelectionStrategy',
     'StreamingMode',
     'ModelRoute',
-    'Provider'
+    'Provider',
+    'ProviderClientPool',
+    'ConnectionWarmer'
 ]
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""Provider熔断器
+
+closed: 正常放行；错误数达到 unhealthy_threshold 后进入 open。
+open: 冷却期内不参与选择；冷却时间随连续熔断次数指数增长（上限 max_cooldown）。
+half_open: 冷却结束后只放行 half_open_max_requests 个试探请求，
+    试探成功则关闭熔断并进入慢启动，失败则立即重新熔断。
+慢启动: 恢复后的 slow_start_duration 秒内按线性权重逐步分配流量，避免所有请求同时涌向刚恢复的provider。
+"""
+
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class BreakerPolicy:
+    base_cooldown: float = 60  # 首次熔断的冷却时间（settings.failure_cooldown）
+    backoff_multiplier: float = 2.0  # 连续熔断时冷却时间的增长倍数
+    max_cooldown: float = 1800
+    half_open_max_requests: int = 1  # half_open 状态下同时进行的试探请求数
+    slow_start_duration: float = 30  # 恢复后流量逐步爬升的时间（秒），0 关闭慢启动
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "BreakerPolicy":
+        config = settings.get('circuit_breaker', {})
+        base_cooldown = settings.get('failure_cooldown', 60)
+        return cls(
+            base_cooldown=base_cooldown,
+            backoff_multiplier=config.get('backoff_multiplier', 2.0),
+            max_cooldown=max(config.get('max_cooldown', 1800), base_cooldown),
+            half_open_max_requests=config.get('half_open_max_requests', 1),
+            slow_start_duration=config.get('slow_start_duration', 30)
+        )
+
+    def cooldown(self, trips: int) -> float:
+        """第 trips 次连续熔断的冷却时间"""
+        return min(self.base_cooldown * self.backoff_multiplier ** max(trips - 1, 0), self.max_cooldown)
+
+
+class CircuitBreaker:
+    """单个provider的熔断状态（仅在事件循环中使用，无需加锁）
+
+    open -> half_open 的转换在查询状态时按时间惰性完成。
+    """
+
+    def __init__(self, policy: Optional[BreakerPolicy] = None, on_change: Optional[Callable[[], None]] = None):
+        self.policy = policy or BreakerPolicy()
+        # 熔断打开/关闭时的回调（用于使路由缓存失效）
+        self.on_change = on_change
+        self.opened_at: float = 0  # 最近一次熔断时间，0 表示已关闭
+        self.trips: int = 0  # 连续熔断次数（成功恢复后清零）
+        self.closed_at: float = 0  # 最近一次从熔断中恢复的时间（慢启动起点）
+
+    def get_state(self, now: Optional[float] = None) -> BreakerState:
+        if not self.opened_at:
+            return BreakerState.CLOSED
+        now = time.time() if now is None else now
+        if now - self.opened_at >= self.cooldown:
+            return BreakerState.HALF_OPEN
+        return BreakerState.OPEN
+
+    @property
+    def state(self) -> BreakerState:
+        return self.get_state()
+
+    @property
+    def cooldown(self) -> float:
+        return self.policy.cooldown(self.trips)
+
+    def trip(self, now: Optional[float] = None) -> bool:
+        """记录一次熔断；已处于 open 状态时不重复计数，返回是否发生了状态转换"""
+        now = time.time() if now is None else now
+        if self.get_state(now) == BreakerState.OPEN:
+            return False
+        self.trips += 1
+        self.opened_at = now
+        self.closed_at = 0
+        self._changed()
+        return True
+
+    def force_open(self, opened_at: float):
+        """直接设置熔断时间（兼容 Provider.last_unhealthy_time）"""
+        self.opened_at = opened_at
+        self.trips = max(self.trips, 1)
+        self._changed()
+
+    def record_success(self, now: Optional[float] = None):
+        """请求成功：open/half_open 状态下关闭熔断并开始慢启动"""
+        if not self.opened_at:
+            return
+        self.opened_at = 0
+        self.trips = 0
+        self.closed_at = time.time() if now is None else now
+        self._changed()
+
+    def reset(self):
+        """完全重置，不进入慢启动"""
+        was_open = bool(self.opened_at)
+        self.opened_at = 0
+        self.trips = 0
+        self.closed_at = 0
+        if was_open:
+            self._changed()
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def slow_start_weight(self, now: Optional[float] = None) -> float:
+        """慢启动期间的流量权重 (0, 1]，不在慢启动中时为 1"""
+        duration = self.policy.slow_start_duration
+        if not self.closed_at or duration <= 0:
+            return 1.0
+        now = time.time() if now is None else now
+        return min(1.0, max(now - self.closed_at, 0) / duration)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """/providers 中展示的熔断状态"""
+        now = time.time()
+        state = self.get_state(now)
+        return {
+            "state": state.value,
+            "trips": self.trips,
+            "cooldown": self.cooldown if self.opened_at else None,
+            "retry_at": self.opened_at + self.cooldown if state == BreakerState.OPEN else None,
+            "slow_start_weight": self.slow_start_weight(now)
+        }
@@ -0,0 +1,270 @@
+"""上游HTTP客户端连接池
+
+为每个provider维护长连接的 httpx.AsyncClient，按 (provider, proxy, 超时配置) 复用，
+避免每个请求都重新进行 TCP/TLS 握手和代理 CONNECT。
+OpenAI类型的provider额外缓存 openai.AsyncOpenAI 实例，底层共享同一个连接池。
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+import httpx
+import openai
+
+from utils import debug, LogRecord, LogEvent
+
+
+# (provider_name, proxy, profile, (connect, read, pool))
+ClientKey = Tuple[str, Optional[str], str, Tuple[float, float, float]]
+
+# (provider_name, profile)
+OpenAIClientKey = Tuple[str, str]
+
+
+def build_timeout(timeouts: Dict[str, Any]) -> httpx.Timeout:
+    """根据超时配置构建 httpx.Timeout（write 使用 read_timeout）"""
+    return httpx.Timeout(
+        connect=timeouts['connect_timeout'],
+        read=timeouts['read_timeout'],
+        write=timeouts['read_timeout'],
+        pool=timeouts['pool_timeout']
+    )
+
+
+class ProviderClientPool:
+    """Provider级别的共享 httpx.AsyncClient 注册表
+
+    客户端按需懒创建，跨请求复用，在应用关闭时统一关闭。
+    配置重载后失效的客户端立即移出注册表（新请求使用新客户端），
+    但要等其上进行中的请求（包括流式响应）结束后才关闭，最多等待 stale_client_grace 秒。
+    """
+
+    # 检查失效客户端是否已空闲的间隔（秒）
+    DRAIN_POLL_INTERVAL = 1.0
+
+    def __init__(self):
+        self._clients: Dict[ClientKey, httpx.AsyncClient] = {}
+        # OpenAI客户端: key -> (client, (base_url, auth_value))
+        self._openai_clients: Dict[OpenAIClientKey, Tuple[openai.AsyncOpenAI, Tuple[str, str]]] = {}
+        self.max_connections: int = 100
+        self.max_keepalive_connections: int = 20
+        self.keepalive_expiry: float = 30.0
+        # 预热：每个客户端保持的空闲连接数（0 表示关闭）及刷新间隔
+        self.prewarm_connections: int = 0
+        self.prewarm_interval: float = 15.0
+        # 失效客户端等待进行中请求结束的最长时间（秒），超时后强制关闭
+        self.stale_client_grace: float = 600.0
+        # 等待关闭的失效客户端及其关闭任务（保留引用，避免任务被垃圾回收）
+        self._draining: Set[httpx.AsyncClient] = set()
+        self._close_tasks: Set[asyncio.Task] = set()
+
+    def configure(self, pool_config: Optional[Dict[str, Any]] = None):
+        """从 settings.connection_pool 加载连接池参数"""
+        pool_config = pool_config or {}
+        self.max_connections = pool_config.get('max_connections', 100)
+        self.max_keepalive_connections = pool_config.get('max_keepalive_connections', 20)
+        self.keepalive_expiry = pool_config.get('keepalive_expiry', 30.0)
+        # 空闲连接数不能超过keep-alive上限，否则多出的连接会被立即关闭
+        self.prewarm_connections = min(
+            pool_config.get('prewarm_connections', 0), self.max_keepalive_connections
+        )
+        # 默认在 keepalive_expiry 过半时刷新，保证连接在过期前被重新使用
+        self.prewarm_interval = pool_config.get('prewarm_interval', self.keepalive_expiry / 2)
+        self.stale_client_grace = pool_config.get('stale_client_grace', 600)
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    @staticmethod
+    def make_key(provider, profile: str, timeouts: Dict[str, Any]) -> ClientKey:
+        return (
+            provider.name,
+            provider.proxy or None,
+            profile,
+            (timeouts['connect_timeout'], timeouts['read_timeout'], timeouts['pool_timeout'])
+        )
+
+    def get_client(self, provider, profile: str, timeouts: Dict[str, Any]) -> httpx.AsyncClient:
+        """获取（必要时创建）provider的共享客户端
+
+        Args:
+            provider: Provider对象
+            profile: 超时配置类型 ("streaming" | "non_streaming")
+            timeouts: 对应的超时配置
+        """
+        key = self.make_key(provider, profile, timeouts)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=build_timeout(timeouts),
+                proxy=provider.proxy or None,
+                limits=self.limits
+            )
+            self._clients[key] = client
+            debug(LogRecord(
+                event=LogEvent.PROVIDER_CLIENT_CREATED.value,
+                message=f"Created pooled HTTP client for provider {provider.name} ({profile})",
+                data={
+                    "provider": provider.name,
+                    "profile": profile,
+                    "proxy": bool(provider.proxy),
+                    "pooled_clients": len(self._clients)
+                }
+            ))
+        return client
+
+    def get_openai_client(self, provider, profile: str, timeouts: Dict[str, Any], default_headers: Dict[str, str]) -> openai.AsyncOpenAI:
+        """获取（必要时创建）provider的共享 AsyncOpenAI 客户端
+
+        只有当 base_url、密钥或底层HTTP客户端（代理/超时）变化时才重新创建。
+        """
+        http_client = self.get_client(provider, profile, timeouts)
+        key = (provider.name, profile)
+        fingerprint = (provider.base_url, provider.auth_value)
+        cached = self._openai_clients.get(key)
+        if cached is not None:
+            client, cached_fingerprint = cached
+            if cached_fingerprint == fingerprint and client._client is http_client:
+                return client
+
+        client = openai.AsyncOpenAI(
+            api_key=provider.auth_value,
+            base_url=provider.base_url,
+            default_headers=default_headers,
+            http_client=http_client
+        )
+        self._openai_clients[key] = (client, fingerprint)
+        debug(LogRecord(
+            event=LogEvent.PROVIDER_CLIENT_CREATED.value,
+            message=f"Created OpenAI client for provider {provider.name} ({profile})",
+            data={
+                "provider": provider.name,
+                "profile": profile,
+                "replaced": cached is not None
+            }
+        ))
+        return client
+
+    def prune(self, valid_keys: Iterable[ClientKey], providers: Iterable[Any] = ()):
+        """移除不再对应当前配置的客户端，并在其请求结束后关闭（配置重载后调用）"""
+        valid = set(valid_keys)
+        stale = [key for key in self._clients if key not in valid]
+        for key in stale:
+            self._schedule_close(self._clients.pop(key))
+        if stale:
+            debug(LogRecord(
+                event=LogEvent.PROVIDER_CLIENTS_PRUNED.value,
+                message=f"Retired {len(stale)} pooled HTTP client(s) after configuration change",
+                data={"providers": sorted({key[0] for key in stale})}
+            ))
+        
+        # OpenAI客户端仅在 base_url/密钥/代理 变化或provider被移除时失效
+        current = {p.name: (p.base_url, p.auth_value) for p in providers}
+        live_http_clients = set(self._clients.values())
+        for key, (client, fingerprint) in list(self._openai_clients.items()):
+            if current.get(key[0]) != fingerprint or client._client not in live_http_clients:
+                del self._openai_clients[key]
+
+    def _schedule_close(self, client: httpx.AsyncClient):
+        self._draining.add(client)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 没有运行中的事件循环（如启动前加载配置）：留到 aclose() 时关闭
+            return
+        task = loop.create_task(self._close_when_drained(client))
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+
+    async def _close_when_drained(self, client: httpx.AsyncClient):
+        deadline = time.monotonic() + self.stale_client_grace
+        while self._has_in_flight_requests(client) and time.monotonic() < deadline:
+            await asyncio.sleep(self.DRAIN_POLL_INTERVAL)
+        self._draining.discard(client)
+        try:
+            await client.aclose()
+        except Exception as e:
+            debug(LogRecord(
+                event=LogEvent.PROVIDER_CLIENT_CLOSE_FAILED.value,
+                message=f"Failed to close retired HTTP client: {type(e).__name__}: {e}",
+                data={"error": str(e)}
+            ))
+
+    async def aclose(self):
+        """关闭所有客户端，包括等待请求结束的失效客户端（FastAPI lifespan 关闭阶段调用）"""
+        for task in list(self._close_tasks):
+            task.cancel()
+        if self._close_tasks:
+            await asyncio.gather(*self._close_tasks, return_exceptions=True)
+        clients = list(self._clients.values()) + list(self._draining)
+        self._clients.clear()
+        self._draining.clear()
+        # OpenAI客户端共享上面的HTTP客户端，关闭HTTP客户端即可
+        self._openai_clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+
+    def get_provider_stats(self, provider_name: str) -> Dict[str, int]:
+        """统计provider所有客户端的连接状态（idle=已建立可直接复用，active=请求进行中）"""
+        stats = {"clients": 0, "idle_connections": 0, "active_connections": 0}
+        for key, client in self._clients.items():
+            if key[0] != provider_name or client.is_closed:
+                continue
+            stats["clients"] += 1
+            for state in self._connection_states(client):
+                stats[f"{state}_connections"] += 1
+        return stats
+
+    def count_idle_connections(self, client: httpx.AsyncClient) -> int:
+        return sum(1 for state in self._connection_states(client) if state == "idle")
+
+    @staticmethod
+    def _transport_pools(client: httpx.AsyncClient) -> Iterable[Any]:
+        """客户端实际使用的 httpcore 连接池
+
+        配置了代理时请求经由 _mounts 中的代理transport发送，默认的 _transport 连接池不会被使用。
+        """
+        transports = [getattr(client, '_transport', None)]
+        transports.extend((getattr(client, '_mounts', None) or {}).values())
+        for transport in transports:
+            pool = getattr(transport, '_pool', None)
+            if pool is not None:
+                yield pool
+
+    @staticmethod
+    def _has_in_flight_requests(client: httpx.AsyncClient) -> bool:
+        """客户端上是否还有未结束的请求（排队中、进行中或响应体尚未读完/关闭）"""
+        for pool in ProviderClientPool._transport_pools(client):
+            if getattr(pool, '_requests', None):
+                return True
+            if any(state == "active" for state in ProviderClientPool._pool_connection_states(pool)):
+                return True
+        return False
+
+    @staticmethod
+    def _connection_states(client: httpx.AsyncClient) -> Iterable[str]:
+        for pool in ProviderClientPool._transport_pools(client):
+            yield from ProviderClientPool._pool_connection_states(pool)
+
+    @staticmethod
+    def _pool_connection_states(pool: Any) -> Iterable[str]:
+        """读取 httpcore 连接池中每个连接的状态（依赖内部属性，读取失败时视为无连接）"""
+        for connection in getattr(pool, 'connections', None) or []:
+            try:
+                if connection.is_closed() or connection.has_expired():
+                    continue
+                yield "idle" if connection.is_idle() else "active"
+            except Exception:
+                continue
+
+    def __len__(self) -> int:
+        return len(self._clients)
@@ -4,8 +4,104 @@
 """
 
 import httpx
+import re
 import time
-from typing import List, Optional, Tuple, Union, Dict, Any
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union, Dict, Any, Iterable, Pattern
+
+
+# 小写化后含义会改变的转义（\S \W \D \B \A \Z \N{...}、十六进制/unicode/八进制字符）
+_CASE_SENSITIVE_ESCAPE = re.compile(r'\\[A-Zxu0]')
+
+
+class HealthPatternMatcher:
+    """预编译的健康检查匹配器（配置加载时构建一次）
+
+    - 异常消息：所有简单字符串模式合并为一个忽略大小写的正则（转义后的字面量交替），一次扫描完成
+    - 响应体：每个正则只编译一次，按配置顺序匹配；无效的正则降级为字面量匹配
+
+    re.IGNORECASE 会使正则引擎无法使用字面量前缀快速扫描（"data:"、"event:" 这类在SSE中
+    每行都出现的前缀慢约10倍），因此小写化后含义不变的响应体模式会被小写编译，
+    在只计算一次的小写内容上做区分大小写的匹配。响应体模式不合并为单个交替正则：
+    交替分支同样无法使用前缀扫描，在1MB的SSE transcript上比逐个搜索更慢
+    （见 tests/test_health_patterns.py 中的基准测试）。
+    """
+
+    def __init__(
+        self,
+        unhealthy_http_codes: Optional[Iterable[int]] = None,
+        unhealthy_exception_patterns: Optional[Iterable[str]] = None,
+        unhealthy_response_body_patterns: Optional[Iterable[str]] = None
+    ):
+        self.unhealthy_http_codes = frozenset(unhealthy_http_codes or ())
+        
+        # 异常消息模式：小写字面量 -> 原始模式（重复时第一个生效）
+        self._exception_patterns: Dict[str, str] = {}
+        for pattern in unhealthy_exception_patterns or ():
+            if pattern:
+                self._exception_patterns.setdefault(pattern.lower(), pattern)
+        self._exception_regex = self._compile_literals(self._exception_patterns)
+        
+        # 响应体模式：(编译后的正则, 是否在小写内容上匹配, 触发原因)
+        self._body_matchers: List[Tuple[Pattern[str], bool, str]] = []
+        for pattern in unhealthy_response_body_patterns or ():
+            reason = f"response_body_pattern_{pattern}"
+            try:
+                re.compile(pattern)
+            except re.error:
+                # 与之前一致：无效的正则降级为（忽略大小写的）字符串包含匹配
+                self._body_matchers.append((re.compile(re.escape(pattern.lower())), True, f"{reason}_fallback"))
+                continue
+            self._body_matchers.append(self._compile_body_pattern(pattern, reason))
+        self._needs_lowered = any(on_lowered for _, on_lowered, _ in self._body_matchers)
+
+    @staticmethod
+    def _compile_body_pattern(pattern: str, reason: str) -> Tuple[Pattern[str], bool, str]:
+        if not _CASE_SENSITIVE_ESCAPE.search(pattern):
+            try:
+                return re.compile(pattern.lower()), True, reason
+            except re.error:
+                pass
+        return re.compile(pattern, re.IGNORECASE), False, reason
+
+    @staticmethod
+    def _compile_literals(literals: Iterable[str]) -> Optional[Pattern[str]]:
+        # 较长的字面量优先，使同一位置上更具体的模式胜出
+        ordered = sorted(literals, key=len, reverse=True)
+        if not ordered:
+            return None
+        return re.compile("|".join(re.escape(literal) for literal in ordered), re.IGNORECASE)
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "HealthPatternMatcher":
+        return cls(
+            settings.get('unhealthy_http_codes', []),
+            settings.get('unhealthy_exception_patterns', []),
+            settings.get('unhealthy_response_body_patterns', [])
+        )
+
+    def match_exception(self, error_message: str) -> Optional[str]:
+        """返回异常消息命中的模式（原始配置字符串），未命中返回 None"""
+        if self._exception_regex is None or not error_message:
+            return None
+        match = self._exception_regex.search(error_message)
+        if match is None:
+            return None
+        return self._exception_patterns.get(match.group(0).lower(), match.group(0))
+
+    def match_response_body(self, content: str) -> Optional[str]:
+        """返回响应内容命中的触发原因，未命中返回 None"""
+        lowered = content.lower() if self._needs_lowered else content
+        for regex, on_lowered, reason in self._body_matchers:
+            if regex.search(lowered if on_lowered else content):
+                return reason
+        return None
+
+
+@lru_cache(maxsize=32)
+def _cached_matcher(http_codes: Tuple[int, ...], exception_patterns: Tuple[str, ...],
+                    response_body_patterns: Tuple[str, ...]) -> HealthPatternMatcher:
+    return HealthPatternMatcher(http_codes, exception_patterns, response_body_patterns)
 
 
 def should_mark_unhealthy(
@@ -15,7 +111,8 @@ def should_mark_unhealthy(
     source_type: str = "exception",  # "exception" | "response_body"
     unhealthy_http_codes: List[int] = None,
     unhealthy_exception_patterns: List[str] = None,
-    unhealthy_response_body_patterns: List[str] = None
+    unhealthy_response_body_patterns: List[str] = None,
+    matcher: Optional[HealthPatternMatcher] = None
 ) -> Tuple[bool, str]:
     """直接判断是否应该标记为unhealthy
     
@@ -32,16 +129,20 @@ def should_mark_unhealthy(
         unhealthy_http_codes: 配置的unhealthy HTTP状态码列表
         unhealthy_exception_patterns: 配置的异常错误模式列表（简单字符串匹配）
         unhealthy_response_body_patterns: 配置的响应体错误模式列表（正则匹配）
+        matcher: 预编译的匹配器（提供时忽略上面三个列表参数）
         
     Returns:
         Tuple[bool, str]: (是否标记为unhealthy, 触发原因描述)
     """
-    unhealthy_http_codes = unhealthy_http_codes or []
-    unhealthy_exception_patterns = unhealthy_exception_patterns or []
-    unhealthy_response_body_patterns = unhealthy_response_body_patterns or []
+    if matcher is None:
+        matcher = _cached_matcher(
+            tuple(unhealthy_http_codes or ()),
+            tuple(unhealthy_exception_patterns or ()),
+            tuple(unhealthy_response_body_patterns or ())
+        )
     
     # 1. HTTP状态码判断 (最高优先级)
-    if http_status_code and http_status_code in unhealthy_http_codes:
+    if http_status_code and http_status_code in matcher.unhealthy_http_codes:
         return True, f"http_status_{http_status_code}"
     
     # 2. 网络异常类型判断（常见的网络问题）
@@ -59,22 +160,15 @@ def should_mark_unhealthy(
     # 3. 根据source_type选择对应的匹配策略
     if source_type == "exception":
         # Exception使用简单字符串包含匹配（宽松策略）
-        error_text = error_message.lower()
-        for pattern in unhealthy_exception_patterns:
-            if pattern.lower() in error_text:
-                return True, f"exception_pattern_{pattern}"
+        pattern = matcher.match_exception(error_message)
+        if pattern is not None:
+            return True, f"exception_pattern_{pattern}"
                 
     elif source_type == "response_body":
         # Response body使用正则匹配（严格策略）
-        import re
-        for pattern in unhealthy_response_body_patterns:
-            try:
-                if re.search(pattern, error_message, re.IGNORECASE):
-                    return True, f"response_body_pattern_{pattern}"
-            except re.error:
-                # 如果正则表达式无效，降级为简单字符串匹配
-                if pattern.lower() in error_message.lower():
-                    return True, f"response_body_pattern_{pattern}_fallback"
+        reason = matcher.match_response_body(error_message)
+        if reason is not None:
+            return True, reason
         
     return False, "healthy"
 
@@ -134,7 +228,8 @@ def get_error_handling_decision(
     http_status_code: Optional[int] = None, 
     is_streaming: bool = False,
     unhealthy_http_codes: List[int] = None,
-    unhealthy_exception_patterns: List[str] = None
+    unhealthy_exception_patterns: List[str] = None,
+    matcher: Optional[HealthPatternMatcher] = None
 ) -> Tuple[bool, bool, str]:
     """获取错误处理决策
     
@@ -144,6 +239,7 @@ def get_error_handling_decision(
         is_streaming: 是否为streaming请求
         unhealthy_http_codes: 配置的unhealthy HTTP状态码列表
         unhealthy_exception_patterns: 配置的异常错误模式列表
+        matcher: 预编译的匹配器（提供时忽略上面两个列表参数）
         
     Returns:
         Tuple[bool, bool, str]: (should_mark_unhealthy, can_failover, error_reason)
@@ -158,7 +254,8 @@ def get_error_handling_decision(
         exception_type=exception_type,
         source_type="exception",
         unhealthy_http_codes=unhealthy_http_codes,
-        unhealthy_exception_patterns=unhealthy_exception_patterns
+        unhealthy_exception_patterns=unhealthy_exception_patterns,
+        matcher=matcher
     )
     
     # 判断是否可以failover
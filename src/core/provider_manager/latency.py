@@ -0,0 +1,87 @@
+"""Provider延迟统计
+
+记录每个provider从发出请求到得到首个应答（响应头/首个事件）的耗时，
+按流式/非流式分开统计（非流式的首个应答包含完整生成时间，两者不可混用）。
+同时维护首字节耗时与流式输出速度（tokens/s）的指数加权移动平均（EWMA），
+供 least_latency 选择策略使用。
+"""
+
+import math
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+
+# (provider_name, is_streaming)
+LatencyKey = Tuple[str, bool]
+
+
+class LatencyTracker:
+    """按provider保存最近N个首字节耗时样本（用于分位数）及EWMA统计"""
+
+    def __init__(self, window_size: int = 100, alpha: float = 0.3):
+        self.window_size = window_size
+        # EWMA平滑系数，越大越偏向最近的样本
+        self.alpha = alpha
+        self._samples: Dict[LatencyKey, Deque[float]] = {}
+        self._ttfb_ewma: Dict[LatencyKey, float] = {}
+        # provider_name -> 流式输出速度 tokens/s EWMA
+        self._throughput_ewma: Dict[str, float] = {}
+
+    def _update_ewma(self, previous: Optional[float], value: float) -> float:
+        if previous is None:
+            return value
+        return self.alpha * value + (1 - self.alpha) * previous
+
+    def record(self, provider_name: str, is_streaming: bool, seconds: float):
+        key = (provider_name, is_streaming)
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window_size)
+        samples.append(seconds)
+        self._ttfb_ewma[key] = self._update_ewma(self._ttfb_ewma.get(key), seconds)
+
+    def record_throughput(self, provider_name: str, output_tokens: int, seconds: float):
+        """记录一次流式响应的输出速度"""
+        if output_tokens <= 0 or seconds <= 0:
+            return
+        self._throughput_ewma[provider_name] = self._update_ewma(
+            self._throughput_ewma.get(provider_name), output_tokens / seconds
+        )
+
+    def ttfb_ewma(self, provider_name: str, is_streaming: bool) -> Optional[float]:
+        return self._ttfb_ewma.get((provider_name, is_streaming))
+
+    def throughput_ewma(self, provider_name: str) -> Optional[float]:
+        return self._throughput_ewma.get(provider_name)
+
+    def sample_count(self, provider_name: str, is_streaming: bool) -> int:
+        samples = self._samples.get((provider_name, is_streaming))
+        return len(samples) if samples else 0
+
+    def percentile(self, provider_name: str, is_streaming: bool, q: float) -> Optional[float]:
+        """返回第 q (0-100) 百分位耗时（nearest-rank），无样本时返回 None"""
+        samples = self._samples.get((provider_name, is_streaming))
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        rank = max(1, math.ceil(q / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    def prune(self, provider_names):
+        """移除已不在配置中的provider的样本"""
+        valid = set(provider_names)
+        for key in [key for key in self._samples if key[0] not in valid]:
+            del self._samples[key]
+            self._ttfb_ewma.pop(key, None)
+        for name in [name for name in self._throughput_ewma if name not in valid]:
+            del self._throughput_ewma[name]
+
+    def get_stats(self, provider_name: str) -> Dict[str, Optional[float]]:
+        """/providers 中展示的延迟统计"""
+        return {
+            "ttfb_streaming_ewma": self.ttfb_ewma(provider_name, True),
+            "ttfb_non_streaming_ewma": self.ttfb_ewma(provider_name, False),
+            "output_tokens_per_sec_ewma": self.throughput_ewma(provider_name),
+            "samples_streaming": self.sample_count(provider_name, True),
+            "samples_non_streaming": self.sample_count(provider_name, False)
+        }
@@ -0,0 +1,99 @@
+"""Provider负载统计
+
+按provider统计进行中的请求数（in-flight）与活跃流式响应数，
+用于 least_outstanding / p2c 选择策略，以及 max_concurrency / max_streams 准入控制。
+请求在发往provider时开始计数，非流式请求在响应处理完成时、流式请求在流结束时释放。
+"""
+
+import asyncio
+from typing import Dict, Optional, Set
+
+
+class InFlightTicket:
+    """一次进行中的provider请求，release() 可重复调用但只生效一次"""
+
+    __slots__ = ("_tracker", "provider_name", "is_streaming", "released")
+
+    def __init__(self, tracker: "ProviderLoadTracker", provider_name: str, is_streaming: bool):
+        self._tracker = tracker
+        self.provider_name = provider_name
+        self.is_streaming = is_streaming
+        self.released = False
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        self._tracker._finish(self.provider_name, self.is_streaming)
+
+
+class ProviderLoadTracker:
+    """进行中请求计数（仅在事件循环中使用，无需加锁）"""
+
+    def __init__(self):
+        self._in_flight: Dict[str, int] = {}
+        self._active_streams: Dict[str, int] = {}
+        # 等待任一provider释放名额的请求（准入等待队列）
+        self._waiters: Set[asyncio.Future] = set()
+
+    def start(self, provider_name: str, is_streaming: bool) -> InFlightTicket:
+        self._in_flight[provider_name] = self._in_flight.get(provider_name, 0) + 1
+        if is_streaming:
+            self._active_streams[provider_name] = self._active_streams.get(provider_name, 0) + 1
+        return InFlightTicket(self, provider_name, is_streaming)
+
+    def try_start(self, provider_name: str, is_streaming: bool,
+                  max_concurrency: Optional[int] = None, max_streams: Optional[int] = None) -> Optional[InFlightTicket]:
+        """非阻塞地占用一个名额，provider已满时返回 None"""
+        if not self.has_capacity(provider_name, is_streaming, max_concurrency, max_streams):
+            return None
+        return self.start(provider_name, is_streaming)
+
+    def has_capacity(self, provider_name: str, is_streaming: bool,
+                     max_concurrency: Optional[int] = None, max_streams: Optional[int] = None) -> bool:
+        if max_concurrency is not None and self.in_flight(provider_name) >= max_concurrency:
+            return False
+        if is_streaming and max_streams is not None and self.active_streams(provider_name) >= max_streams:
+            return False
+        return True
+
+    async def wait_for_release(self, timeout: float, max_waiters: int) -> bool:
+        """等待任一请求结束，超时或等待队列已满时返回 False"""
+        if timeout <= 0 or len(self._waiters) >= max_waiters:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters.discard(waiter)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _finish(self, provider_name: str, is_streaming: bool):
+        self._decrement(self._in_flight, provider_name)
+        if is_streaming:
+            self._decrement(self._active_streams, provider_name)
+        # 唤醒所有等待者重新尝试；名额仍由 try_start 竞争，未抢到的会继续等待直到截止时间
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @staticmethod
+    def _decrement(counts: Dict[str, int], provider_name: str):
+        remaining = counts.get(provider_name, 0) - 1
+        if remaining > 0:
+            counts[provider_name] = remaining
+        else:
+            counts.pop(provider_name, None)
+
+    def in_flight(self, provider_name: str) -> int:
+        return self._in_flight.get(provider_name, 0)
+
+    def active_streams(self, provider_name: str) -> int:
+        return self._active_streams.get(provider_name, 0)
@@ -6,21 +6,26 @@ Manages multiple Claude Code and OpenAI-compatible providers with simplified mod
 import os
 import time
 import yaml
-import re
 import random
 import threading
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Union
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 import httpx
 
 # OAuth manager will be imported dynamically when needed
 from utils import info, warning, error, debug, LogRecord, LogEvent
 from .health import (
-    get_error_handling_decision
+    get_error_handling_decision, HealthPatternMatcher
 )
 from .provider_auth import ProviderAuth
+from .client_pool import ProviderClientPool
+from .warmer import ConnectionWarmer
+from .latency import LatencyTracker
+from .load import ProviderLoadTracker, InFlightTicket
+from .breaker import CircuitBreaker, BreakerPolicy, BreakerState
+from .routing import RouteIndex
 
 
 class ProviderType(str, Enum):
@@ -38,6 +43,9 @@ class SelectionStrategy(str, Enum):
     PRIORITY = "priority"
     ROUND_ROBIN = "round_robin"
     RANDOM = "random"
+    LEAST_LATENCY = "least_latency"
+    LEAST_OUTSTANDING = "least_outstanding"
+    P2C = "p2c"  # power of two choices
 
 
 class StreamingMode(str, Enum):
@@ -52,6 +60,8 @@ class ModelRoute:
     model: str
     priority: int
     enabled: bool = True
+    # 对冲请求：该route作为首选时，超过此时间（秒）未应答则并行请求下一个选项；"auto" 使用p95延迟
+    hedge_delay: Optional[Union[float, str]] = None
 
 
 @dataclass
@@ -64,16 +74,28 @@ class Provider:
     enabled: bool = True
     proxy: Optional[str] = None
     streaming_mode: StreamingMode = StreamingMode.AUTO
+    max_concurrency: Optional[int] = None  # 最大并发请求数（含流式），None 表示不限制
+    max_streams: Optional[int] = None  # 最大同时进行的流式请求数
     failure_count: int = 0
     last_failure_time: float = 0  # 保留作为统计指标
-    last_unhealthy_time: float = 0  # 用于健康检查的时间戳
     last_success_time: float = 0  # 添加成功时间跟踪
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker, repr=False)
     
-    def is_healthy(self, cooldown_seconds: int = 60) -> bool:
-        """Check if provider is healthy (not in unhealthy cooldown period)"""
-        if self.last_unhealthy_time == 0:
-            return True
-        return time.time() - self.last_unhealthy_time > cooldown_seconds
+    @property
+    def last_unhealthy_time(self) -> float:
+        """Time the circuit breaker last opened (0 when closed)"""
+        return self.breaker.opened_at
+    
+    @last_unhealthy_time.setter
+    def last_unhealthy_time(self, value: float):
+        if not value:
+            self.breaker.reset()
+            return
+        self.breaker.force_open(value)
+    
+    def is_healthy(self) -> bool:
+        """Check if provider can take requests (circuit closed, or half-open for trial requests)"""
+        return self.breaker.state != BreakerState.OPEN
     
     def mark_failure(self):
         """Mark provider as failed"""
@@ -84,7 +106,7 @@ class Provider:
         """Mark provider as successful (reset failure count and unhealthy state)"""
         self.failure_count = 0
         self.last_failure_time = 0  # 保留作为统计指标
-        self.last_unhealthy_time = 0  # 重置unhealthy状态
+        self.breaker.record_success()  # 关闭熔断，从熔断中恢复时进入慢启动
         self.last_success_time = time.time()  # 记录成功时间
     
     def get_effective_streaming_mode(self) -> StreamingMode:
@@ -116,12 +138,22 @@ class ProviderManager:
         # Provider认证处理器
         self.provider_auth = ProviderAuth()
         
+        # 上游HTTP客户端连接池（跨请求复用）
+        self.client_pool = ProviderClientPool()
+        # 连接预热（后台任务由 lifespan 启动）
+        self.connection_warmer = ConnectionWarmer(self)
+        
         # 简化的配置
         self.model_routes: Dict[str, List[ModelRoute]] = {}
+        # 预编译的路由索引（加载model_routes时重建）
+        self.route_index = RouteIndex({}, [])
         self.selection_strategy: SelectionStrategy = SelectionStrategy.PRIORITY
         
-        # 用于round_robin策略的索引记录
-        self._round_robin_indices: Dict[str, int] = {}
+        # 首个应答延迟统计（用于自适应对冲延迟）
+        self.latency_tracker = LatencyTracker()
+        
+        # 进行中请求/活跃流统计（用于 least_outstanding / p2c 策略）
+        self.load_tracker = ProviderLoadTracker()
         
         # 请求活跃状态跟踪
         self._last_request_time: float = 0
@@ -135,6 +167,10 @@ class ProviderManager:
         self.unhealthy_threshold: int = 2
         self.unhealthy_reset_on_success: bool = True 
         self.unhealthy_reset_timeout: float = 300  # 5分钟
+        # 熔断策略（所有provider共享）
+        self.breaker_policy = BreakerPolicy()
+        # 预编译的健康检查模式（unhealthy_http_codes / exception / response_body patterns）
+        self.health_matcher = HealthPatternMatcher()
         
         self.load_config()
     
@@ -160,6 +196,8 @@ class ProviderManager:
             self.unhealthy_threshold = self.settings.get('unhealthy_threshold', 2)
             self.unhealthy_reset_on_success = self.settings.get('unhealthy_reset_on_success', True)
             self.unhealthy_reset_timeout = self.settings.get('unhealthy_reset_timeout', 300)
+            self.breaker_policy = BreakerPolicy.from_settings(self.settings)
+            self.health_matcher = HealthPatternMatcher.from_settings(self.settings)
             
             # 加载服务商配置
             providers_config = config.get('providers', [])
@@ -183,7 +221,10 @@ class ProviderManager:
                         auth_value=provider_config['auth_value'],
                         enabled=provider_config.get('enabled', True),
                         proxy=provider_config.get('proxy'),
-                        streaming_mode=streaming_mode
+                        streaming_mode=streaming_mode,
+                        max_concurrency=provider_config.get('max_concurrency'),
+                        max_streams=provider_config.get('max_streams'),
+                        breaker=CircuitBreaker(self.breaker_policy, on_change=self._on_health_transition)
                     )
                     debug(LogRecord(
                         event=LogEvent.PROVIDER_LOADED.value,
@@ -196,6 +237,12 @@ class ProviderManager:
             
             if not self.providers:
                 raise ValueError("No enabled providers found in configuration")
+            
+            # 更新连接池配置，关闭与新配置不匹配的客户端
+            self.client_pool.configure(self.settings.get('connection_pool', {}))
+            self.client_pool.prune(self._current_client_keys(), self.providers)
+            self.latency_tracker.prune(p.name for p in self.providers)
+            self.latency_tracker.alpha = self.settings.get('least_latency', {}).get('alpha', 0.3)
                 
         except Exception as e:
             raise RuntimeError(f"Failed to load provider configuration: {e}")
@@ -212,32 +259,22 @@ class ProviderManager:
                         provider=route_config['provider'],
                         model=route_config['model'],
                         priority=route_config['priority'],
-                        enabled=route_config.get('enabled', True)
+                        enabled=route_config.get('enabled', True),
+                        hedge_delay=route_config.get('hedge_delay')
                     )
                     route_list.append(route)
             self.model_routes[model_pattern] = route_list
-    
-    def _get_provider_by_name(self, name: str) -> Optional[Provider]:
-        """根据名称获取服务商"""
-        for provider in self.providers:
-            if provider.name == name:
-                return provider
-        return None
-    
-    def _matches_pattern(self, model_name: str, pattern: str) -> bool:
-        """检查模型名是否匹配给定的模式"""
-        model_lower = model_name.lower()
-        pattern_lower = pattern.lower()
         
-        # 支持通配符匹配
-        if '*' in pattern:
-            regex_pattern = pattern_lower.replace('*', '.*')
-            return bool(re.search(regex_pattern, model_lower))
-        else:
-            # 精确匹配
-            return pattern_lower == model_lower
+        self.route_index = RouteIndex(
+            self.model_routes, self.providers,
+            cache_size=self.settings.get('routing', {}).get('cache_size', 1024)
+        )
+    
+    def _on_health_transition(self):
+        """provider熔断打开/关闭时使路由解析缓存失效"""
+        self.route_index.invalidate()
     
-    def select_model_and_provider_options(self, requested_model: str, provider_name: Optional[str] = None) -> List[Tuple[str, Provider]]:
+    def select_model_and_provider_options(self, requested_model: str, provider_name: Optional[str] = None, is_streaming: bool = False) -> List[Tuple[str, Provider]]:
         """
         简化的模型选择逻辑
         返回按优先级排序的 (target_model, provider) 列表
@@ -245,22 +282,18 @@ class ProviderManager:
         Args:
             requested_model: 请求的模型名称
             provider_name: 可选的指定provider名称，如果指定则只返回该provider的选项
+            is_streaming: 是否为流式请求（least_latency 策略按请求类型使用不同的延迟统计）
         """
         # If provider is specified, return only that provider option
         if provider_name:
-            # Find the specified provider
-            target_provider = None
-            for provider in self.providers:
-                if provider.name == provider_name:
-                    target_provider = provider
-                    break
+            target_provider = self.route_index.get_provider(provider_name)
             
             if not target_provider:
                 # Provider not found
                 return []
                 
             # Check if provider is healthy and enabled
-            if not target_provider.enabled or not target_provider.is_healthy(self.get_failure_cooldown()):
+            if not target_provider.enabled or not target_provider.is_healthy():
                 return []
             
             # Find model route for this specific provider
@@ -268,60 +301,33 @@ class ProviderManager:
             target_model = requested_model  # Default to passthrough
             
             # Check if there's a specific model mapping for this provider
-            for pattern, routes in self.model_routes.items():
-                if self._matches_pattern(requested_model, pattern):
-                    for route in routes:
-                        if route.provider == provider_name:
-                            target_model = route.model if route.model != "passthrough" else requested_model
-                            break
+            for route in self.route_index.routes_for(requested_model):
+                if route.provider == provider_name:
+                    target_model = route.model if route.model != "passthrough" else requested_model
                     break
             
             return [(target_model, target_provider)]
         
         # Default behavior: return all available options for failover
-        # 1. 精确匹配
-        if requested_model in self.model_routes:
-            options = self._build_options_from_routes(self.model_routes[requested_model], requested_model)
-            if options:
-                return self._apply_selection_strategy(options, requested_model)
-        
-        # 2. 通配符匹配
-        for pattern, routes in self.model_routes.items():
-            if self._matches_pattern(requested_model, pattern):
-                options = self._build_options_from_routes(routes, requested_model)
-                if options:
-                    return self._apply_selection_strategy(options, requested_model)
-        
-        # 3. 没有匹配的路由
-        return []
-    
-    def _build_options_from_routes(self, routes: List[ModelRoute], requested_model: str) -> List[Tuple[str, Provider, int]]:
-        """从路由配置构建可用选项"""
-        options = []
-        cooldown = self.get_failure_cooldown()
-        
-        for route in routes:
-            if not route.enabled:
-                continue
-                
-            provider = self._get_provider_by_name(route.provider)
-            if not provider or not provider.enabled or not provider.is_healthy(cooldown):
-                continue
-            
-            # 处理模型名称
-            target_model = route.model
-            if target_model == "passthrough":
-                target_model = requested_model
-            
-            options.append((target_model, provider, route.priority))
-        
-        return options
+        # 精确匹配优先，其次通配符匹配；跳过没有可用provider的规则（解析结果已缓存）
+        pattern, options = self.route_index.resolve(requested_model)
+        if not options:
+            return []
+        return self._apply_slow_start(self._apply_selection_strategy(options, pattern, is_streaming))
     
-    def _apply_selection_strategy(self, options: List[Tuple[str, Provider, int]], requested_model: str) -> List[Tuple[str, Provider]]:
-        """根据选择策略对选项进行排序和选择"""
+    def _apply_selection_strategy(self, options: List[Tuple[str, Provider, int]], route_pattern: Optional[str], is_streaming: bool = False) -> List[Tuple[str, Provider]]:
+        """根据选择策略对选项进行排序和选择（options 来自路由缓存，不能原地修改）"""
         if not options:
             return []
         
+        if self.selection_strategy == SelectionStrategy.LEAST_LATENCY:
+            # 延迟策略本身随实时统计调整，不使用粘滞逻辑
+            return self._order_by_latency(options, is_streaming)
+        
+        if self.selection_strategy in (SelectionStrategy.LEAST_OUTSTANDING, SelectionStrategy.P2C):
+            # 负载策略同样不使用粘滞逻辑，否则突发流量会集中到同一个provider
+            return self._order_by_load(options)
+        
         # 检查粘滞provider是否过期，如果是则使用正常的优先级选择
         current_time = time.time()
         is_sticky_expired = (current_time - self._last_request_time) > self._sticky_provider_duration
@@ -352,13 +358,8 @@ class ProviderManager:
         elif self.selection_strategy == SelectionStrategy.ROUND_ROBIN:
             # Round robin选择
             sorted_options = sorted(options, key=lambda x: x[2])
-            key = f"{requested_model}_{len(sorted_options)}"
-            
-            if key not in self._round_robin_indices:
-                self._round_robin_indices[key] = 0
-            
-            current_index = self._round_robin_indices[key]
-            self._round_robin_indices[key] = (current_index + 1) % len(sorted_options)
+            # 轮询位置按路由规则记录，匹配同一规则的不同模型名共享轮询顺序
+            current_index = self.route_index.next_round_robin(route_pattern, len(sorted_options))
             
             # 将当前选择的放在第一位，其他保持优先级顺序
             selected = sorted_options.pop(current_index)
@@ -381,6 +382,165 @@ class ProviderManager:
         sorted_options = sorted(options, key=lambda x: x[2])
         return [(model, provider) for model, provider, priority in sorted_options]
     
+    def _apply_slow_start(self, options: List[Tuple[str, Provider]]) -> List[Tuple[str, Provider]]:
+        """慢启动：刚从熔断中恢复的provider按其权重概率保留位置，否则移到其他选项之后作为failover"""
+        kept = []
+        demoted = []
+        for option in options:
+            weight = option[1].breaker.slow_start_weight()
+            if weight < 1.0 and random.random() >= weight:
+                demoted.append(option)
+            else:
+                kept.append(option)
+        return kept + demoted
+    
+    def _find_route(self, requested_model: str, provider_name: str) -> Optional[ModelRoute]:
+        """查找请求模型对应路由中指定provider的route（与选择逻辑使用同一条路由规则）"""
+        pattern = self.route_index.resolve(requested_model)[0] or self.route_index.match_pattern(requested_model)
+        for route in self.model_routes.get(pattern, []) if pattern is not None else []:
+            if route.provider == provider_name:
+                return route
+        return None
+    
+    def record_first_response_latency(self, provider_name: str, is_streaming: bool, seconds: float):
+        """记录provider首个应答（响应头/首个事件）耗时"""
+        self.latency_tracker.record(provider_name, is_streaming, seconds)
+    
+    def get_hedge_delay(self, requested_model: str, provider: Provider, is_streaming: bool) -> Optional[float]:
+        """获取provider作为首选时的对冲延迟（秒），未启用对冲时返回 None
+        
+        route 配置 hedge_delay 为数字时直接使用；为 "auto" 时使用该provider首个应答耗时的
+        百分位（默认p95），样本不足时使用 settings.hedging.default_delay。
+        """
+        route = self._find_route(requested_model, provider.name)
+        if route is None or route.hedge_delay is None:
+            return None
+        
+        hedging = self.settings.get('hedging', {})
+        if route.hedge_delay != "auto":
+            return float(route.hedge_delay)
+        
+        delay = hedging.get('default_delay', 5.0)
+        if self.latency_tracker.sample_count(provider.name, is_streaming) >= hedging.get('min_samples', 20):
+            delay = self.latency_tracker.percentile(provider.name, is_streaming, hedging.get('percentile', 95))
+        return max(delay, hedging.get('min_delay', 0.5))
+    
+    def _order_by_latency(self, options: List[Tuple[str, Provider, int]], is_streaming: bool) -> List[Tuple[str, Provider]]:
+        """least_latency 策略：按首字节耗时与输出速度的EWMA排序
+        
+        预估耗时 = 首字节耗时EWMA + reference_output_tokens / 输出速度EWMA（仅流式请求）。
+        样本数不足 min_samples 的provider排在已评分provider之后（按优先级），
+        并以 exploration_rate 的概率被提到首位，使新加入/刚恢复的provider仍能获得流量并积累统计。
+        """
+        config = self.settings.get('least_latency', {})
+        min_samples = config.get('min_samples', 3)
+        exploration_rate = config.get('exploration_rate', 0.1)
+        reference_tokens = config.get('reference_output_tokens', 500)
+        
+        # 没有输出速度样本的provider按其他provider的平均速度估算，避免因缺少数据而占优
+        known_throughputs = [
+            t for t in (self.latency_tracker.throughput_ewma(option[1].name) for option in options) if t
+        ]
+        default_throughput = sum(known_throughputs) / len(known_throughputs) if known_throughputs else None
+        
+        scored = []
+        unsampled = []
+        for option in sorted(options, key=lambda x: x[2]):
+            provider = option[1]
+            ttfb = self.latency_tracker.ttfb_ewma(provider.name, is_streaming)
+            if ttfb is None or self.latency_tracker.sample_count(provider.name, is_streaming) < min_samples:
+                unsampled.append(option)
+                continue
+            estimate = ttfb
+            throughput = self.latency_tracker.throughput_ewma(provider.name) or default_throughput
+            if is_streaming and throughput:
+                estimate += reference_tokens / throughput
+            scored.append((estimate, option))
+        
+        ordered = [option for _, option in sorted(scored, key=lambda x: x[0])] + unsampled
+        
+        # 探索：偶尔把未充分采样的（没有时则任一非最优的）provider放到首位
+        if len(ordered) > 1 and random.random() < exploration_rate:
+            candidates = unsampled if scored and unsampled else ordered[1:]
+            explored = random.choice(candidates)
+            ordered.remove(explored)
+            ordered.insert(0, explored)
+        
+        return [(model, provider) for model, provider, priority in ordered]
+    
+    def _order_by_load(self, options: List[Tuple[str, Provider, int]]) -> List[Tuple[str, Provider]]:
+        """least_outstanding / p2c 策略：按进行中请求数选择首选provider
+        
+        least_outstanding: 所有选项按进行中请求数排序（相同时按优先级）
+        p2c: 随机取两个选项，进行中请求较少者作为首选，其余按优先级作为failover
+        """
+        sorted_options = sorted(options, key=lambda x: x[2])
+        in_flight = lambda option: self.load_tracker.in_flight(option[1].name)
+        
+        if self.selection_strategy == SelectionStrategy.LEAST_OUTSTANDING:
+            # sorted() 是稳定排序，负载相同的选项保持优先级顺序
+            ordered = sorted(sorted_options, key=in_flight)
+        else:
+            ordered = sorted_options
+            if len(sorted_options) > 1:
+                first, second = random.sample(sorted_options, 2)
+                selected = min((first, second), key=lambda option: (in_flight(option), option[2]))
+                ordered = [selected] + [option for option in sorted_options if option is not selected]
+        
+        return [(model, provider) for model, provider, priority in ordered]
+    
+    def begin_provider_request(self, provider_name: str, is_streaming: bool) -> InFlightTicket:
+        """开始一次发往provider的请求，返回的 ticket 需在请求/流结束时 release()"""
+        return self.load_tracker.start(provider_name, is_streaming)
+    
+    def try_begin_provider_request(self, provider: Provider, is_streaming: bool) -> Optional[InFlightTicket]:
+        """按 max_concurrency / max_streams 非阻塞地占用名额，provider已满时返回 None
+        
+        熔断处于 half_open 状态时，并发数额外限制为 half_open_max_requests 个试探请求。
+        """
+        max_concurrency = provider.max_concurrency
+        if provider.breaker.state == BreakerState.HALF_OPEN:
+            probes = self.breaker_policy.half_open_max_requests
+            max_concurrency = probes if max_concurrency is None else min(max_concurrency, probes)
+        return self.load_tracker.try_start(
+            provider.name, is_streaming, max_concurrency, provider.max_streams
+        )
+    
+    def get_admission_queue_timeout(self) -> float:
+        """所有可用provider都已满时，请求在本地等待名额的最长时间（秒），0 表示不等待"""
+        return self.settings.get('admission', {}).get('queue_timeout', 0)
+    
+    async def wait_for_provider_capacity(self, deadline: float) -> bool:
+        """等待任一provider释放名额，直到 deadline（time.monotonic()）；等待队列已满或超时返回 False"""
+        max_waiters = self.settings.get('admission', {}).get('max_queue_size', 100)
+        return await self.load_tracker.wait_for_release(deadline - time.monotonic(), max_waiters)
+    
+    def get_stream_holdback(self) -> Optional[Tuple[int, float]]:
+        """流式响应的暂存上限 (max_bytes, max_wait 秒)，未启用时返回 None
+        
+        首个 content_block_delta 之前的事件先暂存，暂存期间检测到错误时可以透明地转移到下一个provider。
+        """
+        holdback = self.settings.get('stream_holdback', {})
+        if not holdback.get('enabled', True):
+            return None
+        return holdback.get('max_bytes', 16384), holdback.get('max_wait_ms', 1500) / 1000
+    
+    def get_background_buffer_bytes(self) -> int:
+        """background 流式模式下等待客户端读取的最大缓冲字节数，超出后暂停读取上游"""
+        return self.settings.get('background_streaming', {}).get('max_buffer_bytes', 8 * 1024 * 1024)
+    
+    def get_stream_buffer_settings(self) -> Dict[str, Any]:
+        """流式响应共享缓冲区配置（单个流/全局内存预算、溢写磁盘、单流上限）"""
+        return self.settings.get('stream_buffer', {})
+    
+    def get_response_cache_settings(self) -> Dict[str, Any]:
+        """已完成响应缓存配置（开关、TTL、容量与字节预算）"""
+        return self.settings.get('response_cache', {})
+    
+    def record_output_throughput(self, provider_name: str, output_tokens: int, seconds: float):
+        """记录流式响应的输出速度（tokens/s）"""
+        self.latency_tracker.record_throughput(provider_name, output_tokens, seconds)
+    
     def get_failure_cooldown(self) -> int:
         """Get failure cooldown time from settings"""
         return self.settings.get('failure_cooldown', 60)
@@ -412,6 +572,26 @@ class ProviderManager:
         else:
             return self.get_non_streaming_timeouts()
     
+    def get_http_client(self, provider: Provider, is_streaming: bool) -> httpx.AsyncClient:
+        """获取provider的共享HTTP客户端（按请求类型区分超时配置）"""
+        profile = "streaming" if is_streaming else "non_streaming"
+        return self.client_pool.get_client(provider, profile, self.get_timeouts_for_request(is_streaming))
+    
+    def get_openai_client(self, provider: Provider, is_streaming: bool, default_headers: Dict[str, str]):
+        """获取provider的共享 AsyncOpenAI 客户端"""
+        profile = "streaming" if is_streaming else "non_streaming"
+        return self.client_pool.get_openai_client(
+            provider, profile, self.get_timeouts_for_request(is_streaming), default_headers
+        )
+    
+    def _current_client_keys(self) -> List[Tuple]:
+        """当前配置下有效的连接池键"""
+        keys = []
+        for provider in self.providers:
+            keys.append(self.client_pool.make_key(provider, "streaming", self.get_streaming_timeouts()))
+            keys.append(self.client_pool.make_key(provider, "non_streaming", self.get_non_streaming_timeouts()))
+        return keys
+    
     def get_caching_timeouts(self) -> Dict[str, int]:
         """获取缓存相关超时配置"""
         timeouts = self.settings.get('timeouts', {})
@@ -422,10 +602,8 @@ class ProviderManager:
     
     def get_healthy_providers(self) -> List[Provider]:
         """Get list of healthy (non-failed) providers"""
-        cooldown = self.get_failure_cooldown()
-        
         # 简化逻辑：只返回健康的providers，粘滞逻辑已移至选择策略中
-        healthy_providers = [p for p in self.providers if p.enabled and p.is_healthy(cooldown)]
+        healthy_providers = [p for p in self.providers if p.enabled and p.is_healthy()]
         # Removed debug print - this would be too noisy in production
         return healthy_providers
     
@@ -443,10 +621,7 @@ class ProviderManager:
     
     def get_provider_by_name(self, name: str) -> Optional[Provider]:
         """根据名称获取provider"""
-        for provider in self.providers:
-            if provider.name == name:
-                return provider
-        return None
+        return self.route_index.get_provider(name)
     
     def get_provider_headers(self, provider: Provider, original_headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
         """Get authentication headers for a provider, optionally merging with original headers"""
@@ -465,20 +640,27 @@ class ProviderManager:
             "healthy_providers": len(self.get_healthy_providers()),
             "selection_strategy": self.selection_strategy.value,
             "total_model_routes": len(self.model_routes),
+            "admission_waiting": self.load_tracker.waiting,
             "providers": []
         }
         
-        cooldown = self.get_failure_cooldown()
         for provider in self.providers:
             provider_status = {
                 "name": provider.name,
                 "type": provider.type.value,
                 "base_url": provider.base_url,
                 "enabled": provider.enabled,
-                "healthy": provider.is_healthy(cooldown),
+                "healthy": provider.is_healthy(),
+                "circuit": provider.breaker.get_stats(),
                 "failure_count": provider.failure_count,
                 "last_failure_time": provider.last_failure_time,
-                "proxy": provider.proxy
+                "proxy": provider.proxy,
+                "connection_pool": self.connection_warmer.get_provider_stats(provider.name),
+                "latency": self.latency_tracker.get_stats(provider.name),
+                "in_flight": self.load_tracker.in_flight(provider.name),
+                "active_streams": self.load_tracker.active_streams(provider.name),
+                "max_concurrency": provider.max_concurrency,
+                "max_streams": provider.max_streams
             }
             status["providers"].append(provider_status)
         
@@ -505,9 +687,7 @@ class ProviderManager:
             tuple: (error_reason, should_mark_unhealthy, can_failover)
         """
         should_mark_unhealthy, can_failover, error_reason = get_error_handling_decision(
-            error, http_status_code, is_streaming,
-            self.settings.get('unhealthy_http_codes', []),
-            self.settings.get('unhealthy_exception_patterns', [])
+            error, http_status_code, is_streaming, matcher=self.health_matcher
         )
         return error_reason, should_mark_unhealthy, can_failover
 
@@ -523,27 +703,32 @@ class ProviderManager:
         """重置所有provider的状态（用于测试）"""
         for provider in self.providers:
             provider.mark_success()  # Reset failure count and last_failure_time
+            provider.breaker.reset()
     
     
     def check_and_reset_timeout_errors(self, request_id: str = ""):
-        """检查并重置超时的错误计数（内部辅助函数）"""
+        """检查并重置超时的错误计数（内部辅助函数）
+
+        只清零错误计数，不改变熔断状态：open 的熔断器必须经过冷却和 half_open 试探才能关闭，
+        否则会绕过指数冷却和试探请求数限制。
+        """
         if self.unhealthy_reset_timeout <= 0:
             return  # 如果timeout配置为0或负数，跳过timeout reset
         
         current_time = time.time()
         providers_to_reset = []
         
-        # 查找需要重置的providers
+        # 查找最近一次错误已超时的providers
         for provider in self.providers:
             if (provider.failure_count > 0 and 
-                provider.last_unhealthy_time and 
-                current_time - provider.last_unhealthy_time > self.unhealthy_reset_timeout):
+                provider.last_failure_time and 
+                current_time - provider.last_failure_time > self.unhealthy_reset_timeout):
                 providers_to_reset.append(provider)
         
         # 执行重置
         for provider in providers_to_reset:
             old_count = provider.failure_count
-            provider.mark_success()  # 重置所有状态
+            provider.failure_count = 0
             
             # 记录日志
             debug(LogRecord(
@@ -565,6 +750,8 @@ class ProviderManager:
             return False
             
         if is_error_detected:
+            # half_open 状态下的试探请求失败时立即重新熔断
+            was_half_open = provider.breaker.state == BreakerState.HALF_OPEN
             provider.mark_failure()
             
             # 记录错误详细信息
@@ -581,21 +768,25 @@ class ProviderManager:
             ))
             
             # Check if provider should be marked unhealthy based on threshold
-            should_mark_unhealthy = provider.failure_count >= self.unhealthy_threshold
+            should_mark_unhealthy = was_half_open or provider.failure_count >= self.unhealthy_threshold
             
-            if should_mark_unhealthy:
-                # 标记为unhealthy时更新last_unhealthy_time
-                provider.last_unhealthy_time = time.time()
-                
+            # 已处于open状态（熔断前发出的请求失败）时不重复计数
+            if should_mark_unhealthy and provider.breaker.trip():
+                if was_half_open:
+                    message = f"Provider {provider_name} failed a half-open trial request, circuit reopened for {provider.breaker.cooldown:.0f}s"
+                else:
+                    message = f"Provider {provider_name} marked unhealthy after {provider.failure_count} errors (threshold: {self.unhealthy_threshold})"
                 warning(LogRecord(
                     LogEvent.PROVIDER_MARKED_UNHEALTHY.value,
-                    f"Provider {provider_name} marked unhealthy after {provider.failure_count} errors (threshold: {self.unhealthy_threshold})",
+                    message,
                     request_id,
                     {
                         "provider": provider_name,
                         "error_count": provider.failure_count,
                         "threshold": self.unhealthy_threshold,
-                        "error_reason": error_type or "unknown"
+                        "error_reason": error_type or "unknown",
+                        "circuit_trips": provider.breaker.trips,
+                        "cooldown": provider.breaker.cooldown
                     }
                 ))
             else:
@@ -604,6 +795,8 @@ class ProviderManager:
             
             return should_mark_unhealthy
         else:
+            # 成功的请求（包括half_open试探请求）关闭熔断
+            provider.breaker.record_success()
             # Success case - reset failures if enabled
             if self.unhealthy_reset_on_success and provider.failure_count > 0:
                 old_count = provider.failure_count
@@ -634,6 +827,7 @@ class ProviderManager:
         return {
             "error_count": provider.failure_count,
             "threshold": self.unhealthy_threshold,
+            "circuit_state": provider.breaker.state.value,
             "last_error_time": provider.last_failure_time,
             "last_success_time": provider.last_success_time,
             "reset_on_success": self.unhealthy_reset_on_success,
@@ -42,7 +42,7 @@ class ProviderAuth:
             "Content-Type": "application/json"
         }
         
-        debug(LogRecord(
+        debug(lambda: LogRecord(
             event=LogEvent.GET_PROVIDER_HEADERS_START.value,
             message=f"Provider {provider.name}: auth_type={provider.auth_type}, auth_value=[REDACTED]"
         ))
@@ -129,7 +129,7 @@ class ProviderAuth:
         try:
             from oauth import get_oauth_manager
             oauth_manager = get_oauth_manager()
-            debug(LogRecord(
+            debug(lambda: LogRecord(
                 event=LogEvent.OAUTH_MANAGER_CHECK.value, 
                 message=f"OAuth manager status: {oauth_manager is not None}, type: {type(oauth_manager)}"
             ))
@@ -0,0 +1,119 @@
+"""模型路由索引
+
+在加载配置时预编译 model_routes 的匹配规则，并建立 provider 名称索引。
+请求模型 -> 可用选项的解析结果保存在LRU缓存中，重复的模型名直接命中缓存；
+缓存在配置重载（重建索引）和provider健康状态变化时失效。
+round_robin 的轮询位置按路由规则（而不是请求的模型名）记录，数量受配置规模限制。
+"""
+
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
+
+if TYPE_CHECKING:
+    from .manager import ModelRoute, Provider
+
+
+# (target_model, provider, priority)
+RouteOption = Tuple[str, "Provider", int]
+
+
+class RouteIndex:
+    """预编译的模型路由表（仅在事件循环中使用，无需加锁）"""
+
+    def __init__(self, model_routes: Dict[str, List["ModelRoute"]], providers: Iterable["Provider"],
+                 cache_size: int = 1024):
+        self.providers_by_name: Dict[str, "Provider"] = {}
+        for provider in providers:
+            # 与原线性查找一致：同名时第一个生效
+            self.providers_by_name.setdefault(provider.name, provider)
+        self._routes = model_routes
+        # 按配置顺序匹配：(pattern, 通配符正则或None, 小写的精确模式)
+        self._matchers: List[Tuple[str, Optional[Pattern[str]], str]] = []
+        for pattern in model_routes:
+            pattern_lower = pattern.lower()
+            if '*' in pattern:
+                self._matchers.append((pattern, re.compile(pattern_lower.replace('*', '.*')), pattern_lower))
+            else:
+                self._matchers.append((pattern, None, pattern_lower))
+        self.cache_size = cache_size
+        # requested_model -> (pattern, options, 缓存有效期)
+        self._cache: "OrderedDict[str, Tuple[Optional[str], List[RouteOption], float]]" = OrderedDict()
+        # (pattern, 选项数) -> 下一个轮询位置
+        self._round_robin_indices: Dict[Tuple[Optional[str], int], int] = {}
+
+    def _matching_patterns(self, requested_model: str) -> Iterator[str]:
+        """按匹配顺序返回请求模型命中的路由规则：精确匹配优先，其次按配置顺序的通配符/忽略大小写匹配"""
+        if requested_model in self._routes:
+            yield requested_model
+        model_lower = requested_model.lower()
+        for pattern, regex, pattern_lower in self._matchers:
+            if pattern == requested_model:
+                continue
+            if regex is not None:
+                if regex.search(model_lower):
+                    yield pattern
+            elif pattern_lower == model_lower:
+                yield pattern
+
+    def match_pattern(self, requested_model: str) -> Optional[str]:
+        """请求模型首个命中的路由规则"""
+        return next(self._matching_patterns(requested_model), None)
+
+    def routes_for(self, requested_model: str) -> List["ModelRoute"]:
+        pattern = self.match_pattern(requested_model)
+        return self._routes[pattern] if pattern is not None else []
+
+    def get_provider(self, name: str) -> Optional["Provider"]:
+        return self.providers_by_name.get(name)
+
+    def resolve(self, requested_model: str) -> Tuple[Optional[str], List[RouteOption]]:
+        """返回 (路由规则, 可用选项)：第一个存在启用且健康provider的命中规则，选项保持配置顺序
+
+        结果被缓存直到健康状态变化（invalidate）或被排除的provider冷却结束。
+        返回的列表是缓存本身，调用方不能修改。
+        """
+        now = time.time()
+        entry = self._cache.get(requested_model)
+        if entry is not None and now < entry[2]:
+            self._cache.move_to_end(requested_model)
+            return entry[0], entry[1]
+
+        resolved_pattern: Optional[str] = None
+        options: List[RouteOption] = []
+        valid_until = math.inf
+        for pattern in self._matching_patterns(requested_model):
+            for route in self._routes[pattern]:
+                if not route.enabled:
+                    continue
+                provider = self.providers_by_name.get(route.provider)
+                if not provider or not provider.enabled:
+                    continue
+                if not provider.is_healthy():
+                    # 冷却结束（进入half_open）时需要重新解析
+                    valid_until = min(valid_until, provider.breaker.opened_at + provider.breaker.cooldown)
+                    continue
+                target_model = requested_model if route.model == "passthrough" else route.model
+                options.append((target_model, provider, route.priority))
+            if options:
+                resolved_pattern = pattern
+                break
+
+        self._cache[requested_model] = (resolved_pattern, options, valid_until)
+        self._cache.move_to_end(requested_model)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return resolved_pattern, options
+
+    def invalidate(self):
+        """健康状态变化时清空解析缓存"""
+        self._cache.clear()
+
+    def next_round_robin(self, pattern: Optional[str], option_count: int) -> int:
+        """返回本次轮询位置并前进一位"""
+        key = (pattern, option_count)
+        current_index = self._round_robin_indices.get(key, 0) % option_count
+        self._round_robin_indices[key] = (current_index + 1) % option_count
+        return current_index
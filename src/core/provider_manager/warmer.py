@@ -0,0 +1,142 @@
+"""上游连接预热
+
+后台任务为每个启用且健康的provider在共享客户端中保持 N 个已建立的空闲连接，
+并在 keepalive_expiry / 服务端空闲超时之前重新使用它们，
+使部署后的首个请求和provider冷却结束（failback）后的首个请求无需再付出 DNS/TCP/TLS/代理握手的开销。
+"""
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import httpx
+
+from utils import debug, warning, LogRecord, LogEvent
+
+if TYPE_CHECKING:
+    from .manager import ProviderManager, Provider
+
+
+# 检查provider健康状态变化的最长间隔（秒），决定failback后多久完成预热
+HEALTH_CHECK_INTERVAL = 5.0
+
+
+class ConnectionWarmer:
+    """按 settings.connection_pool.prewarm_* 配置维护预热连接
+
+    任务在 FastAPI lifespan 中启动/停止；配置在每轮检查时重新读取，
+    因此热重载可以直接开启或关闭预热。
+    """
+
+    def __init__(self, provider_manager: "ProviderManager"):
+        self.provider_manager = provider_manager
+        self._task: Optional[asyncio.Task] = None
+        # provider_name -> 上次预热完成时间
+        self.last_warmed: Dict[str, float] = {}
+        # provider_name -> 上一轮检查时的健康状态，用于识别冷却结束
+        self._last_healthy: Dict[str, bool] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """启动后台预热任务（需在事件循环中调用）"""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止后台预热任务"""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self):
+        while True:
+            pool = self.provider_manager.client_pool
+            try:
+                if pool.prewarm_connections > 0:
+                    await self.warm_once()
+            except Exception as e:
+                warning(LogRecord(
+                    event=LogEvent.PROVIDER_CONNECTION_WARMUP_FAILED.value,
+                    message=f"Connection warm-up cycle failed: {e}"
+                ))
+            await asyncio.sleep(min(pool.prewarm_interval, HEALTH_CHECK_INTERVAL))
+
+    async def warm_once(self):
+        """预热到期或刚结束冷却的provider；不健康的provider跳过"""
+        manager = self.provider_manager
+        interval = manager.client_pool.prewarm_interval
+        now = time.time()
+
+        due = []
+        for provider in manager.providers:
+            if not provider.enabled:
+                continue
+            healthy = provider.is_healthy()
+            recovered = healthy and self._last_healthy.get(provider.name) is False
+            self._last_healthy[provider.name] = healthy
+            if not healthy:
+                continue
+            if recovered or now - self.last_warmed.get(provider.name, 0) >= interval:
+                due.append(provider)
+
+        if due:
+            await asyncio.gather(*(self.warm_provider(provider) for provider in due))
+
+    async def warm_provider(self, provider: "Provider"):
+        """在provider的流式/非流式客户端中各建立或刷新 prewarm_connections 个连接
+
+        并发发送轻量 HEAD 请求：已有的空闲连接被重新使用（刷新空闲计时），
+        不足的部分由连接池新建。响应状态码不重要，预热结果不计入健康检查。
+        """
+        pool = self.provider_manager.client_pool
+        count = pool.prewarm_connections
+        if count <= 0:
+            return
+
+        opened = 0
+        failures = 0
+        for is_streaming in (True, False):
+            client = self.provider_manager.get_http_client(provider, is_streaming)
+            idle_before = pool.count_idle_connections(client)
+            results = await asyncio.gather(
+                *(self._ping(client, provider.base_url) for _ in range(count)),
+                return_exceptions=True
+            )
+            failures += sum(1 for result in results if isinstance(result, Exception))
+            opened += max(0, pool.count_idle_connections(client) - idle_before)
+
+        self.last_warmed[provider.name] = time.time()
+        debug(LogRecord(
+            event=LogEvent.PROVIDER_CONNECTIONS_WARMED.value,
+            message=f"Warmed connections for provider {provider.name}",
+            data={
+                "provider": provider.name,
+                "target_per_client": count,
+                "opened": opened,
+                "failures": failures
+            }
+        ))
+
+    @staticmethod
+    async def _ping(client: httpx.AsyncClient, url: str):
+        response = await client.head(url)
+        await response.aclose()
+
+    def get_provider_stats(self, provider_name: str) -> Dict[str, Any]:
+        """/providers 中展示的连接池状态（warm=存在可直接复用的空闲连接）"""
+        pool = self.provider_manager.client_pool
+        stats = pool.get_provider_stats(provider_name)
+        return {
+            **stats,
+            "warm": stats["idle_connections"] > 0,
+            "prewarm_target": pool.prewarm_connections,
+            "last_warmed": self.last_warmed.get(provider_name, 0)
+        }
@@ -11,6 +11,9 @@ from .parallel_broadcaster import (
     handle_duplicate_stream_request,
     has_active_broadcaster
 )
+from .sse_scanner import SSEStreamScanner
+from .background_reader import BackgroundStreamReader
+from .stream_buffer import StreamBuffer
 # Removed validation import - now using src/validation/provider_health.py
 
 __all__ = [
@@ -20,5 +23,8 @@ __all__ = [
     "register_broadcaster",
     "unregister_broadcaster", 
     "handle_duplicate_stream_request",
-    "has_active_broadcaster"
+    "has_active_broadcaster",
+    "SSEStreamScanner",
+    "BackgroundStreamReader",
+    "StreamBuffer"
 ]
\ No newline at end of file
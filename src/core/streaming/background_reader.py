@@ -0,0 +1,104 @@
+"""
+Background reader for StreamingMode.BACKGROUND.
+
+A dedicated task drains the upstream stream into a bounded buffer at provider speed, so
+a slow client socket no longer holds the upstream connection open. The client side is
+fed from the buffer; the upstream is closed as soon as the provider finishes.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+
+class BackgroundStreamReader:
+    """Decouple an upstream chunk iterator from the client that consumes it.
+
+    start() launches the drain task and chunks() yields the buffered chunks. The
+    reader pauses once max_buffer_bytes are waiting for the client, so memory stays
+    bounded; at that point the provider is throttled to client speed like direct mode.
+    close (if given) releases the upstream as soon as the drain task ends, and done
+    callbacks run at the same time.
+    """
+
+    def __init__(self, source: AsyncIterator[Any], max_buffer_bytes: int,
+                 close: Optional[Callable[[], Awaitable[Any]]] = None):
+        self._source = source
+        self._close = close
+        self.max_buffer_bytes = max_buffer_bytes
+        self._chunks: deque = deque()
+        self.buffered_bytes = 0
+        self._readable = asyncio.Event()  # a chunk or the end of the stream is available
+        self._writable = asyncio.Event()  # the buffer dropped below max_buffer_bytes
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+        self._done_callbacks: List[Callable[[], Any]] = []
+        self.finished = False
+        self.finished_at: Optional[float] = None  # time.monotonic() when the upstream ended
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._drain())
+
+    def add_done_callback(self, callback: Callable[[], Any]):
+        """Run callback once the upstream has been fully read (or failed)."""
+        if self.finished:
+            callback()
+        else:
+            self._done_callbacks.append(callback)
+
+    async def _drain(self):
+        try:
+            async for chunk in self._source:
+                self._chunks.append(chunk)
+                self.buffered_bytes += len(chunk)
+                self._readable.set()
+                while self.buffered_bytes >= self.max_buffer_bytes:
+                    self._writable.clear()
+                    await self._writable.wait()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Raised to the client side after the chunks read before the failure
+            self._error = e
+        finally:
+            self.finished = True
+            self.finished_at = time.monotonic()
+            self._readable.set()
+            try:
+                source_aclose = getattr(self._source, "aclose", None)
+                if source_aclose is not None:
+                    await source_aclose()
+                if self._close is not None:
+                    await self._close()
+            finally:
+                for callback in self._done_callbacks:
+                    callback()
+                self._done_callbacks.clear()
+
+    async def chunks(self) -> AsyncIterator[Any]:
+        """Yield the upstream chunks in order; cancels the drain if the consumer stops early."""
+        self.start()
+        try:
+            while True:
+                if self._chunks:
+                    chunk = self._chunks.popleft()
+                    self.buffered_bytes -= len(chunk)
+                    self._writable.set()
+                    yield chunk
+                elif self.finished:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                else:
+                    self._readable.clear()
+                    await self._readable.wait()
+        finally:
+            await self.aclose()
+
+    async def aclose(self):
+        """Stop the drain task if it is still running (which also releases the upstream)."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
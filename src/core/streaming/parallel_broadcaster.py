@@ -5,9 +5,11 @@ Handles client disconnections gracefully through exception-based detection.
 
 import asyncio
 import json
-from typing import List, AsyncGenerator, Tuple, Optional, Dict, Any
+import logging
+from typing import List, AsyncGenerator, Tuple, Optional, Dict, Any, Union, Callable
 from fastapi import Request
-from utils.logging import debug, info, error, LogRecord, LogEvent
+from .stream_buffer import StreamBuffer
+from utils.logging import debug, info, error, is_enabled, LogRecord, LogEvent
 
 
 class ClientStream:
@@ -41,7 +43,7 @@ class ClientStream:
             
             self.chunks_sent += 1
             debug(
-                LogRecord(
+                lambda: LogRecord(
                     LogEvent.CHUNK_PREPARED_FOR_CLIENT.value,
                     f"Prepared chunk {chunk_index} for {self.client_type} client ({len(chunk)} bytes)",
                     self.request_id,
@@ -80,15 +82,23 @@ class ClientStream:
 class ParallelBroadcaster:
     """Handles parallel broadcasting to multiple client streams"""
     
-    def __init__(self, original_request: Request, request_id: str, provider_name: str):
+    def __init__(self, original_request: Request, request_id: str, provider_name: str,
+                 buffer: Optional[StreamBuffer] = None):
         self.original_request = original_request
         self.request_id = request_id
         self.provider_name = provider_name
         self.clients: List[ClientStream] = []
         self.total_chunks_processed = 0
-        self.collected_chunks: List[str] = []  # Store all chunks for late-joining duplicates
+        # All chunks for late-joining duplicates, shared with the response handler and dedup followers
+        self.buffer = buffer if buffer is not None else StreamBuffer()
         self.streaming_active = False  # Track if streaming is in progress
+        self.finished = False  # The provider stream ended (normally, with an error, or abandoned)
         self.last_exception_info: Optional[Dict[str, Any]] = None  # Store exception info for health check
+        # Set (and replaced) whenever a chunk is published or the stream ends; duplicate
+        # subscribers wait on it instead of polling the buffer
+        self._chunk_available = asyncio.Event()
+        # Called with every published chunk (e.g. to share the stream with other workers)
+        self._chunk_listeners: List[Callable[[Union[str, bytes]], Any]] = []
         
         # Add the original client
         self.add_client(original_request, request_id, "original")
@@ -107,7 +117,7 @@ class ParallelBroadcaster:
                     "client_type": client_type,
                     "total_clients": len(self.clients),
                     "streaming_active": self.streaming_active,
-                    "chunks_already_processed": len(self.collected_chunks)
+                    "chunks_already_processed": len(self.buffer)
                 }
             )
         )
@@ -115,17 +125,18 @@ class ParallelBroadcaster:
     async def add_duplicate_request(self, duplicate_request: Request, duplicate_request_id: str) -> AsyncGenerator[str, None]:
         """
         Add a duplicate request that arrives mid-stream.
-        Returns an async generator that yields all chunks (past + future).
+        Returns an async generator that yields all chunks (past + future). It sleeps until
+        stream_from_provider publishes a chunk or ends the stream, instead of polling.
         """
         info(
             LogRecord(
                 LogEvent.DUPLICATE_REQUEST_MID_STREAM.value,
-                f"Adding duplicate request mid-stream after {len(self.collected_chunks)} chunks",
+                f"Adding duplicate request mid-stream after {len(self.buffer)} chunks",
                 self.request_id,
                 {
                     "provider": self.provider_name,
                     "duplicate_request_id": duplicate_request_id,
-                    "chunks_already_processed": len(self.collected_chunks),
+                    "chunks_already_processed": len(self.buffer),
                     "streaming_active": self.streaming_active
                 }
             )
@@ -134,85 +145,102 @@ class ParallelBroadcaster:
         # Add the duplicate client
         self.add_client(duplicate_request, duplicate_request_id, "duplicate")
         
-        # First, yield all previously collected chunks
-        for i, chunk in enumerate(self.collected_chunks):
-            try:
-                yield chunk
-                debug(
-                    LogRecord(
-                        LogEvent.HISTORICAL_CHUNK_YIELDED_TO_DUPLICATE.value,
-                        f"Yielded historical chunk {i+1}/{len(self.collected_chunks)} to duplicate ({len(chunk)} bytes)",
-                        duplicate_request_id,
-                        {
-                            "provider": self.provider_name,
-                            "chunk_index": i+1,
-                            "chunk_size": len(chunk),
-                            "is_historical": True
-                        }
-                    )
-                )
-            except Exception as e:
-                error(
-                    LogRecord(
-                        LogEvent.DUPLICATE_DISCONNECTED_DURING_HISTORICAL_CHUNK.value,
-                        f"Duplicate client disconnected during historical chunk {i+1}: {type(e).__name__}: {e}",
-                        duplicate_request_id,
-                        {
-                            "provider": self.provider_name,
-                            "chunk_index": i+1,
-                            "error": str(e)
-                        }
-                    )
-                )
-                # Mark this duplicate as inactive
-                if self.clients:
-                    self.clients[-1].is_active = False
-                return
-        
-        # Now yield future chunks as they come
-        # This will be handled by the main streaming loop
-        while self.streaming_active:
-            # Wait for new chunks to be added to collected_chunks
-            current_chunk_count = len(self.collected_chunks)
-            await asyncio.sleep(0.01)  # Small delay to avoid busy waiting
-            
-            # Check if new chunks were added
-            if len(self.collected_chunks) > current_chunk_count:
-                # Yield new chunks
-                for i in range(current_chunk_count, len(self.collected_chunks)):
-                    chunk = self.collected_chunks[i]
+        client = self.clients[-1]
+        historical_count = len(self.buffer)
+        sent = 0
+        debug_enabled = is_enabled(logging.DEBUG)
+        try:
+            while True:
+                # Take the current event before reading, so a chunk published meanwhile is not missed
+                chunk_available = self._chunk_available
+                while sent < len(self.buffer):
+                    chunk = self.buffer[sent]
+                    sent += 1
+                    is_historical = sent <= historical_count
                     try:
                         yield chunk
-                        debug(
-                            LogRecord(
-                                LogEvent.LIVE_CHUNK_YIELDED_TO_DUPLICATE.value,
-                                f"Yielded live chunk {i+1} to duplicate ({len(chunk)} bytes)",
-                                duplicate_request_id,
-                                {
-                                    "provider": self.provider_name,
-                                    "chunk_index": i+1,
-                                    "chunk_size": len(chunk),
-                                    "is_historical": False
-                                }
-                            )
-                        )
+                        if debug_enabled:
+                            if is_historical:
+                                debug(
+                                    LogRecord(
+                                        LogEvent.HISTORICAL_CHUNK_YIELDED_TO_DUPLICATE.value,
+                                        f"Yielded historical chunk {sent}/{historical_count} to duplicate ({len(chunk)} bytes)",
+                                        duplicate_request_id,
+                                        {
+                                            "provider": self.provider_name,
+                                            "chunk_index": sent,
+                                            "chunk_size": len(chunk),
+                                            "is_historical": True
+                                        }
+                                    )
+                                )
+                            else:
+                                debug(
+                                    LogRecord(
+                                        LogEvent.LIVE_CHUNK_YIELDED_TO_DUPLICATE.value,
+                                        f"Yielded live chunk {sent} to duplicate ({len(chunk)} bytes)",
+                                        duplicate_request_id,
+                                        {
+                                            "provider": self.provider_name,
+                                            "chunk_index": sent,
+                                            "chunk_size": len(chunk),
+                                            "is_historical": False
+                                        }
+                                    )
+                                )
                     except Exception as e:
+                        event = (LogEvent.DUPLICATE_DISCONNECTED_DURING_HISTORICAL_CHUNK if is_historical
+                                 else LogEvent.DUPLICATE_DISCONNECTED_DURING_LIVE_CHUNK)
                         error(
                             LogRecord(
-                                LogEvent.DUPLICATE_DISCONNECTED_DURING_LIVE_CHUNK.value,
-                                f"Duplicate client disconnected during live chunk {i+1}: {type(e).__name__}: {e}",
+                                event.value,
+                                f"Duplicate client disconnected during {'historical' if is_historical else 'live'} "
+                                f"chunk {sent}: {type(e).__name__}: {e}",
                                 duplicate_request_id,
                                 {
                                     "provider": self.provider_name,
-                                    "chunk_index": i+1,
+                                    "chunk_index": sent,
                                     "error": str(e)
                                 }
                             )
                         )
-                        # Mark this duplicate as inactive
-                        if self.clients:
-                            self.clients[-1].is_active = False
                         return
+                
+                if self.buffer.truncated:
+                    # The stream outgrew the replay buffer: the chunks this duplicate needs are gone
+                    yield self._replay_truncated_event()
+                    return
+                if self.finished:
+                    return
+                await chunk_available.wait()
+        finally:
+            # A finished or disconnected duplicate no longer keeps the provider stream alive
+            client.is_active = False
+    
+    def _replay_truncated_event(self) -> str:
+        error_event = {
+            "type": "error",
+            "error": {
+                "type": "api_error",
+                "message": "Response exceeded the stream replay buffer, please retry the request"
+            }
+        }
+        return f"event: error\ndata: {json.dumps(error_event)}\n\n"
+    
+    def add_chunk_listener(self, listener: Callable[[Union[str, bytes]], Any]):
+        """Receive every chunk from now on, in order, as it is published to duplicates."""
+        self._chunk_listeners.append(listener)
+    
+    def _publish(self, chunk: Union[str, bytes]):
+        """Store a chunk for duplicates (past and future) and wake the waiting ones."""
+        self.buffer.append(chunk)
+        for listener in self._chunk_listeners:
+            listener(chunk)
+        self._wake_subscribers()
+    
+    def _wake_subscribers(self):
+        self._chunk_available.set()
+        self._chunk_available = asyncio.Event()
     
     def get_active_clients(self) -> List[ClientStream]:
         """Get list of currently active clients"""
@@ -231,7 +259,7 @@ class ParallelBroadcaster:
         
         if not active_clients:
             debug(
-                LogRecord(
+                lambda: LogRecord(
                     LogEvent.NO_ACTIVE_CLIENTS_FOR_BROADCAST.value,
                     f"No active clients remaining for chunk {self.total_chunks_processed}",
                     self.request_id,
@@ -259,7 +287,7 @@ class ParallelBroadcaster:
         remaining_active = len(self.get_active_clients())
         
         debug(
-            LogRecord(
+            lambda: LogRecord(
                 LogEvent.BROADCAST_CHUNK_COMPLETED.value,
                 f"Broadcasted chunk {self.total_chunks_processed} to {successful_sends}/{len(active_clients)} clients",
                 self.request_id,
@@ -276,13 +304,14 @@ class ParallelBroadcaster:
         
         return remaining_active > 0
     
-    async def stream_from_provider(self, provider_stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+    async def stream_from_provider(self, provider_stream: AsyncGenerator[Union[str, bytes], None]) -> AsyncGenerator[Union[str, bytes], None]:
         """
         Stream from provider to all clients, yielding chunks for the original client.
+        Chunks are passed through untouched, so bytes from the provider reach Starlette without re-encoding.
         Handles parallel broadcasting and client disconnect detection.
         """
         debug(
-            LogRecord(
+            lambda: LogRecord(
                 LogEvent.PARALLEL_BROADCAST_STARTED.value,
                 f"Starting parallel broadcast to {len(self.clients)} clients",
                 self.request_id,
@@ -294,31 +323,34 @@ class ParallelBroadcaster:
         )
         
         self.streaming_active = True
+        # Checked once per stream: the per-chunk debug records below are skipped entirely at INFO
+        debug_enabled = is_enabled(logging.DEBUG)
         
         try:
             async for chunk in provider_stream:
                 self.total_chunks_processed += 1
                 
-                # Store chunk for late-joining duplicates
-                self.collected_chunks.append(chunk)
+                # Store chunk for late-joining duplicates and wake live ones
+                self._publish(chunk)
                 
                 # Yield chunk for the original client (FastAPI StreamingResponse)
                 # The actual disconnect detection happens here during the yield
                 try:
                     yield chunk
-                    debug(
-                        LogRecord(
-                            LogEvent.CHUNK_YIELDED_TO_ORIGINAL_CLIENT.value,
-                            f"Yielded chunk {self.total_chunks_processed} to client ({len(chunk)} bytes)",
-                            self.request_id,
-                            {
-                                "provider": self.provider_name,
-                                "chunk_index": self.total_chunks_processed,
-                                "chunk_size": len(chunk),
-                                "total_collected_chunks": len(self.collected_chunks)
-                            }
+                    if debug_enabled:
+                        debug(
+                            LogRecord(
+                                LogEvent.CHUNK_YIELDED_TO_ORIGINAL_CLIENT.value,
+                                f"Yielded chunk {self.total_chunks_processed} to client ({len(chunk)} bytes)",
+                                self.request_id,
+                                {
+                                    "provider": self.provider_name,
+                                    "chunk_index": self.total_chunks_processed,
+                                    "chunk_size": len(chunk),
+                                    "total_collected_chunks": len(self.buffer)
+                                }
+                            )
                         )
-                    )
                 except Exception as e:
                     # Original client disconnected during yield
                     debug(
@@ -373,7 +405,7 @@ class ParallelBroadcaster:
                 
                 # Log duplicate client status
                 duplicate_count = len(self.clients) - 1
-                if duplicate_count > 0:
+                if debug_enabled and duplicate_count > 0:
                     debug(
                         LogRecord(
                             LogEvent.CHUNK_AVAILABLE_FOR_DUPLICATES.value,
@@ -383,7 +415,7 @@ class ParallelBroadcaster:
                                 "provider": self.provider_name,
                                 "chunk_index": self.total_chunks_processed,
                                 "duplicate_count": duplicate_count,
-                                "total_collected_chunks": len(self.collected_chunks)
+                                "total_collected_chunks": len(self.buffer)
                             }
                         )
                     )
@@ -415,7 +447,7 @@ class ParallelBroadcaster:
                 # Use original error message directly
                 original_error_message = f"\n\n❌ **Error**: {str(e)}"
                 
-                # Send error message as content delta
+                # Error message as content delta
                 error_chunk = {
                     "type": "content_block_delta",
                     "index": 0,
@@ -425,16 +457,13 @@ class ParallelBroadcaster:
                     }
                 }
                 
-                yield f"event: content_block_delta\ndata: {json.dumps(error_chunk)}\n\n"
-                
-                # Send content block stop
+                # Content block stop
                 content_block_stop = {
                     "type": "content_block_stop",
                     "index": 0
                 }
-                yield f"event: content_block_stop\ndata: {json.dumps(content_block_stop)}\n\n"
                 
-                # Send message delta with stop reason
+                # Message delta with stop reason
                 message_delta = {
                     "type": "message_delta",
                     "delta": {
@@ -442,11 +471,21 @@ class ParallelBroadcaster:
                         "stop_sequence": None
                     }
                 }
-                yield f"event: message_delta\ndata: {json.dumps(message_delta)}\n\n"
                 
-                # Send message stop to properly end the stream
+                # Message stop to properly end the stream
                 message_stop = {"type": "message_stop"}
-                yield f"event: message_stop\ndata: {json.dumps(message_stop)}\n\n"
+                
+                error_events = [
+                    f"event: content_block_delta\ndata: {json.dumps(error_chunk)}\n\n",
+                    f"event: content_block_stop\ndata: {json.dumps(content_block_stop)}\n\n",
+                    f"event: message_delta\ndata: {json.dumps(message_delta)}\n\n",
+                    f"event: message_stop\ndata: {json.dumps(message_stop)}\n\n",
+                ]
+                # Duplicates end their stream with the same error events
+                for error_event in error_events:
+                    self._publish(error_event)
+                for error_event in error_events:
+                    yield error_event
                 
                 debug(
                     LogRecord(
@@ -480,6 +519,8 @@ class ParallelBroadcaster:
                 raise
         finally:
             self.streaming_active = False  # Signal that streaming has ended
+            self.finished = True
+            self._wake_subscribers()
             self._log_broadcast_summary()
     
 
@@ -513,15 +554,16 @@ class ParallelBroadcaster:
 # Global registry for active broadcasters
 _active_broadcasters: dict[str, ParallelBroadcaster] = {}
 
-def create_broadcaster(request: Request, request_id: str, provider_name: str) -> ParallelBroadcaster:
+def create_broadcaster(request: Request, request_id: str, provider_name: str,
+                       buffer: Optional[StreamBuffer] = None) -> ParallelBroadcaster:
     """Factory function to create a ParallelBroadcaster"""
-    return ParallelBroadcaster(request, request_id, provider_name)
+    return ParallelBroadcaster(request, request_id, provider_name, buffer)
 
 def register_broadcaster(signature: str, broadcaster: ParallelBroadcaster):
     """Register a broadcaster for duplicate request handling"""
     _active_broadcasters[signature] = broadcaster
     debug(
-        LogRecord(
+        lambda: LogRecord(
             LogEvent.BROADCASTER_REGISTERED.value,
             f"Broadcaster registered for signature {signature[:16]}...",
             broadcaster.request_id,
@@ -538,7 +580,7 @@ def unregister_broadcaster(signature: str):
     if signature in _active_broadcasters:
         broadcaster = _active_broadcasters.pop(signature)
         debug(
-            LogRecord(
+            lambda: LogRecord(
                 LogEvent.BROADCASTER_UNREGISTERED.value,
                 f"Broadcaster unregistered for signature {signature[:16]}...",
                 broadcaster.request_id,
@@ -551,8 +593,9 @@ def unregister_broadcaster(signature: str):
         )
 
 def has_active_broadcaster(signature: str) -> bool:
-    """Check if there's an active broadcaster for the given signature"""
-    return signature in _active_broadcasters
+    """Check if there's an active broadcaster for the given signature that can still replay its stream"""
+    broadcaster = _active_broadcasters.get(signature)
+    return broadcaster is not None and not broadcaster.buffer.truncated
 
 async def handle_duplicate_stream_request(signature: str, duplicate_request: Request, duplicate_request_id: str) -> AsyncGenerator[str, None]:
     """
@@ -571,7 +614,7 @@ async def handle_duplicate_stream_request(signature: str, duplicate_request: Req
                     "original_request_id": broadcaster.request_id,
                     "provider": broadcaster.provider_name,
                     "signature": signature[:16] + "...",
-                    "chunks_already_processed": len(broadcaster.collected_chunks)
+                    "chunks_already_processed": len(broadcaster.buffer)
                 }
             )
         )
@@ -582,7 +625,7 @@ async def handle_duplicate_stream_request(signature: str, duplicate_request: Req
     else:
         # No active broadcaster found
         debug(  # Changed from error to debug since this is expected behavior
-            LogRecord(
+            lambda: LogRecord(
                 LogEvent.DUPLICATE_REQUEST_NO_ACTIVE_BROADCASTER.value,
                 f"No active broadcaster found for duplicate request",
                 duplicate_request_id,
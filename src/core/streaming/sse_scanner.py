@@ -0,0 +1,140 @@
+"""
+Incremental SSE scanner for in-stream provider health checks.
+
+Parses Anthropic SSE events as chunks pass through the proxy instead of re-parsing the
+whole transcript once the stream ends. Text deltas and all other events are matched
+against the health patterns in bounded rolling windows, so cost stays linear in the
+stream size and the verdict is ready as soon as the last chunk arrives.
+"""
+
+import json
+import re
+from typing import List, Optional
+
+from core.provider_manager.health import HealthPatternMatcher
+
+
+# Event boundary: a blank line (LF or CRLF line endings)
+_EVENT_BOUNDARY = re.compile(rb"\r?\n\r?\n")
+
+# usage.output_tokens (message_start / message_delta carry the running total)
+_OUTPUT_TOKENS_PATTERN = re.compile(r'"output_tokens"\s*:\s*(\d+)')
+
+
+class _RollingWindow:
+    """Text awaiting a pattern check, plus the tail of already checked text.
+
+    The tail is re-checked together with new text so patterns spanning two events still
+    match, as long as the match fits in the window.
+    """
+
+    __slots__ = ("window_size", "tail", "pending", "pending_size")
+
+    def __init__(self, window_size: int):
+        self.window_size = window_size
+        self.tail = ""
+        self.pending: List[str] = []
+        self.pending_size = 0
+
+    def append(self, text: str):
+        self.pending.append(text)
+        self.pending_size += len(text)
+
+    def take(self) -> str:
+        """Return the text to check (tail + pending) and advance the tail."""
+        content = self.tail + "".join(self.pending)
+        self.pending = []
+        self.pending_size = 0
+        self.tail = content[-self.window_size:]
+        return content
+
+
+class SSEStreamScanner:
+    """Incremental health scanner for an Anthropic SSE stream.
+
+    feed() every upstream chunk as it is forwarded and call finish() when the stream
+    ends. error_reason is set as soon as a health pattern matches.
+    Until the first content_block_delta arrives every event is checked immediately (so
+    callers can act on errors sent before any content); after that, checks are batched
+    every check_interval characters.
+    """
+
+    def __init__(self, matcher: HealthPatternMatcher, window_size: int = 4096, check_interval: int = 16384):
+        self.matcher = matcher
+        self.check_interval = check_interval
+        self._buffer = bytearray()
+        # text_delta text, and every other event as raw text
+        self._text = _RollingWindow(window_size)
+        self._events = _RollingWindow(window_size)
+        self.has_text = False
+        self.content_started = False  # a content_block_delta event has been seen
+        self.event_count = 0
+        self.output_tokens: Optional[int] = None
+        self.error_reason: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> Optional[str]:
+        """Scan a chunk; returns the error reason once one has been detected."""
+        self._buffer += chunk
+        start = 0
+        for boundary in _EVENT_BOUNDARY.finditer(self._buffer):
+            self._parse_event(bytes(self._buffer[start:boundary.start()]))
+            start = boundary.end()
+        if start:
+            del self._buffer[:start]
+        elif len(self._buffer) > self._events.window_size * 4:
+            # Not SSE (no event boundaries): scan the raw bytes in windows
+            self._parse_event(bytes(self._buffer))
+            self._buffer.clear()
+        self._check(force=not self.content_started)
+        return self.error_reason
+
+    def finish(self) -> Optional[str]:
+        """Flush the trailing partial event and return the final verdict."""
+        if self._buffer:
+            self._parse_event(bytes(self._buffer))
+            self._buffer.clear()
+        self._check(force=True)
+        return self.error_reason
+
+    def _parse_event(self, raw: bytes):
+        # Events never split a UTF-8 sequence: boundaries are ASCII newlines
+        event = raw.decode("utf-8", errors="replace")
+        if not event.strip():
+            return
+        self.event_count += 1
+
+        for line in event.split("\n"):
+            line = line.strip()
+            if not line.startswith("data: "):
+                continue
+            try:
+                data = json.loads(line[6:])
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(data, dict) or data.get("type") != "content_block_delta":
+                continue
+            self.content_started = True
+            delta = data.get("delta")
+            if isinstance(delta, dict) and delta.get("type") == "text_delta":
+                text = delta.get("text")
+                if text:
+                    self.has_text = True
+                    self._text.append(text)
+                # Text deltas are checked through their text only
+                return
+
+        tokens = _OUTPUT_TOKENS_PATTERN.findall(event)
+        if tokens:
+            self.output_tokens = int(tokens[-1])
+        self._events.append(event)
+
+    def _check(self, force: bool):
+        if self.error_reason is not None:
+            return
+        for window in (self._text, self._events):
+            if not window.pending_size or (not force and window.pending_size < self.check_interval):
+                continue
+            reason = self.matcher.match_response_body(window.take())
+            if reason is not None:
+                self.error_reason = reason
+                return
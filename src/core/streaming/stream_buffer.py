@@ -0,0 +1,158 @@
+"""
+Shared, memory-bounded buffer for the chunks of one upstream stream.
+
+A single StreamBuffer per request signature is referenced by the broadcaster (replay to
+duplicate streams), the response handler and the dedup followers, instead of each
+keeping its own copy. Chunks stay in memory up to a per-stream and a process-wide
+budget; beyond that they spill to an anonymous temp file. Past max_stream_bytes the
+buffer stops retaining chunks and is marked truncated (replay is no longer possible).
+"""
+
+import tempfile
+import weakref
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+
+class MemoryBudget:
+    """Process-wide byte budget shared by all in-memory stream buffers."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+
+    def reserve(self, size: int) -> bool:
+        if self.used + size > self.limit:
+            return False
+        self.used += size
+        return True
+
+    def release(self, size: int):
+        self.used = max(0, self.used - size)
+
+    def configure(self, settings: Dict[str, Any]):
+        """Apply settings.stream_buffer.global_memory_bytes (on configuration load)."""
+        limit = settings.get('global_memory_bytes', 64 * 1024 * 1024)
+        if isinstance(limit, int):
+            self.limit = limit
+
+
+shared_memory_budget = MemoryBudget(64 * 1024 * 1024)
+
+
+def _release_resources(budget: MemoryBudget, state: Dict[str, Any]):
+    """Finalizer: return the reserved memory and close the spill file."""
+    budget.release(state["memory_bytes"])
+    state["memory_bytes"] = 0
+    spill_file = state.get("spill_file")
+    if spill_file is not None:
+        spill_file.close()
+        state["spill_file"] = None
+
+
+class StreamBuffer:
+    """Append-only chunk log with a memory budget, disk spill and a hard size cap.
+
+    Supports len(), indexing and iteration over the retained chunks (as bytes), so
+    subscribers can follow it with their own cursor.
+    """
+
+    def __init__(self, memory_limit: int = 1024 * 1024, max_bytes: int = 64 * 1024 * 1024,
+                 spill_to_disk: bool = True, budget: Optional[MemoryBudget] = None):
+        self.memory_limit = memory_limit
+        self.max_bytes = max_bytes
+        self.spill_to_disk = spill_to_disk
+        self.budget = budget if budget is not None else shared_memory_budget
+        self.size = 0  # retained bytes (memory + disk)
+        self.dropped_bytes = 0
+        self.truncated = False
+        # Chunks [0, len(_spilled)) live in the spill file as (offset, length), the rest in _memory
+        self._spilled: List[Tuple[int, int]] = []
+        self._memory: List[bytes] = []
+        self._file_size = 0
+        self._state: Dict[str, Any] = {"memory_bytes": 0, "spill_file": None}
+        self._finalizer = weakref.finalize(self, _release_resources, self.budget, self._state)
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "StreamBuffer":
+        """Create a buffer from settings.stream_buffer (the global budget is applied at config load)."""
+        return cls(
+            memory_limit=settings.get('memory_bytes_per_stream', 1024 * 1024),
+            max_bytes=settings.get('max_stream_bytes', 64 * 1024 * 1024),
+            spill_to_disk=settings.get('spill_to_disk', True),
+        )
+
+    @property
+    def spilled(self) -> bool:
+        return self._state["spill_file"] is not None
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._state["memory_bytes"]
+
+    def append(self, chunk: Union[str, bytes]):
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        if self.truncated or self.size + len(chunk) > self.max_bytes:
+            self._truncate(len(chunk))
+            return
+        if self.spilled:
+            self._write_to_file(chunk)
+        elif (self.memory_bytes + len(chunk) <= self.memory_limit
+              and self.budget.reserve(len(chunk))):
+            self._memory.append(chunk)
+            self._state["memory_bytes"] += len(chunk)
+        elif self.spill_to_disk:
+            self._spill()
+            self._write_to_file(chunk)
+        else:
+            self._truncate(len(chunk))
+            return
+        self.size += len(chunk)
+
+    def _truncate(self, size: int):
+        self.truncated = True
+        self.dropped_bytes += size
+
+    def _spill(self):
+        """Move the in-memory chunks to the spill file; later chunks are written through."""
+        self._state["spill_file"] = tempfile.TemporaryFile(prefix="stream-buffer-")
+        memory, self._memory = self._memory, []
+        for chunk in memory:
+            self._write_to_file(chunk)
+        self.budget.release(self._state["memory_bytes"])
+        self._state["memory_bytes"] = 0
+
+    def _write_to_file(self, chunk: bytes):
+        spill_file = self._state["spill_file"]
+        spill_file.seek(self._file_size)
+        spill_file.write(chunk)
+        self._spilled.append((self._file_size, len(chunk)))
+        self._file_size += len(chunk)
+
+    def __len__(self) -> int:
+        return len(self._spilled) + len(self._memory)
+
+    def __getitem__(self, index: int) -> bytes:
+        if index < 0:
+            index += len(self)
+        if index < len(self._spilled):
+            offset, length = self._spilled[index]
+            spill_file = self._state["spill_file"]
+            spill_file.flush()
+            spill_file.seek(offset)
+            return spill_file.read(length)
+        return self._memory[index - len(self._spilled)]
+
+    def __iter__(self) -> Iterator[bytes]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def text(self) -> str:
+        """All retained chunks decoded as one string (for parsing a completed stream)."""
+        return b"".join(self).decode("utf-8", errors="replace")
+
+    def close(self):
+        """Release the memory budget and the spill file; retained chunks are discarded."""
+        self._memory = []
+        self._spilled = []
+        self._finalizer()
@@ -6,6 +6,7 @@ with added environment isolation support.
 """
 
 import argparse
+import asyncio
 import json
 import os
 import sys
@@ -36,7 +37,7 @@ from oauth import init_oauth_manager, start_oauth_auto_refresh
 from auth import AuthManager, AuthConfig, AuthenticationMiddleware
 from utils import (
     LogRecord, LogEvent, ColoredConsoleFormatter, JSONFormatter,
-    init_logger, info, warning
+    AsyncBatchedFileHandler, init_logger, info, warning
 )
 
 # Import routers
@@ -59,6 +60,13 @@ class Settings:
         # Default values
         self.log_level: str = "INFO"
         self.log_file_path: str = ""
+        # File log pipeline: records are queued and written in batches by a background thread
+        self.log_file_max_bytes: int = 50 * 1024 * 1024  # Size-based rotation, 0 disables
+        self.log_file_backup_count: int = 5
+        self.log_file_rotate_interval: int = 0  # Time-based rotation in seconds, 0 disables
+        self.log_queue_size: int = 10000  # Records beyond this are dropped (and counted) instead of blocking
+        self.log_max_field_chars: int = 64 * 1024  # Larger log data fields are truncated to a preview
+        self.log_spool_dir: str = ""  # If set, truncated fields are written here in full and referenced
         self.log_color: bool = True
         self.host: str = "127.0.0.1"
         self.port: int = 9090
@@ -88,8 +96,8 @@ class Settings:
             settings_config = config.get('settings', {})
             for key, value in settings_config.items():
                 if hasattr(self, key):
-                    # Special handling for log file path
-                    if key == "log_file_path" and value and not os.path.isabs(value):
+                    # Special handling for log file paths
+                    if key in ("log_file_path", "log_spool_dir") and value and not os.path.isabs(value):
                         project_root = Path(__file__).parent.parent
                         value = str(project_root / value)
                     setattr(self, key, value)
@@ -199,7 +207,11 @@ def setup_logging(settings: Settings) -> dict:
         "disable_existing_loggers": False,
         "formatters": {
             "colored_console": {"()": ColoredConsoleFormatter},
-            "json": {"()": JSONFormatter},
+            "json": {
+                "()": JSONFormatter,
+                "max_field_chars": settings.log_max_field_chars,
+                "spool_dir": settings.log_spool_dir,
+            },
             "uvicorn_access": {"()": "utils.logging.formatters.UvicornAccessFormatter"},
         },
         "handlers": {
@@ -233,12 +245,16 @@ def setup_logging(settings: Settings) -> dict:
     # Add file handler if configured
     if settings.log_file_path:
         log_config["handlers"]["file"] = {
-            "class": "logging.FileHandler",
+            "()": AsyncBatchedFileHandler,
             "level": settings.log_level,
             "formatter": "json",
             "filename": settings.log_file_path,
             "mode": "a",
             "encoding": "utf-8",
+            "max_bytes": settings.log_file_max_bytes,
+            "backup_count": settings.log_file_backup_count,
+            "rotate_interval": settings.log_file_rotate_interval,
+            "queue_size": settings.log_queue_size,
         }
         log_config["loggers"][settings.app_name]["handlers"].append("file")
     
@@ -267,6 +283,11 @@ async def lifespan(app: fastapi.FastAPI):
             message=f"Failed to start OAuth auto-refresh: {e}"
         ))
     
+    # Start upstream connection warm-up
+    provider_manager = getattr(app.state, 'provider_manager', None)
+    if provider_manager:
+        provider_manager.connection_warmer.start()
+    
     yield
     
     # Shutdown
@@ -274,6 +295,19 @@ async def lifespan(app: fastapi.FastAPI):
         event=LogEvent.FASTAPI_SHUTDOWN.value,
         message="FastAPI application shutting down"
     ))
+    
+    # Stop connection warm-up and close pooled upstream HTTP clients
+    provider_manager = getattr(app.state, 'provider_manager', None)
+    if provider_manager:
+        await provider_manager.connection_warmer.stop()
+        await provider_manager.client_pool.aclose()
+    
+    # Flush pending writes of the persistent response cache and the cross-worker
+    # coordination file off the event loop
+    from caching import response_cache
+    from caching.deduplication import close_cross_worker
+    await asyncio.to_thread(response_cache.close)
+    await asyncio.to_thread(close_cross_worker)
 
 def create_app(config_path: str = "config.yaml", environment: str = "production") -> fastapi.FastAPI:
     """Create FastAPI application with isolated components."""
@@ -3,10 +3,14 @@ Core message API routes for Claude Code Provider Balancer.
 Handles the main /v1/messages endpoint and token counting.
 """
 
+import asyncio
+import inspect
 import json
+import time
 import uuid
-from typing import Any, Dict, Optional
-from dataclasses import dataclass
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 
 from fastapi import APIRouter, Request
@@ -15,19 +19,22 @@ from pydantic import ValidationError
 
 from .handlers import MessageHandler, log_provider_error
 from models import MessagesRequest, TokenCountResponse
-from core.provider_manager import ProviderManager, ProviderType
+from core.provider_manager import ProviderManager, ProviderType, StreamingMode
 from core.provider_manager.health import should_mark_unhealthy
 from core.streaming import (
     has_active_broadcaster, handle_duplicate_stream_request,
-    create_broadcaster, register_broadcaster, unregister_broadcaster
+    create_broadcaster, register_broadcaster, unregister_broadcaster,
+    SSEStreamScanner, BackgroundStreamReader, StreamBuffer
 )
 from caching import (
     generate_request_signature, handle_duplicate_request,
-    complete_and_cleanup_request, complete_and_cleanup_request_delayed
+    complete_and_cleanup_request, complete_and_cleanup_request_delayed,
+    is_cacheable_request, response_cache_key, cross_worker_publisher
 )
 from conversion import (
     convert_anthropic_to_openai_messages, convert_anthropic_tools_to_openai,
-    convert_anthropic_tool_choice_to_openai, convert_openai_to_anthropic_response
+    convert_anthropic_tool_choice_to_openai, convert_openai_to_anthropic_response,
+    build_anthropic_passthrough_body
 )
 from utils import LogRecord, LogEvent, info, warning, error, debug
 
@@ -44,11 +51,146 @@ class RequestContext:
     provider_name: Optional[str]
     signature: str
     original_headers: Dict[str, str]
+    # Whether raw_body can be forwarded byte-for-byte (valid UTF-8, string/absent provider field)
+    raw_body_passthrough: bool = True
+    # Response cache key; None when the request may not use the response cache
+    response_cache_key: Optional[str] = None
     
     @property
     def is_streaming(self) -> bool:
         """Check if this is a streaming request."""
         return self.messages_request.stream or False
+    
+    def build_anthropic_body(self, target_model: str) -> Tuple[Dict[str, Any], Optional[bytes]]:
+        """Build the request payload for an Anthropic provider.
+        
+        Returns the request dict and, when possible, the client's raw bytes with only the
+        model value / provider key spliced. None bytes means the dict must be re-serialized.
+        """
+        requested_model = self.parsed_body.get("model")
+        data = self.clean_request_body
+        if target_model != requested_model:
+            data = {**data, "model": target_model}
+        
+        body = None
+        if self.raw_body_passthrough:
+            body = build_anthropic_passthrough_body(
+                self.raw_body, requested_model, target_model, self.provider_name
+            )
+        return data, body
+
+
+@dataclass
+class AnthropicStreamStart:
+    """An upstream Anthropic stream whose response headers have already been received.
+    
+    Chunks read by hold_back() are kept in held_chunks (already fed to the scanner) and
+    are sent before the rest of the stream.
+    """
+    generator: Any
+    first_response: Any
+    scanner: SSEStreamScanner
+    held_chunks: List[bytes] = field(default_factory=list)
+    opened_at: float = field(default_factory=time.monotonic)
+    
+    def __post_init__(self):
+        self._upstream = self._read_upstream()
+        self._pending_read: Optional[asyncio.Future] = None
+    
+    async def _read_upstream(self):
+        async for chunk in self.first_response.aiter_bytes():
+            yield chunk
+        async for response_obj in self.generator:
+            async for chunk in response_obj.aiter_bytes():
+                yield chunk
+    
+    @property
+    def held_back_error(self) -> Optional[str]:
+        """Health error found before any chunk was released to the client."""
+        return self.scanner.error_reason
+    
+    async def hold_back(self, max_bytes: int, max_wait: float) -> Optional[str]:
+        """Buffer chunks until the first content_block_delta, max_bytes or max_wait seconds.
+        
+        Returns the health error reason detected in the held-back chunks, if any.
+        A read still in progress when max_wait expires is picked up by chunks().
+        """
+        deadline = time.monotonic() + max_wait
+        held_bytes = 0
+        while not self.scanner.content_started and held_bytes < max_bytes:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._pending_read = asyncio.ensure_future(self._upstream.__anext__())
+            done, _ = await asyncio.wait({self._pending_read}, timeout=remaining)
+            if not done:
+                break
+            read, self._pending_read = self._pending_read, None
+            try:
+                chunk = read.result()
+            except StopAsyncIteration:
+                # The whole response fit in the hold-back window
+                self.scanner.finish()
+                break
+            self.held_chunks.append(chunk)
+            held_bytes += len(chunk)
+            if self.scanner.feed(chunk) is not None:
+                break
+        return self.held_back_error
+    
+    async def chunks(self):
+        """Yield the chunks that follow held_chunks (not fed to the scanner)."""
+        if self._pending_read is not None:
+            read, self._pending_read = self._pending_read, None
+            try:
+                chunk = await read
+            except StopAsyncIteration:
+                return
+            yield chunk
+        async for chunk in self._upstream:
+            yield chunk
+    
+    async def aclose(self):
+        """Release the upstream connection back to the pool."""
+        if self._pending_read is not None:
+            self._pending_read.cancel()
+            await asyncio.gather(self._pending_read, return_exceptions=True)
+            self._pending_read = None
+        await self._upstream.aclose()
+        await self.generator.aclose()
+
+
+class StreamHoldbackError(Exception):
+    """A health error pattern was found in a stream before anything was sent to the client."""
+    
+    def __init__(self, provider_name: str, reason: str):
+        super().__init__(f"Provider {provider_name} returned an error before the first content: {reason}")
+        self.reason = reason
+
+
+@dataclass
+class HedgeOutcome:
+    """Result of racing a primary provider option against its hedge."""
+    attempt: int  # index of the option that settled the race
+    next_attempt: int  # first option index not raced yet
+    response: Any = None
+    error: Optional[Exception] = None
+
+
+class UpstreamStreamingResponse(StreamingResponse):
+    """Streaming response for a provider stream, which may be drained by a background reader."""
+
+    def __init__(self, content, *, background_reader: Optional[BackgroundStreamReader] = None, **kwargs):
+        super().__init__(content, **kwargs)
+        self.background_reader = background_reader
+
+
+def _dedup_stream_result(stream_buffer: StreamBuffer):
+    """What dedup followers receive for a finished stream: the shared buffer, or an error
+    when the stream outgrew the buffer and can no longer be replayed in full."""
+    if stream_buffer.truncated:
+        return Exception("Response exceeded the stream replay buffer, please retry the request")
+    return stream_buffer
 
 
 class ResponseHandler(ABC):
@@ -73,23 +215,22 @@ class AnthropicStreamingHandler(ResponseHandler):
                               response, request_id: str, attempt: int, message_handler, provider_manager):
         """Handle Anthropic streaming response."""
         stream_headers = {"x-provider-used": provider.name}
-        collected_chunks = []
+        # One buffer for the broadcaster's replay and the dedup followers (memory-bounded)
+        stream_buffer = StreamBuffer.from_settings(provider_manager.get_stream_buffer_settings())
+        # Health patterns are checked while the chunks pass through; chunks held back before
+        # the first content event were already scanned in _execute_provider_request
+        scanner = response.scanner
+        stream_started = response.opened_at
         
-        # Test provider connection first before creating broadcaster
-        # This allows failover if the provider fails before streaming starts
-        try:
-            # Get the provider stream generator
-            provider_stream_generator = message_handler.make_anthropic_streaming_request(
-                provider, context.clean_request_body, request_id, context.original_headers
+        # Background mode drains the upstream at provider speed and releases it as soon as
+        # the provider finishes; the client is fed from the reader's buffer
+        upstream_chunks = response.chunks()
+        reader = None
+        if provider.get_effective_streaming_mode() == StreamingMode.BACKGROUND:
+            reader = BackgroundStreamReader(
+                upstream_chunks, provider_manager.get_background_buffer_bytes(), close=response.aclose
             )
-            
-            # Try to get the first response object to verify connection
-            first_response_obj = await provider_stream_generator.__anext__()
-            
-        except Exception as e:
-            # Provider connection failed - let the exception propagate to trigger failover
-            # Error logging is now handled in handlers layer for consistency
-            raise e
+            upstream_chunks = reader.chunks()
         
         # Provider connection successful, now create broadcaster and streaming response
         async def stream_anthropic_response():
@@ -97,24 +238,28 @@ class AnthropicStreamingHandler(ResponseHandler):
             broadcaster = None
             try:
                 # Create parallel broadcaster for handling multiple clients
-                broadcaster = create_broadcaster(context.request, request_id, provider.name)
+                broadcaster = create_broadcaster(context.request, request_id, provider.name, stream_buffer)
                 
                 # Register broadcaster for duplicate request handling
                 register_broadcaster(context.signature, broadcaster)
+                # Share the stream with duplicates on other workers
+                publisher = cross_worker_publisher(context.signature)
+                if publisher is not None:
+                    broadcaster.add_chunk_listener(publisher)
                 
-                # Create provider stream from response using real-time streaming
+                # Create provider stream from response using real-time streaming.
+                # Chunks stay as bytes end-to-end (no per-chunk decode/re-encode); the scanner
+                # parses event boundaries incrementally and the broadcaster stores each chunk once.
                 async def provider_stream():
                     try:
-                        # First yield from the already obtained response object
-                        async for chunk in first_response_obj.aiter_text():
-                            collected_chunks.append(chunk)
+                        # First release the chunks held back while checking for early errors
+                        for chunk in response.held_chunks:
                             yield chunk
                         
                         # Then continue with the rest of the stream
-                        async for response_obj in provider_stream_generator:
-                            async for chunk in response_obj.aiter_text():
-                                collected_chunks.append(chunk)
-                                yield chunk
+                        async for chunk in upstream_chunks:
+                            scanner.feed(chunk)
+                            yield chunk
                     except Exception:
                         # Error will be logged by ParallelBroadcaster.stream_from_provider()
                         raise
@@ -137,47 +282,21 @@ class AnthropicStreamingHandler(ResponseHandler):
                 )
                 raise
             finally:
+                # Release the upstream connection back to the shared pool
+                if reader is not None:
+                    await reader.aclose()
+                await response.aclose()
+                
                 # Unregister broadcaster when streaming completes
                 if broadcaster:
                     unregister_broadcaster(context.signature)
                 
-                # Check if collected chunks contain SSE error for delayed cleanup using health module
-                has_sse_error = False
-                if collected_chunks:
-                    # Extract both raw SSE content and plain text content for error detection
-                    chunks_content = "".join(collected_chunks) if isinstance(collected_chunks, list) else str(collected_chunks)
-                    
-                    # Extract plain text from SSE chunks for better error pattern matching
-                    extracted_text_parts = []
-                    
-                    # Split SSE content by lines and extract text from content_block_delta events
-                    for line in chunks_content.split('\n'):
-                        line = line.strip()
-                        if line.startswith('data: '):
-                            try:
-                                json_data = json.loads(line[6:])  # Remove 'data: ' prefix
-                                if (json_data.get('type') == 'content_block_delta' and 
-                                    'delta' in json_data and 
-                                    json_data['delta'].get('type') == 'text_delta'):
-                                    text_content = json_data['delta'].get('text', '')
-                                    if text_content:
-                                        extracted_text_parts.append(text_content)
-                            except (json.JSONDecodeError, KeyError):
-                                # If JSON parsing fails, continue to next line
-                                continue
-                    
-                    # Combine extracted text parts
-                    extracted_text = "".join(extracted_text_parts).strip()
-                    
-                    # Use extracted text for error pattern matching if available, otherwise use raw content
-                    content_to_check = extracted_text if extracted_text else chunks_content
-                    
-                    is_unhealthy, error_reason = should_mark_unhealthy(
-                        error_message=content_to_check,
-                        source_type="response_body",
-                        unhealthy_response_body_patterns=provider_manager.settings.get('unhealthy_response_body_patterns', [])
-                    )
-                    has_sse_error = is_unhealthy
+                # Dedup followers share the stream buffer instead of a copy of the chunks
+                cached_result = _dedup_stream_result(stream_buffer)
+                
+                # Health verdict from the incremental scan (only the trailing partial event is left)
+                error_reason = scanner.finish()
+                has_sse_error = error_reason is not None
                 
                 if has_sse_error:
                     # For SSE errors, we need to record this as an error for provider health
@@ -188,7 +307,7 @@ class AnthropicStreamingHandler(ResponseHandler):
                     
                     # Use delayed cleanup for SSE errors to allow duplicate requests to get cached error response
                     complete_and_cleanup_request_delayed(
-                        context.signature, collected_chunks, collected_chunks, True, provider.name, delay_seconds=3
+                        context.signature, cached_result, cached_result, True, provider.name, delay_seconds=3
                     )
                     
                     # Log SSE error completion with delayed cleanup
@@ -202,7 +321,7 @@ class AnthropicStreamingHandler(ResponseHandler):
                                 "model": target_model,
                                 "stream": True,
                                 "provider_type": provider.type.value,
-                                "chunks_count": len(collected_chunks),
+                                "chunks_count": len(stream_buffer),
                                 "attempt": attempt + 1,
                                 "has_sse_error": True,
                                 "cleanup_type": "delayed"
@@ -217,8 +336,16 @@ class AnthropicStreamingHandler(ResponseHandler):
                         provider.name, False, None, request_id
                     )
                     
+                    # Record output speed for latency-aware selection
+                    if scanner.output_tokens:
+                        # Provider speed, not client speed: background mode knows when the upstream ended
+                        stream_ended = reader.finished_at if reader is not None and reader.finished_at else time.monotonic()
+                        provider_manager.record_output_throughput(
+                            provider.name, scanner.output_tokens, stream_ended - stream_started
+                        )
+                    
                     # Cache the successful response normally
-                    complete_and_cleanup_request(context.signature, collected_chunks, collected_chunks, True, provider.name)
+                    complete_and_cleanup_request(context.signature, cached_result, cached_result, True, provider.name)
                     
                     # Log successful completion
                     info(
@@ -231,7 +358,7 @@ class AnthropicStreamingHandler(ResponseHandler):
                                 "model": target_model,
                                 "stream": True,
                                 "provider_type": provider.type.value,
-                                "chunks_count": len(collected_chunks),
+                                "chunks_count": len(stream_buffer),
                                 "attempt": attempt + 1,
                                 "has_sse_error": False,
                                 "cleanup_type": "immediate"
@@ -239,10 +366,11 @@ class AnthropicStreamingHandler(ResponseHandler):
                         )
                     )
         
-        return StreamingResponse(
+        return UpstreamStreamingResponse(
             stream_anthropic_response(),
             media_type="text/event-stream",
-            headers=stream_headers
+            headers=stream_headers,
+            background_reader=reader
         )
 
 
@@ -309,8 +437,7 @@ class AnthropicNonStreamingHandler(ResponseHandler):
             http_status_code=response_status_code,
             error_message=str(response_content),
             source_type="response_body",
-            unhealthy_http_codes=provider_manager.settings.get('unhealthy_http_codes', []),
-            unhealthy_response_body_patterns=provider_manager.settings.get('unhealthy_response_body_patterns', [])
+            matcher=provider_manager.health_matcher
         )
         
         # 使用ProviderManager的错误计数机制
@@ -378,50 +505,71 @@ class OpenAIStreamingHandler(ResponseHandler):
         stream_headers = {"x-provider-used": provider.name}
         
         if hasattr(response, '__aiter__'):
-            # Response is an AsyncStream object, collect chunks for caching while streaming
-            collected_chunks = []
+            # Response is an AsyncStream object; the broadcaster stores the converted chunks
+            # in the shared (memory-bounded) buffer used for dedup replay
+            stream_buffer = StreamBuffer.from_settings(provider_manager.get_stream_buffer_settings())
+            chunk_count = 0
+            stream_started = None
+            
+            async def converted_chunks():
+                """Convert OpenAI chunks to Anthropic SSE format"""
+                async for chunk in response:
+                    if hasattr(chunk, 'choices') and chunk.choices:
+                        choice = chunk.choices[0]
+                        
+                        if hasattr(choice, 'delta') and choice.delta:
+                            delta = choice.delta
+                            if hasattr(delta, 'content') and delta.content:
+                                # Create Anthropic-style text delta event
+                                anthropic_chunk = {
+                                    "type": "content_block_delta",
+                                    "index": 0,
+                                    "delta": {
+                                        "type": "text_delta",
+                                        "text": delta.content
+                                    }
+                                }
+                                yield f"data: {json.dumps(anthropic_chunk)}\n\n"
+                            elif hasattr(choice, 'finish_reason') and choice.finish_reason:
+                                # Create Anthropic-style message stop event
+                                stop_chunk = {
+                                    "type": "message_stop"
+                                }
+                                yield f"data: {json.dumps(stop_chunk)}\n\n"
+            
+            # Background mode drains (and converts) the upstream at provider speed and closes
+            # it as soon as the provider finishes; the client is fed from the reader's buffer
+            upstream_chunks = converted_chunks()
+            reader = None
+            if provider.get_effective_streaming_mode() == StreamingMode.BACKGROUND:
+                reader = BackgroundStreamReader(
+                    upstream_chunks, provider_manager.get_background_buffer_bytes(),
+                    close=getattr(response, 'close', None)
+                )
+                upstream_chunks = reader.chunks()
             
             async def stream_openai_response():
                 """Handle OpenAI streaming response and convert to Anthropic format"""
                 broadcaster = None
                 try:
                     # Create parallel broadcaster for handling multiple clients
-                    broadcaster = create_broadcaster(context.request, request_id, provider.name)
+                    broadcaster = create_broadcaster(context.request, request_id, provider.name, stream_buffer)
                     
                     # Register broadcaster for duplicate request handling
                     register_broadcaster(context.signature, broadcaster)
+                    # Share the stream with duplicates on other workers
+                    publisher = cross_worker_publisher(context.signature)
+                    if publisher is not None:
+                        broadcaster.add_chunk_listener(publisher)
                     
                     # Create provider stream from OpenAI AsyncStream
                     async def provider_stream():
+                        nonlocal stream_started, chunk_count
+                        stream_started = time.monotonic()
                         try:
-                            async for chunk in response:
-                                # Convert OpenAI chunk to Anthropic SSE format
-                                if hasattr(chunk, 'choices') and chunk.choices:
-                                    choice = chunk.choices[0]
-                                    
-                                    if hasattr(choice, 'delta') and choice.delta:
-                                        delta = choice.delta
-                                        if hasattr(delta, 'content') and delta.content:
-                                            # Create Anthropic-style text delta event
-                                            anthropic_chunk = {
-                                                "type": "content_block_delta",
-                                                "index": 0,
-                                                "delta": {
-                                                    "type": "text_delta",
-                                                    "text": delta.content
-                                                }
-                                            }
-                                            sse_data = f"data: {json.dumps(anthropic_chunk)}\n\n"
-                                            collected_chunks.append(sse_data)
-                                            yield sse_data
-                                        elif hasattr(choice, 'finish_reason') and choice.finish_reason:
-                                            # Create Anthropic-style message stop event
-                                            stop_chunk = {
-                                                "type": "message_stop"
-                                            }
-                                            sse_data = f"data: {json.dumps(stop_chunk)}\n\n"
-                                            collected_chunks.append(sse_data)
-                                            yield sse_data
+                            async for sse_data in upstream_chunks:
+                                chunk_count += 1
+                                yield sse_data
                         except Exception as e:
                             error(
                                 LogRecord(
@@ -454,19 +602,22 @@ class OpenAIStreamingHandler(ResponseHandler):
                     )
                     raise
                 finally:
-                    # Close OpenAI client if it's attached to the response
-                    if hasattr(response, '_client') and response._client:
+                    # Close the stream so its connection returns to the shared pool
+                    if reader is not None:
+                        await reader.aclose()
+                    if hasattr(response, 'close'):
                         try:
-                            await response._client.close()
+                            await response.close()
                         except Exception:
-                            pass  # Ignore errors when closing client
+                            pass  # Ignore errors when closing stream
                     
                     # Unregister broadcaster when streaming completes
                     if broadcaster:
                         unregister_broadcaster(context.signature)
                     
                     # Complete the request with collected chunks
-                    complete_and_cleanup_request(context.signature, collected_chunks, collected_chunks, True, provider.name)
+                    cached_result = _dedup_stream_result(stream_buffer)
+                    complete_and_cleanup_request(context.signature, cached_result, cached_result, True, provider.name)
                     
                     # Mark provider success for sticky routing and failure count reset
                     provider.mark_success()
@@ -476,6 +627,13 @@ class OpenAIStreamingHandler(ResponseHandler):
                         provider.name, False, None, request_id
                     )
                     
+                    # Record output speed (OpenAI streams carry no usage; one delta ~ one token)
+                    if stream_started is not None:
+                        stream_ended = reader.finished_at if reader is not None and reader.finished_at else time.monotonic()
+                        provider_manager.record_output_throughput(
+                            provider.name, chunk_count, stream_ended - stream_started
+                        )
+                    
                     # Log request completion
                     info(
                         LogRecord(
@@ -487,16 +645,17 @@ class OpenAIStreamingHandler(ResponseHandler):
                                 "model": target_model,
                                 "stream": True,
                                 "provider_type": "openai",
-                                "chunks_count": len(collected_chunks),
+                                "chunks_count": chunk_count,
                                 "attempt": attempt + 1,
                             }
                         )
                     )
             
-            return StreamingResponse(
+            return UpstreamStreamingResponse(
                 stream_openai_response(),
                 media_type="text/event-stream",
-                headers=stream_headers
+                headers=stream_headers,
+                background_reader=reader
             )
         else:
             # If response is not streamable, convert to streaming format
@@ -574,8 +733,7 @@ class OpenAINonStreamingHandler(ResponseHandler):
             http_status_code=response_status_code,
             error_message=str(response_content),
             source_type="response_body",
-            unhealthy_http_codes=provider_manager.settings.get('unhealthy_http_codes', []),
-            unhealthy_response_body_patterns=provider_manager.settings.get('unhealthy_response_body_patterns', [])
+            matcher=provider_manager.health_matcher
         )
         
         # 使用ProviderManager的错误计数机制
@@ -655,9 +813,18 @@ def create_messages_router(provider_manager: ProviderManager, settings: Any) ->
         """Extract and validate request data, create context object."""
         # Get request body for logging and caching
         raw_body = await request.body()
-        parsed_body = json.loads(raw_body.decode('utf-8', errors='ignore'))
+        try:
+            body_text = raw_body.decode('utf-8')
+            raw_body_passthrough = True
+        except UnicodeDecodeError:
+            # Invalid UTF-8 can't be forwarded as-is; fall back to re-serializing the parsed body
+            body_text = raw_body.decode('utf-8', errors='ignore')
+            raw_body_passthrough = False
+        parsed_body = json.loads(body_text)
         
         # Extract provider parameter separately before validation
+        if "provider" in parsed_body and not isinstance(parsed_body["provider"], str):
+            raw_body_passthrough = False
         provider_name = parsed_body.pop("provider", None)
         
         # Generate request signature for deduplication (without provider)
@@ -688,6 +855,11 @@ def create_messages_router(provider_manager: ProviderManager, settings: Any) ->
         clean_request_body = {k: v for k, v in parsed_body.items() if k not in ['provider']}
         original_headers = dict(request.headers)
         
+        # Deterministic (temperature 0) or explicitly opted-in requests may use the response cache
+        cache_key = None
+        if is_cacheable_request(parsed_body, original_headers, provider_manager.get_response_cache_settings()):
+            cache_key = response_cache_key(parsed_body)
+        
         return RequestContext(
             request_id=request_id,
             request=request,
@@ -697,7 +869,9 @@ def create_messages_router(provider_manager: ProviderManager, settings: Any) ->
             messages_request=messages_request,
             provider_name=provider_name,
             signature=signature,
-            original_headers=original_headers
+            original_headers=original_headers,
+            raw_body_passthrough=raw_body_passthrough,
+            response_cache_key=cache_key
         )
 
     async def _handle_duplicate_requests(context: RequestContext, request_id: str) -> Optional[StreamingResponse]:
@@ -726,9 +900,10 @@ def create_messages_router(provider_manager: ProviderManager, settings: Any) ->
                     )
                 )
         
-        # Check for cached duplicate requests
+        # Check for cached responses and in-flight duplicate requests
         duplicate_result = await handle_duplicate_request(
-            context.signature, request_id, context.is_streaming, context.clean_request_body
+            context.signature, request_id, context.is_streaming, context.clean_request_body,
+            context.response_cache_key
         )
         return duplicate_result
 
@@ -736,7 +911,7 @@ def create_messages_router(provider_manager: ProviderManager, settings: Any) ->
         """Select available provider options for failover."""
         # Select all available provider options for failover
         provider_options = provider_manager.select_model_and_provider_options(
-            context.messages_request.model, context.provider_name
+            context.messages_request.model, context.provider_name, context.is_streaming
         )
         
         if not provider_options:
@@ -766,14 +941,30 @@ def create_messages_router(provider_manager: ProviderManager, settings: Any) ->
         """Execute request for a single provider."""
         if provider.type == ProviderType.ANTHROPIC:
             # For Anthropic providers, use the appropriate method based on streaming
+            request_data, raw_body = context.build_anthropic_body(target_model)
             if context.is_streaming:
-                # Return the async generator for streaming
-                return message_handler.make_anthropic_streaming_request(
-                    provider, context.clean_request_body, request_id, context.original_headers
+                # Open the stream and wait for the response headers, so connection errors
+                # surface here (and can fail over) before the broadcaster is created
+                provider_stream_generator = message_handler.make_anthropic_streaming_request(
+                    provider, request_data, request_id, context.original_headers, raw_body
+                )
+                first_response_obj = await provider_stream_generator.__anext__()
+                stream_start = AnthropicStreamStart(
+                    provider_stream_generator, first_response_obj, SSEStreamScanner(provider_manager.health_matcher)
                 )
+                # Hold the stream back until its first content event, so errors sent as the
+                # first SSE events can still fail over (checked by the caller)
+                holdback = provider_manager.get_stream_holdback()
+                if holdback is not None:
+                    try:
+                        await stream_start.hold_back(*holdback)
+                    except BaseException:
+                        await stream_start.aclose()
+                        raise
+                return stream_start
             else:
                 return await message_handler.make_anthropic_nonstreaming_request(
-                    provider, context.clean_request_body, request_id, context.original_headers
+                    provider, request_data, request_id, context.original_headers, raw_body
                 )
         elif provider.type == ProviderType.OPENAI:
             # Convert to OpenAI format first
@@ -814,6 +1005,167 @@ def create_messages_router(provider_manager: ProviderManager, settings: Any) ->
         else:
             raise ValueError(f"Unsupported provider type: {provider.type}")
 
+    async def _timed_execute(context: RequestContext, provider, target_model: str, request_id: str, ticket):
+        """Execute a provider request and record its time to first response.
+        
+        Takes the provider's in-flight ticket and returns (response, ticket). The request
+        counts as in flight until the ticket is released, once the response is fully handled.
+        """
+        started = time.monotonic()
+        try:
+            response = await _execute_provider_request(context, provider, target_model, request_id)
+        except BaseException:
+            ticket.release()
+            raise
+        provider_manager.record_first_response_latency(
+            provider.name, context.is_streaming, time.monotonic() - started
+        )
+        return response, ticket
+
+    async def _release_response(result):
+        """Release the upstream connection held by a response that lost a hedged race."""
+        response, ticket = result
+        try:
+            if isinstance(response, AnthropicStreamStart):
+                await response.aclose()
+                return
+            close = getattr(response, 'close', None)
+            if close is not None:
+                close_result = close()
+                if inspect.isawaitable(close_result):
+                    await close_result
+        finally:
+            ticket.release()
+
+    def _release_when_complete(result, ticket):
+        """Release the in-flight ticket once the handler's response is done.
+        
+        Streaming responses keep the provider busy until the body has been sent, so the
+        ticket is released when the body iterator finishes, or as soon as the upstream is
+        fully read in background mode. The finalizer covers a client that disconnects
+        before the body iterator is ever started.
+        """
+        if not isinstance(result, StreamingResponse):
+            ticket.release()
+            return result
+        
+        if isinstance(result, UpstreamStreamingResponse) and result.background_reader is not None:
+            result.background_reader.add_done_callback(ticket.release)
+        
+        body_iterator = result.body_iterator
+        
+        async def release_after_stream():
+            try:
+                async for chunk in body_iterator:
+                    yield chunk
+            finally:
+                ticket.release()
+        
+        result.body_iterator = release_after_stream()
+        weakref.finalize(result, ticket.release)
+        return result
+
+    def _record_hedge_failure(context: RequestContext, provider, e: Exception, request_id: str):
+        """Record a failed racer against provider health while another racer is still running."""
+        http_status_code = getattr(e, 'status_code', None) or (
+            getattr(e, 'response', None) and getattr(e.response, 'status_code', None)
+        )
+        error_reason, should_record_error, _ = provider_manager.get_error_handling_decision(
+            e, http_status_code, context.is_streaming
+        )
+        if provider_manager.record_health_check_result(provider.name, should_record_error, error_reason, request_id):
+            provider.mark_failure()
+
+    async def _execute_hedged(context: RequestContext, provider_options: list, attempt: int,
+                              hedge_delay: float, ticket, request_id: str) -> HedgeOutcome:
+        """Race the primary option against the next one once hedge_delay has passed.
+        
+        The first racer to produce a response wins and the other is cancelled (or, if it
+        also finished, its upstream connection is released). Only the winner's response
+        is handed to a response handler, so dedup and the broadcaster see a single stream.
+        When every racer fails, the last failure is returned for the normal error handling;
+        earlier failures are recorded against provider health here. No hedge is sent when
+        the next provider is at its concurrency limit.
+        """
+        racers: Dict[asyncio.Task, int] = {}
+        tickets: Dict[asyncio.Task, Any] = {}
+        
+        def launch(index: int, racer_ticket):
+            target_model, provider = provider_options[index]
+            task = asyncio.create_task(_timed_execute(context, provider, target_model, request_id, racer_ticket))
+            racers[task] = index
+            tickets[task] = racer_ticket
+        
+        launch(attempt, ticket)
+        next_attempt = attempt + 1
+        try:
+            done, _ = await asyncio.wait(racers, timeout=hedge_delay)
+            hedge_ticket = None
+            if not done:
+                hedge_ticket = provider_manager.try_begin_provider_request(
+                    provider_options[next_attempt][1], context.is_streaming
+                )
+            if hedge_ticket is not None:
+                launch(next_attempt, hedge_ticket)
+                next_attempt += 1
+                info(
+                    LogRecord(
+                        event=LogEvent.PROVIDER_HEDGE_STARTED.value,
+                        message=f"No response from {provider_options[attempt][1].name} after {hedge_delay:.2f}s, "
+                                f"hedging with {provider_options[attempt + 1][1].name}",
+                        request_id=request_id,
+                        data={
+                            "primary_provider": provider_options[attempt][1].name,
+                            "hedge_provider": provider_options[attempt + 1][1].name,
+                            "hedge_delay": hedge_delay,
+                            "stream": context.is_streaming
+                        }
+                    )
+                )
+            
+            while racers:
+                done, _ = await asyncio.wait(racers, return_when=asyncio.FIRST_COMPLETED)
+                # Successes settle the race before failures that completed at the same time
+                settled = sorted(done, key=lambda task: (task.exception() is not None, racers[task]))
+                for task in settled:
+                    index = racers.pop(task)
+                    error_obj = task.exception()
+                    if error_obj is None:
+                        if index != attempt:
+                            info(
+                                LogRecord(
+                                    event=LogEvent.PROVIDER_HEDGE_WON.value,
+                                    message=f"Hedged request to {provider_options[index][1].name} answered first",
+                                    request_id=request_id,
+                                    data={
+                                        "primary_provider": provider_options[attempt][1].name,
+                                        "winning_provider": provider_options[index][1].name
+                                    }
+                                )
+                            )
+                        return HedgeOutcome(index, next_attempt, response=task.result())
+                    if racers or task is not settled[-1]:
+                        _record_hedge_failure(context, provider_options[index][1], error_obj, request_id)
+                    else:
+                        return HedgeOutcome(index, next_attempt, error=error_obj)
+            # Unreachable: every racer either won or failed above
+            raise RuntimeError("Hedged request finished without a result")
+        finally:
+            # Cancel the losers and release any upstream connection they already opened
+            for task in racers:
+                task.cancel()
+            if racers:
+                results = await asyncio.gather(*racers, return_exceptions=True)
+                for result in results:
+                    if not isinstance(result, BaseException):
+                        try:
+                            await _release_response(result)
+                        except Exception:
+                            pass
+                # A task cancelled before it started never ran its own cleanup
+                for task in racers:
+                    tickets[task].release()
+
     @router.post("/messages", response_model=None, status_code=200)
     async def create_message_proxy(request: Request) -> JSONResponse:
         """Proxy endpoint for Anthropic Messages API."""
@@ -840,23 +1192,121 @@ def create_messages_router(provider_manager: ProviderManager, settings: Any) ->
                 )
             
             # Try providers in order until one succeeds
+            route_options = provider_options
             max_attempts = len(provider_options)
             last_exception = None
             
-            for attempt in range(max_attempts):
+            # Options skipped because the provider was at its concurrency limit
+            saturated_options = []
+            queue_deadline = time.monotonic() + provider_manager.get_admission_queue_timeout()
+            
+            attempt = 0
+            while True:
+                if attempt >= max_attempts:
+                    # Every option was tried or skipped; wait (bounded) for a saturated one to free up
+                    if not saturated_options or not await provider_manager.wait_for_provider_capacity(queue_deadline):
+                        break
+                    provider_options, saturated_options = saturated_options, []
+                    max_attempts = len(provider_options)
+                    attempt = 0
+                
                 target_model, current_provider = provider_options[attempt]
+                next_attempt = attempt + 1
+                
+                # Admission control: spill to the next option instead of sending a request
+                # the provider will reject with 429
+                ticket = provider_manager.try_begin_provider_request(current_provider, context.is_streaming)
+                if ticket is None:
+                    saturated_options.append(provider_options[attempt])
+                    info(
+                        LogRecord(
+                            event=LogEvent.PROVIDER_SATURATED.value,
+                            message=f"Provider {current_provider.name} is at its concurrency limit, skipping",
+                            request_id=request_id,
+                            data={
+                                "provider": current_provider.name,
+                                "in_flight": provider_manager.load_tracker.in_flight(current_provider.name),
+                                "active_streams": provider_manager.load_tracker.active_streams(current_provider.name),
+                                "max_concurrency": current_provider.max_concurrency,
+                                "max_streams": current_provider.max_streams,
+                                "circuit_state": current_provider.breaker.state.value,
+                                "stream": context.is_streaming
+                            }
+                        )
+                    )
+                    attempt = next_attempt
+                    continue
                 
                 try:
-                    # Execute request for current provider
-                    response = await _execute_provider_request(context, current_provider, target_model, request_id)
+                    # Routes with hedge_delay race the primary against the next option
+                    hedge_delay = None
+                    if next_attempt < max_attempts:
+                        hedge_delay = provider_manager.get_hedge_delay(
+                            context.messages_request.model, current_provider, context.is_streaming
+                        )
+                    
+                    if hedge_delay is not None:
+                        outcome = await _execute_hedged(
+                            context, provider_options, attempt, hedge_delay, ticket, request_id
+                        )
+                        attempt, next_attempt = outcome.attempt, outcome.next_attempt
+                        target_model, current_provider = provider_options[attempt]
+                        if outcome.error is not None:
+                            raise outcome.error
+                        response, ticket = outcome.response
+                    else:
+                        # Execute request for current provider
+                        response, ticket = await _timed_execute(
+                            context, current_provider, target_model, request_id, ticket
+                        )
+                    
+                    # An error found in the held-back start of a stream has not reached the
+                    # client yet: fail over transparently. With no option left the stream is
+                    # sent as it is and the handler records the SSE error.
+                    if (isinstance(response, AnthropicStreamStart) and response.held_back_error is not None
+                            and (next_attempt < max_attempts or saturated_options)):
+                        try:
+                            await response.aclose()
+                        finally:
+                            ticket.release()
+                        raise StreamHoldbackError(current_provider.name, response.held_back_error)
                     
                     # Get appropriate response handler using strategy pattern
                     handler = get_response_handler(current_provider.type, context.is_streaming)
                     
                     # Process response using the selected handler
-                    return await handler.process_response(
-                        context, current_provider, target_model, response, 
-                        request_id, attempt, message_handler, provider_manager
+                    try:
+                        result = await handler.process_response(
+                            context, current_provider, target_model, response, 
+                            request_id, attempt, message_handler, provider_manager
+                        )
+                    except BaseException:
+                        ticket.release()
+                        raise
+                    return _release_when_complete(result, ticket)
+                except StreamHoldbackError as e:
+                    last_exception = e
+                    if provider_manager.record_health_check_result(
+                        current_provider.name, True, f"SSE error detected: {e.reason}", request_id
+                    ):
+                        current_provider.mark_failure()
+                    
+                    fallback = provider_options[next_attempt][1].name if next_attempt < max_attempts else None
+                    warning(
+                        LogRecord(
+                            event=LogEvent.PROVIDER_STREAM_ERROR_HELD_BACK.value,
+                            message=f"Provider {current_provider.name} streamed an error before any content, "
+                                    f"failing over to {fallback or 'a saturated provider'}",
+                            request_id=request_id,
+                            data={
+                                "failed_provider": current_provider.name,
+                                "failed_model": target_model,
+                                "error_reason": e.reason,
+                                "fallback_provider": fallback,
+                                "attempt": next_attempt + 1,
+                                "total_attempts": max_attempts
+                            }
+                        )
                     )
                 except Exception as e:
                     last_exception = e
@@ -948,8 +1398,8 @@ def create_messages_router(provider_manager: ProviderManager, settings: Any) ->
                         return await message_handler.log_and_return_error_response(request, e, request_id, status_code, context.signature)
                     
                     # If we have more providers to try, continue to next iteration
-                    if attempt < max_attempts - 1:
-                        next_target_model, next_provider = provider_options[attempt + 1]
+                    if next_attempt < max_attempts:
+                        next_target_model, next_provider = provider_options[next_attempt]
                         info(
                             LogRecord(
                                 event=LogEvent.PROVIDER_FALLBACK.value,
@@ -960,23 +1410,46 @@ def create_messages_router(provider_manager: ProviderManager, settings: Any) ->
                                     "failed_model": target_model,
                                     "fallback_provider": next_provider.name,
                                     "fallback_model": next_target_model,
-                                    "attempt": attempt + 2,
+                                    "attempt": next_attempt + 1,
                                     "total_attempts": max_attempts
                                 }
                             )
                         )
                     # If this is the last attempt, the loop will end and we'll return the error
+                
+                attempt = next_attempt
+            
+            if last_exception is None:
+                # Nothing was sent: every provider stayed at its concurrency limit until the deadline
+                warning(
+                    LogRecord(
+                        event=LogEvent.ALL_PROVIDERS_SATURATED.value,
+                        message=f"All providers for model {context.messages_request.model} are at their concurrency limit",
+                        request_id=request_id,
+                        data={
+                            "model": context.messages_request.model,
+                            "providers": [opt[1].name for opt in route_options]
+                        }
+                    )
+                )
+                client_error = Exception(
+                    f"All configured providers for model '{context.messages_request.model}' are at capacity, "
+                    f"please retry later."
+                )
+                return await message_handler.log_and_return_error_response(
+                    request, client_error, request_id, 429, context.signature
+                )
             
             # All providers failed, return ALL_PROVIDERS_FAILED
             error(
                 LogRecord(
                     event=LogEvent.ALL_PROVIDERS_FAILED.value,
-                    message=f"All {max_attempts} provider(s) failed for model: {context.messages_request.model}",
+                    message=f"All {len(route_options)} provider(s) failed for model: {context.messages_request.model}",
                     request_id=request_id,
                     data={
                         "model": context.messages_request.model,
-                        "total_attempts": max_attempts,
-                        "providers_tried": [opt[1].name for opt in provider_options]
+                        "total_attempts": len(route_options),
+                        "providers_tried": [opt[1].name for opt in route_options]
                     }
                 ),
                 exc=last_exception
@@ -10,7 +10,8 @@ This package contains various utility functions and classes:
 from .logging import (
     LogRecord, LogEvent, LogError,
     ColoredConsoleFormatter, JSONFormatter, ConsoleJSONFormatter,
-    init_logger, debug, info, warning, error, critical,
+    AsyncBatchedFileHandler,
+    init_logger, is_enabled, debug, info, warning, error, critical,
     create_debug_request_info
 )
 
@@ -18,6 +19,7 @@ __all__ = [
     # Logging utilities
     "LogRecord", "LogEvent", "LogError",
     "ColoredConsoleFormatter", "JSONFormatter", "ConsoleJSONFormatter", 
-    "init_logger", "debug", "info", "warning", "error", "critical",
+    "AsyncBatchedFileHandler",
+    "init_logger", "is_enabled", "debug", "info", "warning", "error", "critical",
     "create_debug_request_info"
 ]
\ No newline at end of file
@@ -6,14 +6,19 @@ from .formatters import (
     ColoredConsoleFormatter,
     JSONFormatter,
     ConsoleJSONFormatter,
+    LogRecordEncoder,
     mask_sensitive_data,
     mask_sensitive_string,
     create_debug_request_info
 )
 
+from .async_file_handler import AsyncBatchedFileHandler
+
 from .handlers import (
     LogEvent,
+    LogPayload,
     init_logger,
+    is_enabled,
     debug,
     info,
     warning,
@@ -28,8 +33,12 @@ __all__ = [
     "ColoredConsoleFormatter",
     "JSONFormatter", 
     "ConsoleJSONFormatter",
+    "LogRecordEncoder",
+    "AsyncBatchedFileHandler",
     "LogEvent",
+    "LogPayload",
     "init_logger",
+    "is_enabled",
     "debug",
     "info",
     "warning",
@@ -0,0 +1,204 @@
+"""Queue-based JSONL file handler that keeps file I/O off the event loop."""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .formatters import write_spools
+
+
+class AsyncBatchedFileHandler(logging.Handler):
+    """Write formatted records from a background thread, in batches.
+
+    emit() only formats the record and enqueues the line; it never touches the file,
+    so disk latency cannot stall the event loop. The writer thread drains the queue in
+    batches of up to batch_size lines (or whatever arrived within flush_interval),
+    writes and flushes them in one call, and rotates the file by size (max_bytes)
+    and/or age (rotate_interval seconds), keeping backup_count old files.
+
+    Side files for oversized fields (JSONFormatter spool_dir) are also written by the
+    writer thread, just before the line that refers to them.
+
+    When the queue is full the record is dropped rather than blocking the caller;
+    drops are counted and reported in the file itself once there is room again.
+    """
+
+    def __init__(self, filename: str, mode: str = "a", encoding: str = "utf-8",
+                 max_bytes: int = 0, backup_count: int = 5, rotate_interval: float = 0,
+                 queue_size: int = 10000, batch_size: int = 256, flush_interval: float = 0.5):
+        super().__init__()
+        self.filename = os.path.abspath(filename)
+        self.mode = mode
+        self.encoding = encoding
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_interval = rotate_interval
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=queue_size)
+        self._stream = None
+        self._opened_at = 0.0
+        # Counters, updated from the emitting threads and read by the writer
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.rotations = 0
+        self.max_queue_depth = 0
+        self._dropped_reported = 0
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="log-file-writer", daemon=True)
+        self._writer.start()
+
+    def emit(self, record: logging.LogRecord):
+        if self._closed:
+            return
+        try:
+            # Formatted here, not in the writer: the record's payload may still be mutated by the caller
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.enqueued += 1
+        depth = self._queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def stats(self) -> Dict[str, Any]:
+        """Backpressure counters for diagnostics."""
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "max_queue_depth": self.max_queue_depth,
+            "rotations": self.rotations,
+        }
+
+    def flush(self):
+        """Block until every line enqueued so far has been written."""
+        if not self._closed and self._writer.is_alive():
+            self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer.is_alive():
+            # Blocking put: the sentinel must not be dropped, the writer drains everything before it
+            self._queue.put(None)
+            self._writer.join()
+        super().close()
+
+    # ===== Writer thread =====
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch: List[str] = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # Idle: still report drops that happened since the last batch
+                self._report_drops(batch)
+                self._write_batch(batch)
+                continue
+            taken = 1
+            if item is None:
+                stopping = True
+            else:
+                batch.append(item)
+            while not stopping and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+            self._report_drops(batch)
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+        self._close_stream()
+
+    def _report_drops(self, batch: List[str]):
+        dropped = self.dropped
+        if dropped == self._dropped_reported:
+            return
+        batch.append(json.dumps({
+            "timestamp": datetime.now().isoformat(),
+            "level": "WARNING",
+            "logger": __name__,
+            "detail": {
+                "event": "log_records_dropped",
+                "message": f"Log queue full: dropped {dropped - self._dropped_reported} records",
+                "data": {**self.stats(), "dropped_since_last_report": dropped - self._dropped_reported},
+            },
+        }))
+        self._dropped_reported = dropped
+
+    def _write_batch(self, batch: List[str]):
+        if not batch:
+            return
+        try:
+            if self._stream is None:
+                self._open_stream()
+            elif self._should_rotate():
+                self._rotate()
+            for line in batch:
+                write_spools(line)
+            self._stream.write("\n".join(batch) + "\n")
+            self._stream.flush()
+            self.written += len(batch)
+        except Exception:
+            # Same policy as logging.Handler.handleError: never let logging take the process down
+            if logging.raiseExceptions:
+                import traceback
+                traceback.print_exc()
+
+    def _open_stream(self):
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._stream = open(self.filename, self.mode, encoding=self.encoding)
+        self._opened_at = time.time()
+
+    def _close_stream(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _should_rotate(self) -> bool:
+        if self.max_bytes > 0 and self._stream.tell() >= self.max_bytes:
+            return True
+        return self.rotate_interval > 0 and time.time() - self._opened_at >= self.rotate_interval
+
+    def _rotate(self):
+        """Shift filename -> filename.1 -> ... -> filename.<backup_count> and reopen."""
+        self._close_stream()
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.filename}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.filename}.{index + 1}")
+            if os.path.exists(self.filename):
+                os.replace(self.filename, f"{self.filename}.1")
+        elif os.path.exists(self.filename):
+            os.remove(self.filename)
+        self.rotations += 1
+        self._open_stream()
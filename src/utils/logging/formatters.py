@@ -3,10 +3,12 @@
 import dataclasses
 import json
 import logging
+import os
 import sys
 import traceback
+import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import re
 
 
@@ -39,24 +41,172 @@ def mask_sensitive_data(data: Any, mask_char: str = "*") -> Any:
         return data
 
 
+_SURROGATES = re.compile('[\ud800-\udfff]')
+
+
+def _is_utf8_safe(text: str) -> bool:
+    """True if text encodes to UTF-8 (no lone surrogates), without building the bytes."""
+    return text.isascii() or _SURROGATES.search(text) is None
+
+
 def _safe_json_dumps(data: Any) -> str:
     """Safely serialize data to JSON with fallback handling for encoding issues."""
     try:
         json_str = json.dumps(data, ensure_ascii=False)
-        # Test if the JSON string can be safely encoded to UTF-8
-        json_str.encode('utf-8')
-        return json_str
+        # Test if the JSON string can be safely encoded to UTF-8 (scan only, no encoded copy)
+        if _is_utf8_safe(json_str):
+            return json_str
     except (UnicodeEncodeError, UnicodeDecodeError):
+        pass
+    try:
+        # Fall back to ASCII encoding for invalid Unicode characters
+        return json.dumps(data, ensure_ascii=True)
+    except Exception:
+        # Final fallback: convert to string representation
         try:
-            # Fall back to ASCII encoding for invalid Unicode characters
-            return json.dumps(data, ensure_ascii=True)
+            return json.dumps({"message": str(data)}, ensure_ascii=True)
         except Exception:
-            # Final fallback: convert to string representation
-            try:
-                return json.dumps({"message": str(data)}, ensure_ascii=True)
-            except Exception:
-                # Last resort: return a basic error message
-                return '{"message": "Log formatting error: unable to serialize data"}'
+            # Last resort: return a basic error message
+            return '{"message": "Log formatting error: unable to serialize data"}'
+
+
+def _json_default(value: Any) -> Any:
+    """Fallback for values json cannot encode natively (never fails the log line)."""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+class FormattedLine(str):
+    """A formatted log line plus the side files its oversized fields refer to.
+
+    format() never writes the side files itself: whoever writes the line calls
+    write_spools() first (AsyncBatchedFileHandler does so on its writer thread).
+    """
+
+    spools: Tuple[Tuple[str, str], ...] = ()
+
+
+def write_spools(line: str):
+    """Write the pending side files of a formatted line; failures leave a dangling reference."""
+    for path, text in getattr(line, "spools", ()):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as spool_file:
+                spool_file.write(text)
+        except OSError:
+            pass
+
+
+class LogRecordEncoder:
+    """Single-pass JSON encoder for log lines carrying a LogRecord payload.
+
+    Fields are serialized straight from the LogRecord (no dataclasses.asdict deep copy)
+    and each value is encoded exactly once. A data value whose JSON exceeds
+    max_field_chars is replaced by a reference with a short preview; if spool_dir is
+    set, the reference names a side file for the full JSON, which is returned with the
+    line (FormattedLine.spools) instead of being written during encoding.
+    """
+
+    PREVIEW_CHARS = 1024
+
+    def __init__(self, max_field_chars: int = 64 * 1024, spool_dir: Optional[str] = None,
+                 include_stack_trace: bool = True):
+        self.max_field_chars = max_field_chars
+        self.spool_dir = spool_dir
+        self.include_stack_trace = include_stack_trace
+        self._encoder = json.JSONEncoder(ensure_ascii=False, default=_json_default)
+        self._ascii_encoder = json.JSONEncoder(ensure_ascii=True, default=_json_default)
+
+    def dumps(self, value: Any) -> str:
+        try:
+            text = self._encoder.encode(value)
+        except (TypeError, ValueError):
+            # e.g. circular references
+            value = str(value)
+            text = self._encoder.encode(value)
+        if _is_utf8_safe(text):
+            return text
+        return self._ascii_encoder.encode(value)
+
+    def encode(self, record: logging.LogRecord) -> str:
+        spools: List[Tuple[str, str]] = []
+        parts = [
+            '"timestamp": ' + self.dumps(datetime.fromtimestamp(record.created).isoformat()),
+            '"level": ' + self.dumps(record.levelname),
+            '"logger": ' + self.dumps(record.name),
+        ]
+        log_payload = getattr(record, "log_record", None)
+        if isinstance(log_payload, LogRecord):
+            parts.append('"detail": ' + self._encode_log_record(log_payload, spools))
+        else:
+            parts.append('"message": ' + self._field(record.getMessage(), "message", None, spools))
+            if record.exc_info:
+                exc_type, exc_value, exc_tb = record.exc_info
+                parts.append('"error": ' + self._encode_error(
+                    exc_type.__name__ if exc_type else "UnknownError",
+                    str(exc_value),
+                    "".join(traceback.format_exception(exc_type, exc_value, exc_tb)),
+                    exc_value.args if hasattr(exc_value, "args") else [],
+                ))
+        line = FormattedLine("{" + ", ".join(parts) + "}")
+        line.spools = tuple(spools)
+        return line
+
+    def _encode_log_record(self, log_record: LogRecord, spools: List[Tuple[str, str]]) -> str:
+        request_id = log_record.request_id
+        parts = [
+            '"event": ' + self.dumps(log_record.event),
+            '"message": ' + self._field(log_record.message, "message", request_id, spools),
+            '"request_id": ' + self.dumps(request_id),
+        ]
+        data = log_record.data
+        if isinstance(data, dict):
+            fields = [
+                self.dumps(str(key)) + ": " + self._field(value, str(key), request_id, spools)
+                for key, value in data.items()
+            ]
+            parts.append('"data": {' + ", ".join(fields) + "}")
+        else:
+            parts.append('"data": ' + self._field(data, "data", request_id, spools))
+        error = log_record.error
+        if error is None:
+            parts.append('"error": null')
+        else:
+            parts.append('"error": ' + self._encode_error(error.name, error.message, error.stack_trace, error.args))
+        return "{" + ", ".join(parts) + "}"
+
+    def _encode_error(self, name: str, message: str, stack_trace: Optional[str], args: Any) -> str:
+        parts = ['"name": ' + self.dumps(name), '"message": ' + self.dumps(message)]
+        if self.include_stack_trace:
+            parts.append('"stack_trace": ' + self.dumps(stack_trace))
+        parts.append('"args": ' + self.dumps(args))
+        return "{" + ", ".join(parts) + "}"
+
+    def _field(self, value: Any, name: str, request_id: Optional[str], spools: List[Tuple[str, str]]) -> str:
+        text = self.dumps(value)
+        if self.max_field_chars and len(text) > self.max_field_chars:
+            return self._oversized(text, name, request_id, spools)
+        return text
+
+    def _oversized(self, text: str, name: str, request_id: Optional[str], spools: List[Tuple[str, str]]) -> str:
+        reference: Dict[str, Any] = {"truncated": True, "original_chars": len(text)}
+        if self.spool_dir:
+            filename = "{}-{}-{}-{}.json".format(
+                datetime.now().strftime("%Y%m%dT%H%M%S"),
+                re.sub(r"[^A-Za-z0-9_-]", "_", request_id or "none")[:36],
+                re.sub(r"[^A-Za-z0-9_-]", "_", name)[:32],
+                uuid.uuid4().hex[:8],
+            )
+            path = os.path.join(self.spool_dir, filename)
+            spools.append((path, text))
+            reference["spooled_to"] = path
+        reference["preview"] = text[:self.PREVIEW_CHARS]
+        return self.dumps(reference)
 
 
 def mask_sensitive_string(text: str, mask_char: str = "*") -> str:
@@ -254,46 +404,18 @@ class ColoredConsoleFormatter(logging.Formatter):
 
 
 class JSONFormatter(logging.Formatter):
+    def __init__(self, max_field_chars: int = 64 * 1024, spool_dir: Optional[str] = None,
+                 include_stack_trace: bool = True):
+        super().__init__()
+        self.encoder = LogRecordEncoder(max_field_chars, spool_dir or None, include_stack_trace)
+
     def format(self, record: logging.LogRecord) -> str:
-        header = {
-            "timestamp": datetime.fromtimestamp(
-                record.created
-            ).isoformat(),
-            "level": record.levelname,
-            "logger": record.name,
-        }
-        log_payload = getattr(record, "log_record", None)
-        if isinstance(log_payload, LogRecord):
-            header["detail"] = dataclasses.asdict(log_payload)
-        else:
-            header["message"] = record.getMessage()
-            if record.exc_info:
-                exc_type, exc_value, exc_tb = record.exc_info
-                header["error"] = {
-                    "name": exc_type.__name__ if exc_type else "UnknownError",
-                    "message": str(exc_value),
-                    "stack_trace": "".join(
-                        traceback.format_exception(exc_type, exc_value, exc_tb)
-                    ),
-                    "args": exc_value.args if hasattr(exc_value, "args") else [],
-                }
-        return _safe_json_dumps(header)
+        return self.encoder.encode(record)
 
 
 class ConsoleJSONFormatter(JSONFormatter):
-    def format(self, record: logging.LogRecord) -> str:
-        log_dict = json.loads(super().format(record))
-        if (
-            "detail" in log_dict
-            and "error" in log_dict["detail"]
-            and log_dict["detail"]["error"]
-        ):
-            if "stack_trace" in log_dict["detail"]["error"]:
-                del log_dict["detail"]["error"]["stack_trace"]
-        elif "error" in log_dict and log_dict["error"]:
-            if "stack_trace" in log_dict["error"]:
-                del log_dict["error"]["stack_trace"]
-        return _safe_json_dumps(log_dict)
+    def __init__(self, max_field_chars: int = 64 * 1024, spool_dir: Optional[str] = None):
+        super().__init__(max_field_chars, spool_dir, include_stack_trace=False)
 
 
 class UvicornAccessFormatter(logging.Formatter):
@@ -3,9 +3,10 @@
 import enum
 import logging
 import traceback
-from typing import Optional
+from typing import Callable, Optional, Union
 
-from .formatters import LogError, LogRecord
+from .async_file_handler import AsyncBatchedFileHandler
+from .formatters import LogError, LogRecord, _is_utf8_safe
 
 
 class LogEvent(enum.Enum):
@@ -22,10 +23,20 @@ class LogEvent(enum.Enum):
     PROVIDER_API_ERROR_DETAILS = "provider_api_error_details"
     PROVIDER_LOADED = "provider_loaded"
     PROVIDER_FALLBACK = "provider_fallback"
+    PROVIDER_HEDGE_STARTED = "provider_hedge_started"
+    PROVIDER_HEDGE_WON = "provider_hedge_won"
+    PROVIDER_SATURATED = "provider_saturated"  # Provider达到并发上限，跳过并spill到下一个
+    ALL_PROVIDERS_SATURATED = "all_providers_saturated"
+    PROVIDER_STREAM_ERROR_HELD_BACK = "provider_stream_error_held_back"  # 流式错误在发送给客户端前被拦截，转移到下一个provider
     ALL_PROVIDERS_FAILED = "all_providers_failed"
     PROVIDER_ERROR_BELOW_THRESHOLD = "provider_error_below_threshold"  # Provider错误数未达阈值
     PROVIDER_UNHEALTHY_NO_FAILOVER = "provider_unhealthy_no_failover"  # Provider不健康但无法failover
     GET_PROVIDER_HEADERS_START = "get_provider_headers_start"
+    PROVIDER_CLIENT_CREATED = "provider_client_created"
+    PROVIDER_CLIENTS_PRUNED = "provider_clients_pruned"
+    PROVIDER_CLIENT_CLOSE_FAILED = "provider_client_close_failed"
+    PROVIDER_CONNECTIONS_WARMED = "provider_connections_warmed"
+    PROVIDER_CONNECTION_WARMUP_FAILED = "provider_connection_warmup_failed"
     
     # Streaming events
     SSE_EXTRACTION_COMPLETE = "sse_extraction_complete"
@@ -94,6 +105,11 @@ class LogEvent(enum.Enum):
     REQUEST_CLEANUP = "request_cleanup"
     REQUEST_CLEANUP_SKIP = "request_cleanup_skip"
     STUCK_REQUEST_CLEANUP = "stuck_request_cleanup"
+    RESPONSE_CACHE_HIT = "response_cache_hit"
+    RESPONSE_CACHE_STORED = "response_cache_stored"
+    RESPONSE_CACHE_DISK_ERROR = "response_cache_disk_error"
+    CROSS_WORKER_DUPLICATE_REQUEST = "cross_worker_duplicate_request"
+    CROSS_WORKER_DEDUP_ERROR = "cross_worker_dedup_error"
     
     # Provider health check events
     PROVIDER_UNHEALTHY_NON_STREAM = "provider_unhealthy_non_stream"
@@ -179,6 +195,10 @@ class LogEvent(enum.Enum):
 # Initialize logger - will be set up when module is initialized
 _logger = None
 
+# A LogRecord, or a zero-argument callable building one; the callable is only invoked
+# when the level is enabled, so hot paths pay nothing for records that are filtered out
+LogPayload = Union[LogRecord, Callable[[], LogRecord]]
+
 
 def init_logger(app_name: str = "claude-provider-balancer"):
     """Initialize the logger for this module."""
@@ -186,12 +206,27 @@ def init_logger(app_name: str = "claude-provider-balancer"):
     _logger = logging.getLogger(app_name)
 
 
-def _log(level: int, record: LogRecord, exc: Optional[Exception] = None) -> None:
+def is_enabled(level: int) -> bool:
+    """Return True if a record at this level would be handled.
+
+    Per-chunk loops call this once per stream and skip their debug() calls entirely
+    when it is False.
+    """
+    if _logger is None:
+        init_logger()
+    return _logger.isEnabledFor(level)
+
+
+def _log(level: int, record: LogPayload, exc: Optional[Exception] = None) -> None:
     """Internal logging function."""
     if _logger is None:
         init_logger()
+    if not _logger.isEnabledFor(level):
+        return
     
     try:
+        if callable(record):
+            record = record()
         if exc:
             try:
                 record.error = LogError(
@@ -221,9 +256,7 @@ def _log(level: int, record: LogRecord, exc: Optional[Exception] = None) -> None
 
         # Ensure the message is safe for logging by checking encoding
         safe_message = record.message
-        try:
-            safe_message.encode('utf-8')
-        except (UnicodeEncodeError, UnicodeDecodeError):
+        if not _is_utf8_safe(safe_message):
             # Fallback to ASCII representation for problematic characters
             safe_message = safe_message.encode('ascii', errors='replace').decode('ascii')
         
@@ -237,22 +270,22 @@ def _log(level: int, record: LogRecord, exc: Optional[Exception] = None) -> None
             pass  # Silent failure to prevent infinite recursion
 
 
-def debug(record: LogRecord):
-    """Log a debug message."""
+def debug(record: LogPayload):
+    """Log a debug message (record may be a callable, built only if DEBUG is enabled)."""
     _log(logging.DEBUG, record)
 
 
-def info(record: LogRecord):
+def info(record: LogPayload):
     """Log an info message."""
     _log(logging.INFO, record)
 
 
-def warning(record: LogRecord, exc: Optional[Exception] = None):
+def warning(record: LogPayload, exc: Optional[Exception] = None):
     """Log a warning message."""
     _log(logging.WARNING, record, exc=exc)
 
 
-def error(record: LogRecord, exc: Optional[Exception] = None):
+def error(record: LogPayload, exc: Optional[Exception] = None):
     """Log an error message."""
     try:
         # Note: Console traceback printing is disabled to keep console output clean
@@ -267,36 +300,45 @@ def error(record: LogRecord, exc: Optional[Exception] = None):
             pass  # Silent failure to prevent infinite recursion
 
 
-def critical(record: LogRecord, exc: Optional[Exception] = None):
+def critical(record: LogPayload, exc: Optional[Exception] = None):
     """Log a critical message."""
     _log(logging.CRITICAL, record, exc=exc)
 
 
+_FILE_HANDLER_TYPES = (logging.FileHandler, AsyncBatchedFileHandler)
+
+
+def _get_file_only_logger() -> logging.Logger:
+    """Child logger that writes only to the main logger's file handler.
+
+    The handler list is only rebuilt when the main logger's file handler changes
+    (e.g. after setup_logging), not on every call.
+    """
+    file_logger = logging.getLogger(f"{_logger.name}.file_only")
+    file_logger.propagate = False
+
+    file_handler = None
+    for logger in (_logger, _logger.parent):
+        if logger is None:
+            continue
+        file_handler = next((h for h in logger.handlers if isinstance(h, _FILE_HANDLER_TYPES)), None)
+        if file_handler is not None:
+            break
+
+    if file_logger.handlers != ([file_handler] if file_handler else []):
+        file_logger.handlers.clear()
+        if file_handler is not None:
+            file_logger.addHandler(file_handler)
+    return file_logger
+
+
 def error_file_only(record: LogRecord, exc: Optional[Exception] = None):
     """Log an error message only to file, not to console."""
     try:
         if _logger is None:
             init_logger()
         
-        # Create a copy of the logger with only file handler
-        file_logger = logging.getLogger(f"{_logger.name}.file_only")
-        
-        # Remove all existing handlers to prevent console output
-        file_logger.handlers.clear()
-        file_logger.propagate = False
-        
-        # Add only file handler if it exists in the main logger
-        for handler in _logger.handlers:
-            if isinstance(handler, logging.FileHandler):
-                file_logger.addHandler(handler)
-                break
-        
-        # If no file handler found, try to get it from parent logger
-        if not file_logger.handlers and _logger.parent:
-            for handler in _logger.parent.handlers:
-                if isinstance(handler, logging.FileHandler):
-                    file_logger.addHandler(handler)
-                    break
+        file_logger = _get_file_only_logger()
         
         # Process the log record similar to _log function
         if exc:
@@ -327,9 +369,7 @@ def error_file_only(record: LogRecord, exc: Optional[Exception] = None):
 
         # Ensure the message is safe for logging
         safe_message = record.message
-        try:
-            safe_message.encode('utf-8')
-        except (UnicodeEncodeError, UnicodeDecodeError):
+        if not _is_utf8_safe(safe_message):
             # Fallback to ASCII representation for problematic characters
             safe_message = safe_message.encode('ascii', errors='replace').decode('ascii')
 
@@ -41,6 +41,10 @@ class TestConfigFactory:
                 "enabled": True,
                 "priority": provider_config.priority
             }
+            if provider_config.max_concurrency is not None:
+                provider["max_concurrency"] = provider_config.max_concurrency
+            if provider_config.streaming_mode is not None:
+                provider["streaming_mode"] = provider_config.streaming_mode
             providers.append(provider)
         
         return providers
@@ -55,6 +59,8 @@ class TestConfigFactory:
                 "model": "passthrough",
                 "priority": provider_config.priority
             }
+            if provider_config.hedge_delay is not None:
+                route["hedge_delay"] = provider_config.hedge_delay
             routes.append(route)
         
         return {model_name: routes}
@@ -35,6 +35,9 @@ class MockResponseGenerator:
             case ProviderBehavior.STREAMING_SUCCESS:
                 return MockResponseGenerator._create_streaming_success_response(request_data, provider_config)
             
+            case ProviderBehavior.STREAMING_ERROR_EVENT:
+                return MockResponseGenerator._create_streaming_error_event_response(provider_config)
+            
             case ProviderBehavior.DUPLICATE_CACHE:
                 return MockResponseGenerator._create_deterministic_response(request_data, provider_config)
             
@@ -179,6 +182,24 @@ class MockResponseGenerator:
             headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
         )
     
+    @staticmethod
+    def _create_streaming_error_event_response(provider_config: ProviderConfig) -> StreamingResponse:
+        """Create an HTTP 200 SSE stream whose first events report an error (relay-style failure)."""
+        async def generate_stream():
+            ping = {"type": "ping"}
+            yield f"event: ping\ndata: {json.dumps(ping)}\n\n"
+            error_event = {
+                "type": "error",
+                "error": {"type": "overloaded_error", "message": provider_config.error_message}
+            }
+            yield f"event: error\ndata: {json.dumps(error_event)}\n\n"
+        
+        return StreamingResponse(
+            generate_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
+        )
+    
     @staticmethod
     def _create_deterministic_response(
         request_data: Dict[str, Any], 
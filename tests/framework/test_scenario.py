@@ -11,6 +11,7 @@ class ProviderBehavior(Enum):
     """Provider behavior types for testing."""
     SUCCESS = "success"
     STREAMING_SUCCESS = "streaming_success"
+    STREAMING_ERROR_EVENT = "streaming_error_event"  # HTTP 200, but the SSE stream starts with an error event
     ERROR = "error"
     TIMEOUT = "timeout"
     RATE_LIMIT = "rate_limit"
@@ -44,6 +45,9 @@ class ProviderConfig:
     error_http_code: int = 500  # HTTP status code for error responses
     error_message: str = "Mock provider error"
     provider_type: str = "anthropic"  # Provider type: anthropic or openai
+    hedge_delay: Optional[Any] = None  # Route hedge_delay (seconds or "auto") when this provider is primary
+    max_concurrency: Optional[int] = None  # Provider max_concurrency (local admission limit)
+    streaming_mode: Optional[str] = None  # Provider streaming_mode: auto, direct or background
     
     def __post_init__(self):
         """Convert string behavior to enum if needed."""
@@ -0,0 +1,126 @@
+"""
+Tests for the queue-based JSONL file handler.
+
+Covers:
+- Records are written by the background thread and flushed on close
+- Size-based rotation keeps backup_count old files
+- Spooled side files are written by the writer thread, not by emit()
+- A full queue drops records without blocking and reports the drop count
+- error_file_only reuses its file-only logger instead of rebuilding it
+"""
+
+import json
+import logging
+import threading
+
+from utils.logging import async_file_handler, handlers
+from utils.logging import AsyncBatchedFileHandler, JSONFormatter, LogRecord, LogEvent
+
+
+def _record(message):
+    record = logging.LogRecord("test", logging.INFO, __file__, 0, message, None, None)
+    record.log_record = LogRecord(LogEvent.REQUEST_START.value, message)
+    return record
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class TestAsyncBatchedFileHandler:
+    def test_writes_records_in_order(self, tmp_path):
+        log_file = tmp_path / "logs" / "app.jsonl"
+        handler = AsyncBatchedFileHandler(str(log_file), batch_size=4, flush_interval=0.01)
+        handler.setFormatter(JSONFormatter())
+        for i in range(10):
+            handler.handle(_record(f"message {i}"))
+        handler.close()
+
+        assert [line["detail"]["message"] for line in _lines(log_file)] == [f"message {i}" for i in range(10)]
+        assert handler.stats()["written"] == 10 and handler.stats()["dropped"] == 0
+
+    def test_spool_files_written_by_writer_thread(self, tmp_path, monkeypatch):
+        spool_dir = tmp_path / "spool"
+        writers = []
+        write_spools = async_file_handler.write_spools
+        monkeypatch.setattr(async_file_handler, "write_spools",
+                            lambda line: writers.append(threading.current_thread().name) or write_spools(line))
+        handler = AsyncBatchedFileHandler(str(tmp_path / "app.jsonl"), flush_interval=0.01)
+        handler.setFormatter(JSONFormatter(max_field_chars=100, spool_dir=str(spool_dir)))
+        record = _record("big")
+        record.log_record.data = {"body": "z" * 1000}
+        handler.handle(record)
+        handler.close()
+
+        reference = _lines(tmp_path / "app.jsonl")[0]["detail"]["data"]["body"]
+        with open(reference["spooled_to"], encoding="utf-8") as spool_file:
+            assert json.loads(spool_file.read()) == "z" * 1000
+        assert set(writers) == {"log-file-writer"}
+
+    def test_size_based_rotation(self, tmp_path):
+        log_file = tmp_path / "app.jsonl"
+        handler = AsyncBatchedFileHandler(str(log_file), max_bytes=200, backup_count=2, batch_size=1)
+        handler.setFormatter(JSONFormatter())
+        for i in range(20):
+            handler.handle(_record(f"message {i}"))
+            handler.flush()
+        handler.close()
+
+        assert handler.rotations > 0
+        assert (tmp_path / "app.jsonl.1").exists() and (tmp_path / "app.jsonl.2").exists()
+        assert not (tmp_path / "app.jsonl.3").exists()
+        assert _lines(log_file)[-1]["detail"]["message"] == "message 19"
+
+    def test_full_queue_drops_and_reports(self, tmp_path):
+        log_file = tmp_path / "app.jsonl"
+        handler = AsyncBatchedFileHandler(str(log_file), queue_size=2, batch_size=1)
+        handler.setFormatter(JSONFormatter())
+
+        # Stall the writer on its first batch, as a slow disk would
+        write_batch = handler._write_batch
+        writing = threading.Event()
+        release = threading.Event()
+
+        def slow_write(batch):
+            writing.set()
+            release.wait()
+            write_batch(batch)
+
+        handler._write_batch = slow_write
+        handler.handle(_record("first"))
+        assert writing.wait(timeout=2)
+        for i in range(5):
+            handler.handle(_record(f"queued {i}"))
+
+        assert handler.dropped == 3
+        release.set()
+        handler.close()
+
+        lines = _lines(log_file)
+        messages = [line["detail"]["message"] for line in lines if line["detail"]["event"] != "log_records_dropped"]
+        assert messages == ["first", "queued 0", "queued 1"]
+        drop_report = next(line for line in lines if line["detail"]["event"] == "log_records_dropped")
+        assert drop_report["detail"]["data"]["dropped_since_last_report"] == 3
+
+
+class TestErrorFileOnly:
+    def test_file_only_logger_is_reused(self, tmp_path):
+        handlers.init_logger("file-only-test")
+        logger = logging.getLogger("file-only-test")
+        file_handler = AsyncBatchedFileHandler(str(tmp_path / "app.jsonl"))
+        file_handler.setFormatter(JSONFormatter())
+        logger.addHandler(file_handler)
+        try:
+            handlers.error_file_only(LogRecord(LogEvent.REQUEST_FAILURE.value, "first"))
+            file_logger = logging.getLogger("file-only-test.file_only")
+            handlers_before = list(file_logger.handlers)
+            handlers.error_file_only(LogRecord(LogEvent.REQUEST_FAILURE.value, "second"))
+
+            assert file_logger.handlers == handlers_before == [file_handler]
+            file_handler.flush()
+            assert [line["detail"]["message"] for line in _lines(tmp_path / "app.jsonl")] == ["first", "second"]
+        finally:
+            logger.removeHandler(file_handler)
+            logging.getLogger("file-only-test.file_only").handlers.clear()
+            file_handler.close()
+            handlers.init_logger()
@@ -124,6 +124,8 @@ class TestAuthentication:
             # Configure mock properly
             mock_instance = MagicMock()
             mock_instance.get_status.return_value = {"providers": [], "enabled_count": 0}
+            mock_instance.get_response_cache_settings.return_value = {}
+            mock_instance.settings = {}
             mock_pm.return_value = mock_instance
             
             app = create_app('test-config.yaml', 'test')
@@ -169,6 +171,8 @@ class TestAuthentication:
             # Configure mock properly  
             mock_instance = MagicMock()
             mock_instance.get_status.return_value = {"providers": [], "enabled_count": 0}
+            mock_instance.get_response_cache_settings.return_value = {}
+            mock_instance.settings = {}
             mock_pm.return_value = mock_instance
             
             app = create_app('test-config.yaml', 'test')
@@ -217,6 +221,8 @@ class TestAuthentication:
             # Configure mock properly
             mock_instance = MagicMock()
             mock_instance.get_status.return_value = {"providers": [], "enabled_count": 0}
+            mock_instance.get_response_cache_settings.return_value = {}
+            mock_instance.settings = {}
             mock_pm.return_value = mock_instance
             
             app = create_app('test-config.yaml', 'test')
@@ -0,0 +1,107 @@
+"""
+Tests for StreamingMode.BACKGROUND.
+
+Covers:
+- The upstream is drained and released at provider speed while the client lags
+- Buffered bytes stay within max_buffer_bytes
+- Upstream errors surface after the chunks read before them; early stop cancels the drain
+- End-to-end streaming through a provider configured with streaming_mode: background
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from framework import Scenario, ProviderConfig, ProviderBehavior, Environment
+from core.streaming import BackgroundStreamReader
+
+
+async def _upstream(chunks, events, error=None):
+    try:
+        for chunk in chunks:
+            yield chunk
+        if error is not None:
+            raise error
+    finally:
+        events.append("upstream_closed")
+
+
+class TestBackgroundStreamReader:
+    @pytest.mark.asyncio
+    async def test_upstream_released_before_slow_client_finishes(self):
+        events = []
+        closed = []
+
+        async def close():
+            closed.append(True)
+
+        reader = BackgroundStreamReader(_upstream([b"a" * 10] * 5, events), 1024, close=close)
+        reader.add_done_callback(lambda: events.append("done_callback"))
+
+        received = []
+        async for chunk in reader.chunks():
+            if not received:
+                # Slow client: by the time it reads again the provider has finished
+                await asyncio.sleep(0.05)
+                assert reader.finished
+                assert closed and events == ["upstream_closed", "done_callback"]
+            received.append(chunk)
+
+        assert received == [b"a" * 10] * 5
+        assert reader.buffered_bytes == 0
+
+    @pytest.mark.asyncio
+    async def test_buffer_is_bounded(self):
+        events = []
+        reader = BackgroundStreamReader(_upstream([b"x" * 100] * 50, events), 300)
+        chunks = reader.chunks()
+        await chunks.__anext__()
+        await asyncio.sleep(0.05)
+
+        # The drain pauses once max_buffer_bytes are waiting for the client
+        assert not reader.finished
+        assert reader.buffered_bytes <= 300
+        await chunks.aclose()
+        assert events == ["upstream_closed"]
+
+    @pytest.mark.asyncio
+    async def test_error_after_buffered_chunks(self):
+        events = []
+        reader = BackgroundStreamReader(_upstream([b"1", b"2"], events, RuntimeError("reset")), 1024)
+        received = []
+        with pytest.raises(RuntimeError, match="reset"):
+            async for chunk in reader.chunks():
+                received.append(chunk)
+        assert received == [b"1", b"2"]
+
+
+class TestBackgroundStreamingMode:
+    @pytest.mark.asyncio
+    async def test_background_mode_end_to_end(self):
+        content = " ".join(f"word{i}" for i in range(50))
+        scenario = Scenario(
+            name="background_streaming",
+            providers=[
+                ProviderConfig(
+                    "background_provider", ProviderBehavior.STREAMING_SUCCESS,
+                    streaming_mode="background", response_data={"content": content}
+                )
+            ],
+            settings_override={"background_streaming": {"max_buffer_bytes": 512}},
+        )
+
+        async with Environment(scenario) as env:
+            request_data = {
+                "model": env.model_name,
+                "max_tokens": 100,
+                "stream": True,
+                "messages": [{"role": "user", "content": "Test background streaming"}],
+            }
+            async with httpx.AsyncClient() as client:
+                response = await client.post(f"{env.balancer_url}/v1/messages", json=request_data, timeout=30.0)
+
+            assert response.status_code == 200
+            assert response.headers["x-provider-used"] == "background_provider"
+            assert "word49" in response.text
+            assert "message_stop" in response.text
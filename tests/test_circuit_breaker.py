@@ -0,0 +1,145 @@
+"""
+Tests for the provider circuit breaker.
+
+Covers:
+- closed/open/half-open transitions and exponential cooldown growth
+- Half-open admits only a limited number of trial requests
+- The unhealthy_reset_timeout error-count reset never closes an open breaker
+- Slow start after recovery and breaker state on /providers
+"""
+
+import random
+import time
+
+import pytest
+import yaml
+
+from framework import Scenario, ProviderConfig, ProviderBehavior, TestConfigFactory
+from core.provider_manager import ProviderManager
+from core.provider_manager.breaker import CircuitBreaker, BreakerPolicy, BreakerState
+
+
+MODEL = "breaker-model"
+
+
+def _manager(tmp_path, **settings_override) -> ProviderManager:
+    scenario = Scenario(
+        name="circuit_breaker",
+        model_name=MODEL,
+        providers=[
+            ProviderConfig("breaker_a", ProviderBehavior.SUCCESS, priority=1),
+            ProviderConfig("breaker_b", ProviderBehavior.SUCCESS, priority=2),
+        ],
+    )
+    config = TestConfigFactory().create_config(scenario)
+    config["settings"].update({"failure_cooldown": 10, "unhealthy_threshold": 1})
+    config["settings"].update(settings_override)
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.dump(config), encoding="utf-8")
+    return ProviderManager(str(config_path))
+
+
+def _names(options):
+    return [provider.name for _, provider in options]
+
+
+class TestCircuitBreaker:
+    def test_transitions_and_backoff(self):
+        breaker = CircuitBreaker(BreakerPolicy(base_cooldown=10, backoff_multiplier=2, max_cooldown=25))
+        assert breaker.get_state(100) == BreakerState.CLOSED
+
+        assert breaker.trip(100)
+        assert not breaker.trip(105)  # already open, not counted again
+        assert breaker.get_state(105) == BreakerState.OPEN
+        assert breaker.get_state(110) == BreakerState.HALF_OPEN
+
+        # Failed trial: cooldown doubles, then caps at max_cooldown
+        assert breaker.trip(110)
+        assert breaker.cooldown == 20
+        assert breaker.get_state(129) == BreakerState.OPEN
+        assert breaker.trip(130)
+        assert breaker.cooldown == 25
+
+        breaker.record_success(160)
+        assert breaker.get_state(160) == BreakerState.CLOSED
+        assert breaker.trips == 0
+
+    def test_slow_start_weight(self):
+        breaker = CircuitBreaker(BreakerPolicy(base_cooldown=10, slow_start_duration=20))
+        assert breaker.slow_start_weight(0) == 1.0
+
+        breaker.trip(100)
+        breaker.record_success(110)
+        assert breaker.slow_start_weight(110) == 0.0
+        assert breaker.slow_start_weight(120) == 0.5
+        assert breaker.slow_start_weight(140) == 1.0
+
+        breaker.reset()
+        assert breaker.slow_start_weight(110) == 1.0
+
+
+class TestBreakerInManager:
+    def test_error_opens_and_half_open_limits_trials(self, tmp_path):
+        manager = _manager(tmp_path, circuit_breaker={"half_open_max_requests": 1})
+        provider = manager.get_provider_by_name("breaker_a")
+
+        assert manager.record_health_check_result("breaker_a", True, "test")
+        assert provider.breaker.state == BreakerState.OPEN
+        assert _names(manager.select_model_and_provider_options(MODEL)) == ["breaker_b"]
+
+        # Cooldown elapsed: one trial request is admitted, the next spills over
+        provider.breaker.opened_at = time.time() - 11
+        assert provider.breaker.state == BreakerState.HALF_OPEN
+        trial = manager.try_begin_provider_request(provider, False)
+        assert trial is not None
+        assert manager.try_begin_provider_request(provider, False) is None
+
+        # A failed trial reopens immediately with a longer cooldown
+        assert manager.record_health_check_result("breaker_a", True, "test")
+        trial.release()
+        assert provider.breaker.state == BreakerState.OPEN
+        assert provider.breaker.cooldown == 20
+
+    def test_trial_success_closes_with_slow_start(self, tmp_path):
+        manager = _manager(tmp_path, circuit_breaker={"slow_start_duration": 60})
+        provider = manager.get_provider_by_name("breaker_a")
+        manager.record_health_check_result("breaker_a", True, "test")
+        provider.breaker.opened_at = time.time() - 11
+
+        assert not manager.record_health_check_result("breaker_a", False)
+        assert provider.breaker.state == BreakerState.CLOSED
+        # Freshly recovered provider is mostly kept behind the other option
+        random.seed(3)
+        first = [_names(manager.select_model_and_provider_options(MODEL))[0] for _ in range(50)]
+        assert first.count("breaker_b") > 40
+
+        status = next(p for p in manager.get_status()["providers"] if p["name"] == "breaker_a")
+        assert status["circuit"]["state"] == "closed"
+        assert status["circuit"]["slow_start_weight"] < 1.0
+
+    def test_timeout_reset_keeps_backoff_cooldown(self, tmp_path):
+        manager = _manager(tmp_path, failure_cooldown=200, unhealthy_reset_timeout=300)
+        provider = manager.get_provider_by_name("breaker_a")
+        manager.record_health_check_result("breaker_a", True, "test")
+        provider.breaker.opened_at = time.time() - 201
+        manager.record_health_check_result("breaker_a", True, "test")
+        assert provider.breaker.trips == 2 and provider.breaker.cooldown == 400
+
+        # Errors are older than unhealthy_reset_timeout, the second cooldown is not over
+        provider.breaker.opened_at = time.time() - 350
+        provider.last_failure_time = time.time() - 350
+        manager.check_and_reset_timeout_errors()
+        assert provider.failure_count == 0
+        assert provider.breaker.state == BreakerState.OPEN
+        assert provider.breaker.trips == 2
+        assert _names(manager.select_model_and_provider_options(MODEL)) == ["breaker_b"]
+
+    def test_status_shows_open_circuit(self, tmp_path):
+        manager = _manager(tmp_path)
+        manager.record_health_check_result("breaker_a", True, "test")
+
+        status = next(p for p in manager.get_status()["providers"] if p["name"] == "breaker_a")
+        assert status["healthy"] is False
+        assert status["circuit"]["state"] == "open"
+        assert status["circuit"]["trips"] == 1
+        assert status["circuit"]["retry_at"] > time.time()
@@ -0,0 +1,267 @@
+"""
+Tests for pooled upstream HTTP clients.
+
+Verifies that provider clients are created lazily, reused across requests,
+and pruned when the provider configuration changes. Pruned clients are closed
+only after their in-flight requests finish.
+"""
+
+import asyncio
+import time
+
+import pytest
+import yaml
+
+from framework import Scenario, ProviderConfig, ProviderBehavior, TestConfigFactory
+from core.provider_manager import ProviderClientPool, ProviderManager, warmer
+
+
+def _write_config(tmp_path, scenario: Scenario, **settings_override) -> str:
+    """Write a generated test configuration to disk and return its path."""
+    config = TestConfigFactory().create_config(scenario)
+    config["settings"].update(settings_override)
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.dump(config), encoding="utf-8")
+    return str(config_path)
+
+
+def _set_proxy(config_path: str, proxy: str):
+    """Point the first provider of a written configuration at a proxy."""
+    config = yaml.safe_load(open(config_path, encoding="utf-8"))
+    config["providers"][0]["proxy"] = proxy
+    with open(config_path, "w", encoding="utf-8") as f:
+        yaml.dump(config, f)
+
+
+def _scenario() -> Scenario:
+    return Scenario(
+        name="connection_pooling",
+        providers=[
+            ProviderConfig("pool_primary", ProviderBehavior.SUCCESS, priority=1),
+            ProviderConfig("pool_secondary", ProviderBehavior.SUCCESS, priority=2),
+        ],
+    )
+
+
+class TestConnectionPooling:
+    """Tests for ProviderClientPool behaviour."""
+
+    @pytest.mark.asyncio
+    async def test_client_reused_per_provider_and_profile(self, tmp_path):
+        """Same provider and request type share one client; streaming gets its own."""
+        manager = ProviderManager(_write_config(tmp_path, _scenario()))
+        primary, secondary = manager.providers
+
+        client_a = manager.get_http_client(primary, False)
+        client_b = manager.get_http_client(primary, False)
+        streaming_client = manager.get_http_client(primary, True)
+        other_client = manager.get_http_client(secondary, False)
+
+        assert client_a is client_b
+        assert streaming_client is not client_a
+        assert other_client is not client_a
+        assert len(manager.client_pool) == 3
+
+        await manager.client_pool.aclose()
+        assert client_a.is_closed
+        assert len(manager.client_pool) == 0
+
+    @pytest.mark.asyncio
+    async def test_pool_limits_from_settings(self, tmp_path):
+        """connection_pool settings are applied to newly created clients."""
+        config_path = _write_config(
+            tmp_path, _scenario(),
+            connection_pool={"max_connections": 7, "max_keepalive_connections": 3, "keepalive_expiry": 12}
+        )
+        manager = ProviderManager(config_path)
+
+        assert manager.client_pool.max_connections == 7
+        assert manager.client_pool.max_keepalive_connections == 3
+        assert manager.client_pool.keepalive_expiry == 12
+        await manager.client_pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_reload_prunes_changed_providers(self, tmp_path):
+        """Reloading with a new proxy for one provider drops only that provider's clients."""
+        config_path = _write_config(tmp_path, _scenario())
+        manager = ProviderManager(config_path)
+        primary, secondary = manager.providers
+        primary_client = manager.get_http_client(primary, False)
+        secondary_client = manager.get_http_client(secondary, False)
+
+        config = yaml.safe_load(open(config_path, encoding="utf-8"))
+        config["providers"][0]["proxy"] = "http://127.0.0.1:3128"
+        with open(config_path, "w", encoding="utf-8") as f:
+            yaml.dump(config, f)
+        manager.reload_config()
+
+        new_primary, new_secondary = manager.providers
+        assert manager.get_http_client(new_secondary, False) is secondary_client
+        assert manager.get_http_client(new_primary, False) is not primary_client
+        await manager.client_pool.aclose()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("proxied", [False, True])
+    async def test_retired_client_closes_after_in_flight_stream(self, tmp_path, monkeypatch, proxied):
+        """A client retired by a reload keeps serving its open stream and closes once it ends.
+
+        With a proxy, requests go through the client's mounted proxy transport; the test
+        server then acts as the HTTP proxy.
+        """
+        monkeypatch.setattr(ProviderClientPool, "DRAIN_POLL_INTERVAL", 0.01)
+        release = asyncio.Event()
+
+        async def handle(reader, writer):
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n6\r\nfirst\n\r\n")
+            await writer.drain()
+            await release.wait()
+            writer.write(b"6\r\nlast.\n\r\n0\r\n\r\n")
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+        config_path = _write_config(tmp_path, _scenario())
+        if proxied:
+            _set_proxy(config_path, url)
+            url = "http://upstream.invalid/v1/messages"
+        manager = ProviderManager(config_path)
+        old_client = manager.get_http_client(manager.providers[0], True)
+        try:
+            async with old_client.stream("GET", url) as response:
+                chunks = response.aiter_bytes()
+                assert await chunks.__anext__() == b"first\n"
+
+                _set_proxy(config_path, "http://127.0.0.1:3128")
+                manager.reload_config()
+                assert manager.get_http_client(manager.providers[0], True) is not old_client
+
+                await asyncio.sleep(0.05)
+                assert not old_client.is_closed
+                release.set()
+                assert [chunk async for chunk in chunks] == [b"last.\n"]
+
+            for _ in range(100):
+                if not manager.client_pool._close_tasks:
+                    break
+                await asyncio.sleep(0.01)
+            assert old_client.is_closed
+            assert not manager.client_pool._close_tasks
+        finally:
+            release.set()
+            server.close()
+            await manager.client_pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_openai_client_cached_until_credentials_change(self, tmp_path):
+        """OpenAI clients are reused and share the pooled HTTP client until base_url/key change."""
+        scenario = Scenario(
+            name="openai_client_cache",
+            providers=[ProviderConfig("openai_provider", ProviderBehavior.SUCCESS, provider_type="openai")],
+        )
+        config_path = _write_config(tmp_path, scenario)
+        manager = ProviderManager(config_path)
+        provider = manager.providers[0]
+        headers = {"X-Title": "test"}
+
+        client = manager.get_openai_client(provider, False, headers)
+        assert manager.get_openai_client(provider, False, headers) is client
+        assert client._client is manager.get_http_client(provider, False)
+
+        # Reload with unchanged provider settings keeps the cached client
+        manager.reload_config()
+        provider = manager.providers[0]
+        assert manager.get_openai_client(provider, False, headers) is client
+
+        # Changing the key invalidates it
+        config = yaml.safe_load(open(config_path, encoding="utf-8"))
+        config["providers"][0]["auth_value"] = "rotated-key"
+        with open(config_path, "w", encoding="utf-8") as f:
+            yaml.dump(config, f)
+        manager.reload_config()
+        provider = manager.providers[0]
+        assert manager.get_openai_client(provider, False, headers) is not client
+        await manager.client_pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_warmer_keeps_idle_connections(self, tmp_path):
+        """Warm-up opens idle connections per client and reports them on the status page."""
+        config_path = _write_config(
+            tmp_path, _scenario(),
+            connection_pool={"prewarm_connections": 2, "prewarm_interval": 60}
+        )
+        manager = ProviderManager(config_path)
+        primary = manager.providers[0]
+
+        status = manager.get_status()["providers"][0]["connection_pool"]
+        assert status["warm"] is False
+        assert status["idle_connections"] == 0
+
+        await manager.connection_warmer.warm_once()
+
+        status = manager.get_status()["providers"][0]["connection_pool"]
+        assert status["warm"] is True
+        assert status["clients"] == 2
+        assert status["idle_connections"] == 4
+        assert status["prewarm_target"] == 2
+        assert status["last_warmed"] > 0
+        assert manager.client_pool.count_idle_connections(manager.get_http_client(primary, True)) == 2
+        await manager.client_pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_warmer_counts_proxied_connections(self, tmp_path, monkeypatch):
+        """Connections of a proxied provider live in the mounted proxy transport and are counted."""
+        async def handle(reader, writer):
+            # Minimal keep-alive HTTP proxy: answer every forwarded request with an empty 200
+            try:
+                while True:
+                    await reader.readuntil(b"\r\n\r\n")
+                    writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n")
+                    await writer.drain()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        config_path = _write_config(
+            tmp_path, _scenario(),
+            connection_pool={"prewarm_connections": 2, "prewarm_interval": 60}
+        )
+        _set_proxy(config_path, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}")
+        manager = ProviderManager(config_path)
+        warmed = []
+        monkeypatch.setattr(warmer, "debug", lambda record: warmed.append(record.data))
+        try:
+            await manager.connection_warmer.warm_provider(manager.providers[0])
+
+            assert warmed[0]["failures"] == 0 and warmed[0]["opened"] == 4
+            status = manager.get_status()["providers"][0]["connection_pool"]
+            assert status["warm"] is True
+            assert status["idle_connections"] == 4
+        finally:
+            await manager.client_pool.aclose()
+            server.close()
+
+    @pytest.mark.asyncio
+    async def test_warmer_skips_unhealthy_and_rewarms_on_recovery(self, tmp_path):
+        """Providers in cooldown are not warmed; they are warmed as soon as cooldown ends."""
+        config_path = _write_config(
+            tmp_path, _scenario(),
+            connection_pool={"prewarm_connections": 1, "prewarm_interval": 3600},
+            failure_cooldown=60
+        )
+        manager = ProviderManager(config_path)
+        warmer = manager.connection_warmer
+        primary, secondary = manager.providers
+
+        primary.last_unhealthy_time = time.time()
+        await warmer.warm_once()
+        assert primary.name not in warmer.last_warmed
+        secondary_warmed = warmer.last_warmed[secondary.name]
+
+        # Cooldown elapsed: warmed immediately even though the refresh interval has not passed
+        primary.last_unhealthy_time = time.time() - 120
+        await warmer.warm_once()
+        assert warmer.last_warmed[primary.name] > 0
+        assert warmer.last_warmed[secondary.name] == secondary_warmed
+        await manager.client_pool.aclose()
@@ -0,0 +1,196 @@
+"""
+Tests for cross-worker request deduplication.
+
+Each WorkerCoordinator instance stands in for one uvicorn worker; they share one
+SQLite file exactly like separate processes would. One test runs the leader in a
+real child process.
+
+Covers:
+- The first worker to claim a signature leads, the others see a remote leader
+- Followers on another worker stream the leader's chunks live, or get its final result
+- A leader whose process has exited is taken over, and its followers get an error event
+- The dedup layer publishes the leader's stream and result to other workers
+- Only an explicit enabled: true with a string path turns the layer on
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+from unittest.mock import MagicMock
+
+import pytest
+
+from caching import deduplication
+from caching.coordination import WorkerCoordinator
+from caching.deduplication import (
+    complete_and_cleanup_request, cross_worker_publisher, handle_duplicate_request
+)
+
+MESSAGE = {"id": "msg_1", "type": "message", "role": "assistant", "content": [{"type": "text", "text": "Hi"}]}
+CHUNKS = [
+    b'event: message_start\ndata: {"type":"message_start","message":{"id":"msg_1"}}\n\n',
+    b'event: content_block_delta\ndata: {"type":"content_block_delta","index":0,"delta":{"type":"text_delta","text":"Hi"}}\n\n',
+    b'event: message_stop\ndata: {"type":"message_stop"}\n\n',
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "dedup.sqlite3")
+
+
+@pytest.fixture
+def workers(db_path):
+    created = []
+
+    def make(**kwargs):
+        coordinator = WorkerCoordinator(db_path, poll_interval=0.01, **kwargs)
+        created.append(coordinator)
+        return coordinator
+
+    yield make
+    for coordinator in created:
+        coordinator.close()
+
+
+@pytest.fixture
+def dedup_worker(workers, monkeypatch):
+    """Install a coordinator as this process's cross-worker layer."""
+    monkeypatch.setattr(deduplication, "_provider_manager", None)
+    deduplication.clear_all_cache()
+    coordinator = workers()
+    deduplication._coordinator = coordinator
+    yield coordinator
+    deduplication._coordinator = None
+    deduplication.clear_all_cache()
+
+
+def _exited_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+class TestWorkerCoordinator:
+    @pytest.mark.asyncio
+    async def test_first_claim_leads(self, workers):
+        worker_a, worker_b = workers(), workers()
+        assert await worker_a.claim("sig", "leader", True, 60) is None
+        remote = await worker_b.claim("sig", "follower", True, 60)
+        assert remote.leader_id == "leader" and remote.is_stream
+
+    @pytest.mark.asyncio
+    async def test_follower_streams_leader_chunks_live(self, workers):
+        worker_a, worker_b = workers(), workers()
+        await worker_a.claim("sig", "leader", True, 60)
+        worker_a.publish("leader", CHUNKS[0])
+
+        async def lead():
+            for chunk in CHUNKS[1:]:
+                await asyncio.sleep(0.03)
+                worker_a.publish("leader", chunk)
+            worker_a.finish("leader", object())
+
+        leader_task = asyncio.create_task(lead())
+        received = [chunk async for chunk in worker_b.subscribe("leader", 5)]
+        await leader_task
+        assert received == CHUNKS
+
+    @pytest.mark.asyncio
+    async def test_non_stream_result(self, workers):
+        worker_a, worker_b = workers(), workers()
+        await worker_a.claim("sig", "leader", False, 60)
+        worker_a.finish("leader", MESSAGE)
+        assert await worker_b.wait_result("leader", 5) == MESSAGE
+
+        await worker_a.claim("sig-2", "leader-2", False, 60)
+        worker_a.finish("leader-2", Exception("Provider returned 500"))
+        result = await worker_b.wait_result("leader-2", 5)
+        assert isinstance(result, Exception) and "500" in str(result)
+
+    @pytest.mark.asyncio
+    async def test_dead_leader_is_taken_over(self, workers):
+        dead = workers(pid=_exited_pid())
+        worker_b = workers()
+        await dead.claim("sig", "leader", True, 60)
+        dead.publish("leader", CHUNKS[0])
+        dead.flush()
+
+        received = [chunk async for chunk in worker_b.subscribe("leader", 5)]
+        assert received[0] == CHUNKS[0]
+        assert received[-1].startswith(b"event: error")
+        assert await worker_b.claim("sig", "retry", True, 60) is None
+
+    @pytest.mark.asyncio
+    async def test_leader_in_another_process(self, workers, db_path):
+        script = textwrap.dedent(f"""
+            import time
+            from caching.coordination import WorkerCoordinator
+            worker = WorkerCoordinator({db_path!r}, poll_interval=0.01)
+            import asyncio
+            asyncio.run(worker.claim("sig", "leader", True, 60))
+            for chunk in {CHUNKS!r}:
+                worker.publish("leader", chunk)
+                time.sleep(0.05)
+            worker.finish("leader", object())
+            worker.close()
+        """)
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+        child = subprocess.Popen([sys.executable, "-c", script], env=env)
+        try:
+            worker_b = workers()
+            remote = None
+            for _ in range(500):
+                remote = await worker_b.claim("sig", "follower", True, 60)
+                if remote is not None:
+                    break
+                # Claimed first: give the signature back so the child can lead
+                worker_b.finish("follower", Exception("retry"))
+                worker_b._conn.execute("DELETE FROM leaders")
+                await asyncio.sleep(0.01)
+            assert remote is not None and remote.pid == child.pid
+            received = [chunk async for chunk in worker_b.subscribe(remote.leader_id, 10)]
+            assert b"".join(received) == b"".join(CHUNKS)
+        finally:
+            child.wait(timeout=10)
+
+
+class TestDeduplicationIntegration:
+    def test_configure_requires_explicit_settings(self, db_path):
+        try:
+            deduplication.configure_cross_worker(MagicMock())
+            assert deduplication._coordinator is None
+            deduplication.configure_cross_worker({"enabled": 1, "path": db_path})
+            assert deduplication._coordinator is None
+            deduplication.configure_cross_worker({"enabled": True, "path": db_path})
+            assert deduplication._coordinator.path == db_path
+        finally:
+            deduplication.close_cross_worker()
+
+    @pytest.mark.asyncio
+    async def test_local_leader_publishes_to_other_workers(self, dedup_worker, workers):
+        other = workers()
+        assert await handle_duplicate_request("sig", "leader", True) is None
+        publish = cross_worker_publisher("sig")
+        for chunk in CHUNKS:
+            publish(chunk)
+        complete_and_cleanup_request("sig", [b"".join(CHUNKS).decode()], None, True, "provider-a")
+
+        result = await other.wait_result("leader", 5)
+        assert result == [b"".join(CHUNKS).decode()]
+
+    @pytest.mark.asyncio
+    async def test_request_follows_leader_on_another_worker(self, dedup_worker, workers):
+        other = workers()
+        await other.claim("sig", "remote-leader", False, 60)
+
+        follower = asyncio.create_task(handle_duplicate_request("sig", "follower", False))
+        await asyncio.sleep(0.05)
+        assert not follower.done()
+        other.finish("remote-leader", MESSAGE)
+
+        response = await asyncio.wait_for(follower, 5)
+        assert response == MESSAGE
+        assert "sig" not in deduplication._in_flight
@@ -0,0 +1,82 @@
+"""
+Tests for the per-signature in-flight deduplication state.
+
+Covers:
+- The first request becomes the leader, later ones wait as followers
+- Only the latest follower gets the result, earlier ones are cancelled
+- Delayed cleanup serves late duplicates immediately, then expires via call_later
+- A leader past the deduplication timeout is replaced by the next request
+"""
+
+import asyncio
+
+import pytest
+
+from caching import deduplication
+from caching.deduplication import (
+    complete_and_cleanup_request, complete_and_cleanup_request_delayed, handle_duplicate_request
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    # Use the default timeouts, not a provider manager left behind by other tests
+    monkeypatch.setattr(deduplication, "_provider_manager", None)
+    deduplication.clear_all_cache()
+    yield
+    deduplication.clear_all_cache()
+
+
+async def _join(signature, request_id, is_stream=False):
+    task = asyncio.create_task(handle_duplicate_request(signature, request_id, is_stream))
+    await asyncio.sleep(0)
+    return task
+
+
+class TestInFlightDeduplication:
+    @pytest.mark.asyncio
+    async def test_follower_receives_leader_result(self):
+        assert await handle_duplicate_request("sig-a", "leader") is None
+        follower = await _join("sig-a", "follower")
+        assert list(deduplication._in_flight["sig-a"].followers) == ["follower"]
+
+        complete_and_cleanup_request("sig-a", RuntimeError("provider failed"))
+
+        with pytest.raises(RuntimeError, match="provider failed"):
+            await follower
+        assert "sig-a" not in deduplication._in_flight
+
+    @pytest.mark.asyncio
+    async def test_only_latest_follower_is_served(self):
+        await handle_duplicate_request("sig-b", "leader")
+        earlier = await _join("sig-b", "earlier")
+        latest = await _join("sig-b", "latest")
+
+        complete_and_cleanup_request("sig-b", RuntimeError("result"))
+
+        assert (await earlier).status_code == 409
+        with pytest.raises(RuntimeError, match="result"):
+            await latest
+
+    @pytest.mark.asyncio
+    async def test_delayed_cleanup_serves_late_duplicates(self):
+        await handle_duplicate_request("sig-c", "leader")
+        complete_and_cleanup_request_delayed("sig-c", RuntimeError("sse error"), delay_seconds=0.05)
+
+        # Within the window a duplicate gets the stored result without waiting
+        with pytest.raises(RuntimeError, match="sse error"):
+            await asyncio.wait_for(handle_duplicate_request("sig-c", "late"), timeout=0.5)
+
+        await asyncio.sleep(0.1)
+        assert "sig-c" not in deduplication._in_flight
+        assert await handle_duplicate_request("sig-c", "fresh") is None
+
+    @pytest.mark.asyncio
+    async def test_expired_leader_is_replaced(self):
+        await handle_duplicate_request("sig-d", "stuck_leader")
+        waiting = await _join("sig-d", "waiting")
+        deduplication._in_flight["sig-d"].expires_at = 0
+
+        assert await handle_duplicate_request("sig-d", "new_leader") is None
+        assert deduplication._in_flight["sig-d"].request_id == "new_leader"
+        assert (await waiting).status_code == 409
@@ -0,0 +1,108 @@
+"""
+Tests for the precompiled health pattern matcher.
+
+Covers:
+- Exception / response-body / HTTP code matching and reported reasons
+- Invalid regex fallback to literal matching
+- Same verdicts as per-pattern matching on realistic 1 MB SSE transcripts
+"""
+
+import json
+import random
+import re
+
+from core.provider_manager.health import HealthPatternMatcher, should_mark_unhealthy
+
+
+EXCEPTION_PATTERNS = ["connection", "timeout", "ssl", "network"]
+BODY_PATTERNS = [
+    '"error"\\s*:\\s*".*insufficient.*credits"',
+    '"error_type"\\s*:\\s*"quota_exceeded"',
+    '"message"\\s*:\\s*".*rate.?limit.*"',
+    '"detail"\\s*:\\s*".*没有可用.*"',
+    '"type"\\s*:\\s*"error"',
+    'data:\\s*\\{"error"',
+    'event:\\s*error',
+]
+
+
+def _matcher() -> HealthPatternMatcher:
+    return HealthPatternMatcher([429, 500], EXCEPTION_PATTERNS, BODY_PATTERNS)
+
+
+def _transcript(size: int, error_event: str = "") -> str:
+    """Anthropic-style SSE transcript of roughly `size` bytes, optionally ending in an error event."""
+    rng = random.Random(42)
+    words = ("the quick brown fox jumps over the lazy dog def return value class import "
+             "handling message type content error").split()
+    parts = [
+        'event: message_start\ndata: {"type":"message_start","message":{"id":"msg_1","type":"message",'
+        '"role":"assistant","content":[],"model":"claude"}}\n\n'
+    ]
+    length = len(parts[0])
+    while length < size:
+        text = " ".join(rng.choice(words) for _ in range(8))
+        event = "event: content_block_delta\ndata: " + json.dumps(
+            {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text}}
+        ) + "\n\n"
+        parts.append(event)
+        length += len(event)
+    parts.append(error_event)
+    return "".join(parts)
+
+
+def _legacy_body_match(content: str):
+    """The previous implementation: compile and search every pattern on each call."""
+    for pattern in BODY_PATTERNS:
+        if re.search(pattern, content, re.IGNORECASE):
+            return f"response_body_pattern_{pattern}"
+    return None
+
+
+class TestHealthPatternMatcher:
+    def test_exception_patterns(self):
+        matcher = _matcher()
+        assert matcher.match_exception("Read TIMEOUT while waiting") == "timeout"
+        assert matcher.match_exception("invalid api key") is None
+        assert should_mark_unhealthy(
+            error_message="SSL handshake failed", matcher=matcher
+        ) == (True, "exception_pattern_ssl")
+
+    def test_response_body_and_http_codes(self):
+        matcher = _matcher()
+        body = '{"type": "error", "error": {"message": "overloaded"}}'
+        assert should_mark_unhealthy(
+            error_message=body, source_type="response_body", matcher=matcher
+        ) == (True, 'response_body_pattern_"type"\\s*:\\s*"error"')
+        assert should_mark_unhealthy(
+            http_status_code=429, source_type="response_body", matcher=matcher
+        ) == (True, "http_status_429")
+        assert should_mark_unhealthy(
+            error_message='{"type": "message"}', source_type="response_body", matcher=matcher
+        ) == (False, "healthy")
+
+    def test_invalid_regex_falls_back_to_literal(self):
+        matcher = HealthPatternMatcher(unhealthy_response_body_patterns=["quota (exceeded"])
+        assert matcher.match_response_body("QUOTA (EXCEEDED today") == "response_body_pattern_quota (exceeded_fallback"
+
+    def test_case_sensitive_escapes_keep_ignorecase(self):
+        matcher = HealthPatternMatcher(unhealthy_response_body_patterns=["Quota\\S+Exceeded"])
+        assert matcher.match_response_body("QUOTA_EXCEEDED") is not None
+        assert matcher.match_response_body("quota exceeded") is None
+
+    def test_list_arguments_still_supported(self):
+        assert should_mark_unhealthy(
+            error_message="connection reset", unhealthy_exception_patterns=EXCEPTION_PATTERNS
+        ) == (True, "exception_pattern_connection")
+
+
+class TestLargeTranscripts:
+    def test_1mb_transcripts(self):
+        matcher = _matcher()
+        healthy = _transcript(1_000_000)
+        failed = _transcript(1_000_000, 'event: error\ndata: {"type":"error","error":{"type":"overloaded_error"}}\n\n')
+
+        assert matcher.match_response_body(healthy) is None
+        assert matcher.match_response_body(failed) is not None
+        for content in (healthy, failed):
+            assert matcher.match_response_body(content) == _legacy_body_match(content)
@@ -0,0 +1,160 @@
+"""
+Tests for hedged (speculative) requests across providers.
+
+Covers:
+- A slow primary is raced against the next option after hedge_delay
+- A fast primary never triggers a hedge
+- Adaptive ("auto") hedge delay from observed first-response latency
+"""
+
+import time
+
+import httpx
+import pytest
+import yaml
+
+from framework import (
+    Scenario, ProviderConfig, ProviderBehavior, Environment, TestConfigFactory
+)
+from core.provider_manager import ProviderManager
+
+
+class TestHedgedRequests:
+    """End-to-end hedging through the balancer."""
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged(self):
+        """Non-streaming: hedge to the secondary wins when the primary is slow."""
+        scenario = Scenario(
+            name="hedge_slow_primary",
+            providers=[
+                ProviderConfig(
+                    "hedge_slow_primary", ProviderBehavior.SUCCESS, priority=1,
+                    delay_ms=3000, hedge_delay=0.3,
+                    response_data={"content": "primary response"}
+                ),
+                ProviderConfig(
+                    "hedge_fast_secondary", ProviderBehavior.SUCCESS, priority=2,
+                    response_data={"content": "secondary response"}
+                ),
+            ],
+        )
+
+        async with Environment(scenario) as env:
+            request_data = {
+                "model": env.model_name,
+                "max_tokens": 100,
+                "messages": [{"role": "user", "content": "Test hedged request"}],
+            }
+            started = time.monotonic()
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{env.balancer_url}/v1/messages", json=request_data, timeout=30.0
+                )
+            elapsed = time.monotonic() - started
+
+            assert response.status_code == 200
+            assert response.json()["content"][0]["text"] == "secondary response"
+            assert elapsed < 2.5
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_streaming(self):
+        """Streaming: only the winning hedge's stream reaches the client."""
+        scenario = Scenario(
+            name="hedge_slow_primary_streaming",
+            providers=[
+                ProviderConfig(
+                    "hedge_stream_primary", ProviderBehavior.STREAMING_SUCCESS, priority=1,
+                    delay_ms=3000, hedge_delay=0.3
+                ),
+                ProviderConfig("hedge_stream_secondary", ProviderBehavior.STREAMING_SUCCESS, priority=2),
+            ],
+        )
+
+        async with Environment(scenario) as env:
+            request_data = {
+                "model": env.model_name,
+                "max_tokens": 100,
+                "stream": True,
+                "messages": [{"role": "user", "content": "Test hedged streaming request"}],
+            }
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{env.balancer_url}/v1/messages", json=request_data, timeout=30.0
+                )
+
+            assert response.status_code == 200
+            assert response.headers.get("x-provider-used") == "hedge_stream_secondary"
+            assert response.text.count('"type": "message_start"') == 1
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_not_hedged(self):
+        """A primary that answers within hedge_delay keeps the request."""
+        scenario = Scenario(
+            name="hedge_fast_primary",
+            providers=[
+                ProviderConfig(
+                    "hedge_quick_primary", ProviderBehavior.SUCCESS, priority=1,
+                    hedge_delay=5, response_data={"content": "primary response"}
+                ),
+                ProviderConfig(
+                    "hedge_unused_secondary", ProviderBehavior.SUCCESS, priority=2,
+                    response_data={"content": "secondary response"}
+                ),
+            ],
+        )
+
+        async with Environment(scenario) as env:
+            request_data = {
+                "model": env.model_name,
+                "max_tokens": 100,
+                "messages": [{"role": "user", "content": "Test fast primary"}],
+            }
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{env.balancer_url}/v1/messages", json=request_data, timeout=30.0
+                )
+
+            assert response.status_code == 200
+            assert response.json()["content"][0]["text"] == "primary response"
+
+
+class TestHedgeDelay:
+    """Unit tests for ProviderManager.get_hedge_delay."""
+
+    def _manager(self, tmp_path, hedge_delay, **hedging) -> ProviderManager:
+        scenario = Scenario(
+            name="hedge_delay_config",
+            model_name="hedge-model",
+            providers=[
+                ProviderConfig("delay_primary", ProviderBehavior.SUCCESS, priority=1, hedge_delay=hedge_delay),
+                ProviderConfig("delay_secondary", ProviderBehavior.SUCCESS, priority=2),
+            ],
+        )
+        config = TestConfigFactory().create_config(scenario)
+        config["settings"]["hedging"] = hedging
+        config_path = tmp_path / "config.yaml"
+        config_path.write_text(yaml.dump(config), encoding="utf-8")
+        return ProviderManager(str(config_path))
+
+    def test_fixed_and_disabled_delay(self, tmp_path):
+        manager = self._manager(tmp_path, 2.5)
+        primary, secondary = manager.providers
+        assert manager.get_hedge_delay("hedge-model", primary, True) == 2.5
+        assert manager.get_hedge_delay("hedge-model", secondary, True) is None
+        assert manager.get_hedge_delay("other-model", primary, True) is None
+
+    def test_auto_delay_uses_percentile(self, tmp_path):
+        manager = self._manager(tmp_path, "auto", default_delay=4, min_samples=10, min_delay=0.2)
+        primary = manager.providers[0]
+
+        # Not enough samples yet: default delay
+        for _ in range(5):
+            manager.record_first_response_latency(primary.name, True, 0.5)
+        assert manager.get_hedge_delay("hedge-model", primary, True) == 4
+
+        for i in range(1, 101):
+            manager.record_first_response_latency(primary.name, True, i / 100)
+        assert manager.get_hedge_delay("hedge-model", primary, True) == pytest.approx(0.95)
+        # Streaming and non-streaming latencies are tracked separately
+        assert manager.get_hedge_delay("hedge-model", primary, False) == 4
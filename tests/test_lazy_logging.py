@@ -0,0 +1,68 @@
+"""
+Tests for level-guarded, lazily evaluated logging.
+
+Covers:
+- Callable payloads are not invoked when the level is disabled
+- Callable payloads are built and emitted when the level is enabled
+- is_enabled() follows the logger level
+"""
+
+import logging
+
+import pytest
+
+from utils.logging import handlers
+from utils.logging import LogRecord, LogEvent, debug, info, is_enabled
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def logger():
+    handlers.init_logger("lazy-logging-test")
+    logger = logging.getLogger("lazy-logging-test")
+    capture = _Capture()
+    logger.addHandler(capture)
+    logger.propagate = False
+    yield logger, capture
+    logger.removeHandler(capture)
+    handlers.init_logger()
+
+
+def _record(calls):
+    def build():
+        calls.append(True)
+        return LogRecord(LogEvent.CHUNK_YIELDED_TO_ORIGINAL_CLIENT.value, "chunk", "req-1", {"chunk_size": 10})
+    return build
+
+
+class TestLazyLogging:
+    def test_disabled_level_skips_payload(self, logger):
+        log, capture = logger
+        log.setLevel(logging.INFO)
+        calls = []
+
+        debug(_record(calls))
+
+        assert not is_enabled(logging.DEBUG)
+        assert calls == [] and capture.records == []
+
+    def test_enabled_level_builds_payload(self, logger):
+        log, capture = logger
+        log.setLevel(logging.DEBUG)
+        calls = []
+
+        debug(_record(calls))
+        info(LogRecord(LogEvent.REQUEST_START.value, "plain record"))
+
+        assert is_enabled(logging.DEBUG)
+        assert calls == [True]
+        assert [r.getMessage() for r in capture.records] == ["chunk", "plain record"]
+        assert capture.records[0].log_record.data == {"chunk_size": 10}
@@ -0,0 +1,107 @@
+"""
+Tests for the least_latency selection strategy.
+
+Verifies EWMA bookkeeping, ordering by first-byte latency and output speed,
+and the minimum-sample / exploration policy.
+"""
+
+import pytest
+import yaml
+
+from framework import Scenario, ProviderConfig, ProviderBehavior, TestConfigFactory
+from core.provider_manager import ProviderManager
+from core.provider_manager.latency import LatencyTracker
+
+
+MODEL = "latency-model"
+
+
+def _manager(tmp_path, **least_latency) -> ProviderManager:
+    scenario = Scenario(
+        name="least_latency_strategy",
+        model_name=MODEL,
+        providers=[
+            ProviderConfig("latency_a", ProviderBehavior.SUCCESS, priority=1),
+            ProviderConfig("latency_b", ProviderBehavior.SUCCESS, priority=2),
+            ProviderConfig("latency_c", ProviderBehavior.SUCCESS, priority=3),
+        ],
+    )
+    config = TestConfigFactory().create_config(scenario)
+    config["settings"]["selection_strategy"] = "least_latency"
+    config["settings"]["least_latency"] = {"exploration_rate": 0, "min_samples": 3, **least_latency}
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.dump(config), encoding="utf-8")
+    return ProviderManager(str(config_path))
+
+
+def _names(options):
+    return [provider.name for _, provider in options]
+
+
+def _record(manager, name, ttfb, count=3, is_streaming=True):
+    for _ in range(count):
+        manager.record_first_response_latency(name, is_streaming, ttfb)
+
+
+class TestLatencyTracker:
+    def test_ewma_updates(self):
+        tracker = LatencyTracker(alpha=0.5)
+        tracker.record("p", True, 1.0)
+        tracker.record("p", True, 3.0)
+        assert tracker.ttfb_ewma("p", True) == pytest.approx(2.0)
+        assert tracker.ttfb_ewma("p", False) is None
+
+        tracker.record_throughput("p", 100, 2.0)
+        tracker.record_throughput("p", 0, 2.0)  # ignored
+        tracker.record_throughput("p", 150, 1.0)
+        assert tracker.throughput_ewma("p") == pytest.approx(100.0)
+
+
+class TestLeastLatencyStrategy:
+    def test_cold_start_uses_priority(self, tmp_path):
+        manager = _manager(tmp_path)
+        assert _names(manager.select_model_and_provider_options(MODEL, is_streaming=True)) == [
+            "latency_a", "latency_b", "latency_c"
+        ]
+
+    def test_orders_by_ttfb_and_throughput(self, tmp_path):
+        manager = _manager(tmp_path, reference_output_tokens=500)
+        _record(manager, "latency_a", 2.0)
+        _record(manager, "latency_b", 0.5)
+        _record(manager, "latency_c", 1.0)
+        assert _names(manager.select_model_and_provider_options(MODEL, is_streaming=True)) == [
+            "latency_b", "latency_c", "latency_a"
+        ]
+
+        # A slow generator loses its first-byte advantage on streaming requests
+        manager.record_output_throughput("latency_b", 500, 10.0)   # 50 tok/s -> +10s
+        manager.record_output_throughput("latency_c", 500, 1.0)    # 500 tok/s -> +1s
+        assert _names(manager.select_model_and_provider_options(MODEL, is_streaming=True))[0] == "latency_c"
+
+    def test_undersampled_providers_ranked_last(self, tmp_path):
+        manager = _manager(tmp_path)
+        _record(manager, "latency_a", 5.0)
+        _record(manager, "latency_c", 0.1, count=2)  # below min_samples
+        _record(manager, "latency_b", 1.0)
+        assert _names(manager.select_model_and_provider_options(MODEL, is_streaming=True)) == [
+            "latency_b", "latency_a", "latency_c"
+        ]
+        # Non-streaming statistics are separate: no samples -> priority order
+        assert _names(manager.select_model_and_provider_options(MODEL, is_streaming=False)) == [
+            "latency_a", "latency_b", "latency_c"
+        ]
+
+    def test_exploration_promotes_undersampled_provider(self, tmp_path):
+        manager = _manager(tmp_path, exploration_rate=1.0)
+        _record(manager, "latency_a", 0.1)
+        _record(manager, "latency_b", 0.2)
+        # latency_c has no samples: exploration always puts it first
+        for _ in range(5):
+            assert _names(manager.select_model_and_provider_options(MODEL, is_streaming=True))[0] == "latency_c"
+
+    def test_status_exposes_latency_stats(self, tmp_path):
+        manager = _manager(tmp_path)
+        _record(manager, "latency_a", 0.4)
+        stats = manager.get_status()["providers"][0]["latency"]
+        assert stats["ttfb_streaming_ewma"] == pytest.approx(0.4)
+        assert stats["samples_streaming"] == 3
@@ -0,0 +1,122 @@
+"""
+Tests for per-provider in-flight accounting and the load-aware strategies.
+
+Covers:
+- In-flight / active-stream counters and idempotent ticket release
+- least_outstanding and p2c ordering
+- Counters return to zero after streaming and non-streaming requests
+"""
+
+import random
+
+import httpx
+import pytest
+import yaml
+
+from framework import (
+    Scenario, ProviderConfig, ProviderBehavior, Environment, TestConfigFactory
+)
+from core.provider_manager import ProviderManager
+from core.provider_manager.load import ProviderLoadTracker
+
+
+MODEL = "load-model"
+
+
+def _manager(tmp_path, strategy: str) -> ProviderManager:
+    scenario = Scenario(
+        name="load_aware_strategy",
+        model_name=MODEL,
+        providers=[
+            ProviderConfig("load_a", ProviderBehavior.SUCCESS, priority=1),
+            ProviderConfig("load_b", ProviderBehavior.SUCCESS, priority=2),
+            ProviderConfig("load_c", ProviderBehavior.SUCCESS, priority=3),
+        ],
+    )
+    config = TestConfigFactory().create_config(scenario)
+    config["settings"]["selection_strategy"] = strategy
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.dump(config), encoding="utf-8")
+    return ProviderManager(str(config_path))
+
+
+def _names(options):
+    return [provider.name for _, provider in options]
+
+
+class TestProviderLoadTracker:
+    def test_counts_and_release(self):
+        tracker = ProviderLoadTracker()
+        stream = tracker.start("p", is_streaming=True)
+        request = tracker.start("p", is_streaming=False)
+        assert tracker.in_flight("p") == 2
+        assert tracker.active_streams("p") == 1
+
+        stream.release()
+        stream.release()  # second release is a no-op
+        assert tracker.in_flight("p") == 1
+        assert tracker.active_streams("p") == 0
+
+        request.release()
+        assert tracker.in_flight("p") == 0
+
+
+class TestLoadAwareStrategies:
+    def test_least_outstanding_prefers_idle_provider(self, tmp_path):
+        manager = _manager(tmp_path, "least_outstanding")
+        assert _names(manager.select_model_and_provider_options(MODEL)) == ["load_a", "load_b", "load_c"]
+
+        busy = [manager.begin_provider_request("load_a", True) for _ in range(2)]
+        busy.append(manager.begin_provider_request("load_b", False))
+        assert _names(manager.select_model_and_provider_options(MODEL)) == ["load_c", "load_b", "load_a"]
+
+        for ticket in busy:
+            ticket.release()
+        assert _names(manager.select_model_and_provider_options(MODEL)) == ["load_a", "load_b", "load_c"]
+
+    def test_p2c_picks_less_loaded_of_two(self, tmp_path):
+        manager = _manager(tmp_path, "p2c")
+        manager.begin_provider_request("load_a", True)
+        manager.begin_provider_request("load_a", True)
+        manager.begin_provider_request("load_b", True)
+
+        random.seed(7)
+        first_choices = set()
+        for _ in range(50):
+            names = _names(manager.select_model_and_provider_options(MODEL))
+            # The busiest provider loses every pair it is sampled in
+            assert names[0] != "load_a"
+            # Failover order after the chosen provider stays by priority
+            assert names[1:] == [name for name in ["load_a", "load_b", "load_c"] if name != names[0]]
+            first_choices.add(names[0])
+        assert first_choices == {"load_b", "load_c"}
+
+
+class TestInFlightEndToEnd:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("stream", [True, False])
+    async def test_counters_return_to_zero(self, stream):
+        behavior = ProviderBehavior.STREAMING_SUCCESS if stream else ProviderBehavior.SUCCESS
+        scenario = Scenario(
+            name=f"in_flight_accounting_{'stream' if stream else 'non_stream'}",
+            providers=[ProviderConfig("in_flight_provider", behavior, priority=1)],
+        )
+
+        async with Environment(scenario) as env:
+            request_data = {
+                "model": env.model_name,
+                "max_tokens": 100,
+                "stream": stream,
+                "messages": [{"role": "user", "content": "Test in-flight accounting"}],
+            }
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{env.balancer_url}/v1/messages", json=request_data, timeout=30.0
+                )
+                assert response.status_code == 200
+
+                status = (await client.get(f"{env.balancer_url}/providers")).json()
+
+            provider = next(p for p in status["providers"] if p["name"] == "in_flight_provider")
+            assert provider["in_flight"] == 0
+            assert provider["active_streams"] == 0
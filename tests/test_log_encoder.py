@@ -0,0 +1,79 @@
+"""
+Tests for the single-pass LogRecord JSON encoder.
+
+Covers:
+- Output matches the previous dataclasses.asdict + json.dumps format
+- Oversized data fields are truncated, or spooled to a side file by reference
+- Console output omits stack traces; invalid Unicode falls back to ASCII escapes
+"""
+
+import dataclasses
+import json
+import logging
+
+from utils.logging import ConsoleJSONFormatter, JSONFormatter, LogError, LogRecord, LogEvent
+from utils.logging.formatters import write_spools
+
+
+def _logging_record(payload, level=logging.ERROR):
+    record = logging.LogRecord("balancer", level, __file__, 0, payload.message, None, None)
+    record.log_record = payload
+    return record
+
+
+def _payload(**data):
+    return LogRecord(
+        LogEvent.PROVIDER_REQUEST_ERROR.value, "Provider failed: 上游错误", "req-1", data,
+        LogError("HTTPStatusError", "503", "Traceback ...", ("503",)),
+    )
+
+
+class TestLogRecordEncoder:
+    def test_matches_asdict_format(self):
+        payload = _payload(provider="p1", status_code=503, usage={"input_tokens": 3})
+        record = _logging_record(payload)
+
+        line = JSONFormatter().format(record)
+
+        assert json.loads(line)["detail"] == json.loads(json.dumps(dataclasses.asdict(payload)))
+        assert "上游错误" in line
+
+    def test_oversized_field_is_truncated(self):
+        body = {"messages": [{"role": "user", "content": "x" * 10_000}]}
+        record = _logging_record(_payload(provider="p1", request_details=body))
+
+        detail = json.loads(JSONFormatter(max_field_chars=1000).format(record))["detail"]
+
+        assert detail["data"]["provider"] == "p1"
+        reference = detail["data"]["request_details"]
+        assert reference["truncated"] is True
+        assert reference["original_chars"] > 10_000
+        assert len(reference["preview"]) == 1024
+        assert "spooled_to" not in reference
+
+    def test_oversized_field_is_spooled(self, tmp_path):
+        body = "y" * 5000
+        record = _logging_record(_payload(full_response_body=body))
+
+        line = JSONFormatter(max_field_chars=1000, spool_dir=str(tmp_path / "spool")).format(record)
+
+        # format() only references the side file; writing it is left to the handler's writer
+        reference = json.loads(line)["detail"]["data"]["full_response_body"]
+        assert not (tmp_path / "spool").exists()
+        write_spools(line)
+        with open(reference["spooled_to"], encoding="utf-8") as spool_file:
+            assert json.loads(spool_file.read()) == body
+
+    def test_console_omits_stack_trace(self):
+        detail = json.loads(ConsoleJSONFormatter().format(_logging_record(_payload())))["detail"]
+        assert detail["error"] == {"name": "HTTPStatusError", "message": "503", "args": ["503"]}
+
+    def test_invalid_unicode_falls_back_to_ascii(self):
+        line = JSONFormatter().format(_logging_record(_payload(text="bad \udc80 surrogate")))
+        line.encode("utf-8")
+        assert "\\udc80" in line
+
+    def test_unserializable_values_do_not_fail(self):
+        detail = json.loads(JSONFormatter().format(_logging_record(_payload(value=object(), tags={"a"}))))["detail"]
+        assert detail["data"]["tags"] == ["a"]
+        assert detail["data"]["value"].startswith("<object")
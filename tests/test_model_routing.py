@@ -0,0 +1,105 @@
+"""
+Tests for the precompiled model-route index.
+
+Covers:
+- Exact-before-wildcard matching, case-insensitive patterns and fall-through
+  to the next matching pattern when a route has no healthy provider
+- Memoized resolution invalidated by circuit breaker transitions and reloads
+- Bounded LRU and round-robin state
+"""
+
+import yaml
+
+from framework import Scenario, ProviderConfig, ProviderBehavior, TestConfigFactory
+from core.provider_manager import ProviderManager
+
+
+MODEL_ROUTES = {
+    "claude-exact": [
+        {"provider": "route_a", "model": "exact-model", "priority": 1},
+    ],
+    "*sonnet*": [
+        {"provider": "route_a", "model": "passthrough", "priority": 1},
+        {"provider": "route_b", "model": "passthrough", "priority": 2},
+    ],
+    "*": [
+        {"provider": "route_b", "model": "fallback-model", "priority": 1},
+    ],
+}
+
+
+def _manager(tmp_path, **settings_override) -> ProviderManager:
+    scenario = Scenario(
+        name="model_routing",
+        providers=[
+            ProviderConfig("route_a", ProviderBehavior.SUCCESS, priority=1),
+            ProviderConfig("route_b", ProviderBehavior.SUCCESS, priority=2),
+        ],
+    )
+    config = TestConfigFactory().create_config(scenario)
+    config["model_routes"] = MODEL_ROUTES
+    config["settings"].update({"unhealthy_threshold": 1})
+    config["settings"].update(settings_override)
+    config_path = tmp_path / "config.yaml"
+    # Pattern order matters: keep the declaration order
+    config_path.write_text(yaml.dump(config, sort_keys=False), encoding="utf-8")
+    return ProviderManager(str(config_path))
+
+
+def _options(manager, model):
+    return [(target, provider.name) for target, provider in manager.select_model_and_provider_options(model)]
+
+
+class TestRouteMatching:
+    def test_exact_wildcard_and_case(self, tmp_path):
+        manager = _manager(tmp_path)
+        assert _options(manager, "claude-exact") == [("exact-model", "route_a")]
+        assert _options(manager, "Claude-3-SONNET") == [
+            ("Claude-3-SONNET", "route_a"), ("Claude-3-SONNET", "route_b")
+        ]
+        assert _options(manager, "gpt-4o") == [("fallback-model", "route_b")]
+        assert manager.route_index.match_pattern("claude-exact") == "claude-exact"
+
+    def test_falls_through_when_route_has_no_healthy_provider(self, tmp_path):
+        manager = _manager(tmp_path)
+        manager.record_health_check_result("route_a", True, "test")
+        # claude-exact only routes to route_a, so the wildcard fallback is used
+        assert _options(manager, "claude-exact") == [("fallback-model", "route_b")]
+
+    def test_provider_lookup(self, tmp_path):
+        manager = _manager(tmp_path)
+        assert manager.get_provider_by_name("route_b") is manager.providers[1]
+        assert manager.get_provider_by_name("missing") is None
+
+
+class TestRouteCache:
+    def test_cache_invalidated_on_health_transitions(self, tmp_path):
+        manager = _manager(tmp_path, circuit_breaker={"slow_start_duration": 0})
+        assert _options(manager, "my-sonnet") == [("my-sonnet", "route_a"), ("my-sonnet", "route_b")]
+        cached = manager.route_index.resolve("my-sonnet")[1]
+        assert manager.route_index.resolve("my-sonnet")[1] is cached
+
+        manager.record_health_check_result("route_a", True, "test")
+        assert _options(manager, "my-sonnet") == [("my-sonnet", "route_b")]
+
+        manager.get_provider_by_name("route_a").mark_success()
+        assert _options(manager, "my-sonnet") == [("my-sonnet", "route_a"), ("my-sonnet", "route_b")]
+
+    def test_cache_rebuilt_on_reload(self, tmp_path):
+        manager = _manager(tmp_path)
+        index = manager.route_index
+        manager.select_model_and_provider_options("my-sonnet")
+        manager.reload_config()
+        assert manager.route_index is not index
+        assert _options(manager, "my-sonnet")[0] == ("my-sonnet", "route_a")
+
+    def test_lru_and_round_robin_are_bounded(self, tmp_path):
+        manager = _manager(tmp_path, routing={"cache_size": 4}, selection_strategy="round_robin")
+        firsts = []
+        for i in range(20):
+            firsts.append(manager.select_model_and_provider_options(f"model-{i}-sonnet")[0][1].name)
+
+        assert len(manager.route_index._cache) == 4
+        # Every model matching "*sonnet*" shares one rotation
+        assert len(manager.route_index._round_robin_indices) == 1
+        assert firsts[:4] == ["route_a", "route_b", "route_a", "route_b"]
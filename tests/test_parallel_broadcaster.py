@@ -0,0 +1,87 @@
+"""
+Tests for ParallelBroadcaster fan-out to duplicate subscribers.
+
+Covers:
+- Duplicates receive historical and live chunks without polling delay
+- Clean end-of-stream, including duplicates joining after the stream ended
+- Provider errors are propagated to duplicates as the same terminating events
+"""
+
+import asyncio
+
+import pytest
+
+from core.streaming.parallel_broadcaster import ParallelBroadcaster
+
+
+async def _collect(generator, received):
+    async for chunk in generator:
+        received.append(chunk)
+
+
+class TestDuplicateFanOut:
+    @pytest.mark.asyncio
+    async def test_live_chunks_reach_duplicates_immediately(self):
+        broadcaster = ParallelBroadcaster(None, "original", "provider")
+        release = asyncio.Queue()
+
+        async def provider_stream():
+            while True:
+                chunk = await release.get()
+                if chunk is None:
+                    return
+                yield chunk
+
+        original = []
+        original_task = asyncio.create_task(_collect(broadcaster.stream_from_provider(provider_stream()), original))
+        await release.put(b"first")
+        await asyncio.sleep(0)
+
+        duplicates = [[] for _ in range(20)]
+        tasks = [
+            asyncio.create_task(_collect(broadcaster.add_duplicate_request(None, f"dup-{i}"), received))
+            for i, received in enumerate(duplicates)
+        ]
+        await asyncio.sleep(0)
+        assert all(received == [b"first"] for received in duplicates)
+
+        await release.put(b"second")
+        # Woken by the publish itself: a few scheduler passes, no 10 ms timer
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert all(received == [b"first", b"second"] for received in duplicates)
+
+        await release.put(None)
+        await asyncio.wait_for(asyncio.gather(original_task, *tasks), timeout=1)
+        assert original == [b"first", b"second"]
+        assert not any(client.is_active for client in broadcaster.clients[1:])
+
+        # A duplicate that joins after the end gets the full stream and returns
+        late = []
+        await asyncio.wait_for(_collect(broadcaster.add_duplicate_request(None, "late"), late), timeout=1)
+        assert late == [b"first", b"second"]
+
+    @pytest.mark.asyncio
+    async def test_provider_error_propagates_to_duplicates(self):
+        broadcaster = ParallelBroadcaster(None, "original", "provider")
+        started = asyncio.Event()
+
+        async def provider_stream():
+            yield b"partial"
+            started.set()
+            await asyncio.sleep(0.01)
+            raise ConnectionError("upstream reset")
+
+        original = []
+        original_task = asyncio.create_task(_collect(broadcaster.stream_from_provider(provider_stream()), original))
+        await started.wait()
+        duplicate = []
+        await asyncio.wait_for(_collect(broadcaster.add_duplicate_request(None, "dup"), duplicate), timeout=1)
+        await original_task
+
+        # The shared buffer stores chunks as bytes
+        assert duplicate == [chunk if isinstance(chunk, bytes) else chunk.encode() for chunk in original]
+        assert duplicate[0] == b"partial"
+        assert b"upstream reset" in duplicate[1]
+        assert b"message_stop" in duplicate[-1]
+        assert broadcaster.last_exception_info["error_type"] == "ConnectionError"
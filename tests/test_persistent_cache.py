@@ -0,0 +1,138 @@
+"""
+Tests for the SQLite-backed persistent response cache tier.
+
+Covers:
+- Responses survive closing and reopening the cache file
+- Payloads are stored compressed
+- Expired entries are not served; ttl 0 never expires
+- Eviction of the least recently used entries past max_bytes
+- The memory tier falls back to the persistent tier and promotes hits
+- Only an explicit enabled: true with a string path opens the persistent tier
+"""
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from caching.persistent_cache import PersistentResponseCache
+from caching.response_cache import CachedResponse, ResponseCache
+
+SSE_TEXT = (
+    'event: message_start\ndata: {"type":"message_start","message":{"id":"msg_1","model":"m"}}\n\n'
+    'event: content_block_delta\ndata: {"type":"content_block_delta","index":0,"delta":{"type":"text_delta","text":"Hi"}}\n\n'
+    'event: message_stop\ndata: {"type":"message_stop"}\n\n'
+)
+MESSAGE = {"id": "msg_1", "type": "message", "role": "assistant", "content": [{"type": "text", "text": "Hi 你好"}]}
+
+
+def _entry(content, size=100):
+    return CachedResponse(content, size, time.time() + 60, "provider-a", "req-1")
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "cache" / "responses.sqlite3")
+
+
+class TestPersistentResponseCache:
+    @pytest.mark.asyncio
+    async def test_survives_reopen(self, db_path):
+        cache = PersistentResponseCache(db_path)
+        cache.put("sse", _entry([SSE_TEXT]))
+        cache.put("json", _entry(MESSAGE))
+        cache.close()
+
+        reopened = PersistentResponseCache(db_path)
+        try:
+            sse = await reopened.get("sse")
+            assert sse.content == [SSE_TEXT]
+            assert sse.provider_name == "provider-a" and sse.request_id == "req-1"
+            assert (await reopened.get("json")).content == MESSAGE
+            assert await reopened.get("missing") is None
+        finally:
+            reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_payload_is_compressed(self, db_path):
+        cache = PersistentResponseCache(db_path)
+        try:
+            cache.put("big", _entry([SSE_TEXT * 200]))
+            cache.flush()
+            assert 0 < cache.total_bytes < len(SSE_TEXT * 200) // 10
+        finally:
+            cache.close()
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_not_served(self, db_path):
+        cache = PersistentResponseCache(db_path, ttl=60)
+        try:
+            cache.put("key", _entry(MESSAGE))
+            cache.flush()
+            cache._conn.execute("UPDATE responses SET expires_at = ?", (time.time() - 1,))
+            assert await cache.get("key") is None
+            assert cache.total_bytes == 0
+        finally:
+            cache.close()
+
+    @pytest.mark.asyncio
+    async def test_ttl_zero_never_expires(self, db_path):
+        cache = PersistentResponseCache(db_path, ttl=0)
+        try:
+            cache.put("key", _entry(MESSAGE))
+            entry = await cache.get("key")
+            assert entry.expires_at == float("inf")
+        finally:
+            cache.close()
+
+    def test_evicts_least_recently_used(self, db_path):
+        cache = PersistentResponseCache(db_path, compression_level=0)
+        try:
+            for key in ("a", "b", "c"):
+                cache.put(key, _entry(["x" * 1000 + key]))
+                cache.flush()
+            # Touch "a" so "b" is the least recently used
+            cache._submit(cache._get, "a").result()
+            cache.max_bytes = 2500
+            cache._submit(cache._evict).result()
+            keys = [row[0] for row in cache._conn.execute("SELECT key FROM responses ORDER BY key")]
+            assert keys == ["a", "c"]
+            assert cache.total_bytes <= 2500
+        finally:
+            cache.close()
+
+
+class TestTieredLookup:
+    @pytest.mark.asyncio
+    async def test_memory_miss_falls_back_to_disk(self, db_path):
+        cache = ResponseCache()
+        cache.configure({"enabled": True, "persistent": {"enabled": True, "path": db_path}})
+        try:
+            assert cache.store("key", [SSE_TEXT], "provider-a", "req-1")
+            cache.persistent.flush()
+            cache._entries.clear()
+            cache.total_bytes = 0
+
+            entry = await cache.lookup("key")
+            assert entry.content == [SSE_TEXT]
+            # Promoted back into memory
+            assert cache.get("key") is not None
+        finally:
+            cache.close()
+
+    def test_disabling_closes_the_persistent_tier(self, db_path):
+        cache = ResponseCache()
+        cache.configure({"enabled": True, "persistent": {"enabled": True, "path": db_path}})
+        persistent = cache.persistent
+        cache.configure({"enabled": True, "persistent": {"enabled": False}})
+        assert cache.persistent is None
+        assert persistent._closed
+
+    def test_requires_explicit_enabled_and_string_path(self, db_path):
+        cache = ResponseCache()
+        cache.configure({"enabled": True, "persistent": {"enabled": "yes", "path": db_path}})
+        assert cache.persistent is None
+        cache.configure({"enabled": True, "persistent": {"enabled": True, "path": MagicMock()}})
+        assert cache.persistent is None
+        cache.configure(MagicMock())
+        assert cache.persistent is None
@@ -0,0 +1,82 @@
+"""
+Tests for byte-level request body passthrough to Anthropic providers.
+
+Verifies that client bodies are forwarded unchanged when possible, that the
+model value and balancer-only provider key are spliced without re-serializing,
+and that ambiguous bodies fall back to the parsed request.
+"""
+
+import json
+
+import httpx
+import pytest
+
+from framework import Scenario, ProviderConfig, ProviderBehavior, Environment
+from conversion import build_anthropic_passthrough_body
+
+
+def _body(**fields) -> bytes:
+    return json.dumps(fields, ensure_ascii=False).encode("utf-8")
+
+
+class TestAnthropicPassthroughBody:
+    """Unit tests for build_anthropic_passthrough_body."""
+
+    def test_passthrough_returns_original_bytes(self):
+        raw = _body(model="claude-sonnet", max_tokens=10, messages=[{"role": "user", "content": "你好"}])
+        assert build_anthropic_passthrough_body(raw, "claude-sonnet", "claude-sonnet") is raw
+
+    def test_provider_key_removed(self):
+        for raw in (
+            _body(model="m", provider="p1", messages=[]),
+            _body(model="m", messages=[], provider="p1"),
+            b'{"provider" : "p1" ,\n "model":"m","messages":[]}',
+        ):
+            body = build_anthropic_passthrough_body(raw, "m", "m", "p1")
+            assert json.loads(body) == {"model": "m", "messages": []}
+
+    def test_model_value_spliced(self):
+        raw = b'{"messages":[{"role":"user","content":"say \\"model\\": \\"m\\""}],"model":"caf\\u00e9"}'
+        body = build_anthropic_passthrough_body(raw, "café", "target-model")
+        parsed = json.loads(body)
+        assert parsed["model"] == "target-model"
+        assert parsed["messages"][0]["content"] == 'say "model": "m"'
+
+    def test_ambiguous_keys_fall_back(self):
+        tool_use = {"type": "tool_use", "id": "t1", "name": "cfg", "input": {"model": "m", "provider": "p1"}}
+        raw = _body(model="m", provider="p1", messages=[{"role": "assistant", "content": [tool_use]}])
+        assert build_anthropic_passthrough_body(raw, "m", "other") is None
+        assert build_anthropic_passthrough_body(raw, "m", "m", "p1") is None
+        # Nothing to change: still forwarded as-is
+        assert build_anthropic_passthrough_body(raw, "m", "m") is raw
+
+
+class TestRequestBodyPassthroughEndToEnd:
+    """Requests with a provider field still reach the provider as valid JSON."""
+
+    @pytest.mark.asyncio
+    async def test_provider_field_request_succeeds(self):
+        scenario = Scenario(
+            name="body_passthrough_provider_field",
+            providers=[
+                ProviderConfig("passthrough_primary", ProviderBehavior.STREAMING_SUCCESS, priority=1),
+                ProviderConfig("passthrough_secondary", ProviderBehavior.STREAMING_SUCCESS, priority=2),
+            ],
+        )
+
+        async with Environment(scenario) as env:
+            request_data = {
+                "model": env.model_name,
+                "provider": "passthrough_secondary",
+                "max_tokens": 100,
+                "stream": True,
+                "messages": [{"role": "user", "content": "Test raw body passthrough"}],
+            }
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{env.balancer_url}/v1/messages", json=request_data, timeout=30.0
+                )
+
+            assert response.status_code == 200
+            assert response.headers.get("x-provider-used") == "passthrough_secondary"
+            assert "message_stop" in response.text
@@ -0,0 +1,112 @@
+"""
+Tests for incremental request signatures.
+
+Covers:
+- Equal content gives equal signatures regardless of key order
+- Any change to messages, system, tools or scalar fields changes the signature
+- JSON type distinctions (1 / 1.0 / true) are preserved
+- A growing conversation only serializes the new message
+- The digest cache stays within its entry and byte limits
+"""
+
+import copy
+import json
+
+import pytest
+
+from caching.signature import DigestCache, RequestSignatureEngine
+
+
+def _conversation(turns, text_size=2000):
+    messages = []
+    for index in range(turns):
+        role = "user" if index % 2 == 0 else "assistant"
+        text = (f"turn {index} 中文 \"quoted\"\n\t" * (text_size // 20))[:text_size]
+        messages.append({"role": role, "content": [{"type": "text", "text": text}]})
+    return {
+        "model": "claude-3-5-sonnet",
+        "messages": messages,
+        "system": "You are a helpful assistant.",
+        "tools": [{"name": "read_file", "input_schema": {"type": "object", "properties": {"path": {"type": "string"}}}}],
+        "temperature": 0,
+    }
+
+
+@pytest.fixture
+def engine():
+    return RequestSignatureEngine(DigestCache())
+
+
+class TestSignatureEquality:
+    def test_same_content_same_signature(self, engine):
+        data = _conversation(4)
+        # Round-tripped through JSON: fresh objects, same content
+        assert engine.signature(data) == engine.signature(json.loads(json.dumps(data)))
+        assert engine.signature(data) == RequestSignatureEngine(DigestCache()).signature(data)
+
+    def test_key_order_does_not_matter(self, engine):
+        data = _conversation(2)
+        reordered = copy.deepcopy(data)
+        reordered["messages"][0] = {"content": reordered["messages"][0]["content"], "role": "user"}
+        assert engine.signature(data) == engine.signature(reordered)
+
+    @pytest.mark.parametrize("mutate", [
+        lambda d: d["messages"][1]["content"][0].update(text="changed"),
+        lambda d: d["messages"].pop(),
+        lambda d: d["messages"].reverse(),
+        lambda d: d.update(system="Another system prompt"),
+        lambda d: d["tools"][0].update(name="write_file"),
+        lambda d: d.update(model="claude-3-opus"),
+        lambda d: d.update(temperature=0.5),
+    ])
+    def test_any_change_changes_signature(self, engine, mutate):
+        data = _conversation(4)
+        changed = copy.deepcopy(data)
+        mutate(changed)
+        assert engine.signature(data) != engine.signature(changed)
+
+    def test_json_types_are_distinguished(self, engine):
+        signatures = {
+            engine.signature({"messages": [{"role": "user", "content": value}]})
+            for value in (1, 1.0, True, "1", [1], None)
+        }
+        assert len(signatures) == 6
+
+    def test_lone_surrogates_are_hashed(self, engine):
+        data = json.loads('{"messages": [{"role": "user", "content": "bad \\ud800 text"}]}')
+        assert engine.signature(data) == engine.signature(copy.deepcopy(data))
+
+
+class TestIncrementalHashing:
+    def test_growing_conversation_only_serializes_new_message(self, engine):
+        data = _conversation(300)
+        assert len(json.dumps(data).encode()) > 500 * 1024
+        engine.signature(data)
+        misses = engine.cache.misses
+
+        # Next turn: the client resends the whole history plus one new message
+        next_turn = json.loads(json.dumps(data))
+        next_turn["messages"].append({"role": "user", "content": "one more question"})
+        engine.signature(next_turn)
+
+        assert engine.cache.misses == misses + 1
+        assert engine.cache.hits >= 302  # 300 messages + system + tools
+
+    def test_cache_respects_entry_limit(self):
+        cache = DigestCache(max_entries=3)
+        for index in range(10):
+            cache.digest({"index": index})
+        assert len(cache) == 3
+
+    def test_cache_respects_byte_limit(self):
+        cache = DigestCache(max_bytes=1000)
+        for index in range(10):
+            cache.digest("x" * 300 + str(index))
+        assert cache.total_bytes <= 1000
+        # Values larger than the whole budget are hashed but not retained
+        cache.digest("y" * 5000)
+        assert cache.total_bytes <= 1000
+
+    def test_digest_does_not_depend_on_cache_state(self):
+        value = {"role": "user", "content": "hello"}
+        assert DigestCache().digest(value) == DigestCache(max_entries=0).digest(value)
@@ -0,0 +1,188 @@
+"""
+Tests for the completed-response cache.
+
+Covers:
+- Eligibility: temperature 0 or the x-cache-response opt-in header, only when enabled
+- The cache key includes fields the dedup signature ignores (max_tokens, thinking)
+- Only complete, successful responses are stored
+- TTL expiry, LRU eviction and the byte budget
+- A cached stream is served as JSON to non-streaming clients, and vice versa
+- Tool use and thinking responses are only served to requests of the same mode
+"""
+
+import json
+import time
+
+import pytest
+
+from caching import deduplication
+from caching.deduplication import complete_and_cleanup_request, handle_duplicate_request
+from caching.response_cache import ResponseCache, is_cacheable_request, response_cache, response_cache_key
+
+MESSAGE = {
+    "id": "msg_1",
+    "type": "message",
+    "role": "assistant",
+    "model": "claude-3-5-sonnet",
+    "content": [{"type": "text", "text": "Hello!"}],
+    "stop_reason": "end_turn",
+    "usage": {"input_tokens": 5, "output_tokens": 2},
+}
+
+SSE_TEXT = (
+    'event: message_start\ndata: {"type":"message_start","message":{"id":"msg_1","model":"claude-3-5-sonnet",'
+    '"usage":{"input_tokens":5,"output_tokens":0}}}\n\n'
+    'event: content_block_start\ndata: {"type":"content_block_start","index":0,"content_block":{"type":"text","text":""}}\n\n'
+    'event: content_block_delta\ndata: {"type":"content_block_delta","index":0,"delta":{"type":"text_delta","text":"Hello!"}}\n\n'
+    'event: content_block_stop\ndata: {"type":"content_block_stop","index":0}\n\n'
+    'event: message_delta\ndata: {"type":"message_delta","delta":{"stop_reason":"end_turn"},"usage":{"output_tokens":2}}\n\n'
+    'event: message_stop\ndata: {"type":"message_stop"}\n\n'
+)
+
+TOOL_MESSAGE = {
+    **MESSAGE,
+    "content": [
+        {"type": "thinking", "thinking": "Need the weather.", "signature": "sig"},
+        {"type": "tool_use", "id": "toolu_1", "name": "get_weather", "input": {"city": "Paris"}},
+    ],
+    "stop_reason": "tool_use",
+}
+
+TOOL_SSE_TEXT = (
+    SSE_TEXT.split("event: content_block_start")[0]
+    + 'event: content_block_start\ndata: {"type":"content_block_start","index":0,'
+    '"content_block":{"type":"tool_use","id":"toolu_1","name":"get_weather","input":{}}}\n\n'
+    'event: content_block_delta\ndata: {"type":"content_block_delta","index":0,'
+    '"delta":{"type":"input_json_delta","partial_json":"{\\"city\\": \\"Paris\\"}"}}\n\n'
+    'event: content_block_stop\ndata: {"type":"content_block_stop","index":0}\n\n'
+    'event: message_delta\ndata: {"type":"message_delta","delta":{"stop_reason":"tool_use"},"usage":{"output_tokens":9}}\n\n'
+    'event: message_stop\ndata: {"type":"message_stop"}\n\n'
+)
+
+ENABLED = {"enabled": True}
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    deduplication.clear_all_cache()
+    yield
+    deduplication.clear_all_cache()
+
+
+class TestEligibility:
+    def test_disabled_by_default(self):
+        assert not is_cacheable_request({"temperature": 0}, {}, {})
+
+    def test_temperature_zero_is_cacheable(self):
+        assert is_cacheable_request({"temperature": 0}, {}, ENABLED)
+        assert is_cacheable_request({"temperature": 0.0}, {}, ENABLED)
+
+    def test_default_temperature_is_not_cacheable(self):
+        assert not is_cacheable_request({}, {}, ENABLED)
+        assert not is_cacheable_request({"temperature": 0.7}, {}, ENABLED)
+        assert not is_cacheable_request({"temperature": False}, {}, ENABLED)
+
+    def test_opt_in_header(self):
+        assert is_cacheable_request({"temperature": 1}, {"x-cache-response": "true"}, ENABLED)
+        assert not is_cacheable_request({"temperature": 1}, {"x-cache-response": "no"}, ENABLED)
+
+    def test_cache_key_covers_fields_outside_the_dedup_signature(self):
+        body = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "temperature": 0, "max_tokens": 100}
+        assert response_cache_key(body) == response_cache_key({**body, "stream": True, "provider": "p"})
+        assert response_cache_key(body) != response_cache_key({**body, "max_tokens": 200})
+        assert response_cache_key(body) != response_cache_key({**body, "thinking": {"type": "enabled"}})
+
+
+class TestResponseCache:
+    def test_stores_only_complete_successful_responses(self):
+        cache = ResponseCache()
+        assert cache.store("json", MESSAGE)
+        assert cache.store("sse", [SSE_TEXT])
+        assert not cache.store("error-json", {"type": "error", "error": {"type": "api_error"}})
+        assert not cache.store("incomplete", [SSE_TEXT.split("event: message_stop")[0]])
+        assert not cache.store("sse-error", [SSE_TEXT + 'event: error\ndata: {"type":"error"}\n\n'])
+        assert not cache.store("exception-text", "plain text body")
+        assert sorted(cache._entries) == ["json", "sse"]
+
+    def test_event_names_inside_data_do_not_count(self):
+        cache = ResponseCache()
+        text = SSE_TEXT.replace('"text":"Hello!"', '"text":"event: error"')
+        assert cache.store("sse", [text])
+        truncated = SSE_TEXT.split("event: message_stop")[0] + 'data: {"text":"event: message_stop"}\n\n'
+        assert not cache.store("partial", [truncated])
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(ttl=60)
+        cache.store("key", MESSAGE)
+        cache._entries["key"].expires_at = time.time() - 1
+        assert cache.get("key") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction_by_entries(self):
+        cache = ResponseCache(max_entries=2)
+        cache.store("a", MESSAGE)
+        cache.store("b", MESSAGE)
+        cache.get("a")
+        cache.store("c", MESSAGE)
+        assert sorted(cache._entries) == ["a", "c"]
+
+    def test_byte_budget(self):
+        cache = ResponseCache(max_bytes=len(SSE_TEXT) * 2)
+        for key in ("a", "b", "c"):
+            cache.store(key, [SSE_TEXT])
+        assert cache.total_bytes <= len(SSE_TEXT) * 2
+        assert sorted(cache._entries) == ["b", "c"]
+        assert not cache.store("huge", [SSE_TEXT * 3])
+
+
+async def _complete_leader(cache_key, result, is_stream):
+    assert await handle_duplicate_request("sig", "leader", is_stream, cache_key=cache_key) is None
+    complete_and_cleanup_request("sig", result, result, is_stream, "provider-a")
+
+
+class TestServingFromCache:
+    @pytest.mark.asyncio
+    async def test_cached_json_served_to_streaming_client(self):
+        await _complete_leader("key", MESSAGE, False)
+
+        response = await handle_duplicate_request("sig", "retry", True, cache_key="key")
+        assert response.headers["x-provider-used"] == "response-cache"
+        chunks = [chunk async for chunk in response.body_iterator]
+        assert "".join(chunks).count("event: message_stop") == 1
+        assert "Hello!" in "".join(chunks)
+
+    @pytest.mark.asyncio
+    async def test_cached_stream_served_as_json(self):
+        await _complete_leader("key", [SSE_TEXT], True)
+        hits = response_cache.hits
+
+        response = await handle_duplicate_request("sig", "retry", False, cache_key="key")
+        assert response.headers["x-provider-used"] == "response-cache"
+        assert json.loads(response.body)["content"][0]["text"] == "Hello!"
+        assert response_cache.hits == hits + 1
+
+    @pytest.mark.asyncio
+    async def test_requests_without_cache_key_are_not_cached(self):
+        await _complete_leader(None, MESSAGE, False)
+        assert len(response_cache) == 0
+        # Becomes a new leader instead of getting a cached response
+        assert await handle_duplicate_request("sig", "retry", False) is None
+
+    @pytest.mark.asyncio
+    async def test_tool_use_json_not_served_to_streaming_client(self):
+        await _complete_leader("key", TOOL_MESSAGE, False)
+
+        response = await handle_duplicate_request("sig", "same-mode", False, cache_key="key")
+        assert json.loads(response.body) == TOOL_MESSAGE
+        # Converting to SSE would drop the thinking and tool_use blocks: go upstream instead
+        assert await handle_duplicate_request("sig", "other-mode", True, cache_key="key") is None
+
+    @pytest.mark.asyncio
+    async def test_tool_use_stream_not_served_as_json(self):
+        await _complete_leader("key", [TOOL_SSE_TEXT], True)
+
+        response = await handle_duplicate_request("sig", "same-mode", True, cache_key="key")
+        assert "".join([chunk async for chunk in response.body_iterator]) == TOOL_SSE_TEXT
+        misses = response_cache.misses
+        assert await handle_duplicate_request("sig", "other-mode", False, cache_key="key") is None
+        assert response_cache.misses == misses + 1
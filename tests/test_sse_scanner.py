@@ -0,0 +1,85 @@
+"""
+Tests for the incremental SSE health scanner.
+
+Covers:
+- Events split across arbitrary chunk boundaries (LF and CRLF)
+- Error events detected before content starts, text patterns across events
+- output_tokens tracking and non-SSE bodies
+"""
+
+import json
+
+from core.provider_manager.health import HealthPatternMatcher
+from core.streaming.sse_scanner import SSEStreamScanner
+
+
+BODY_PATTERNS = [
+    '"type"\\s*:\\s*"error"',
+    'event:\\s*error',
+    'rate.?limit',
+    '没有可用',
+]
+
+
+def _scanner(**kwargs) -> SSEStreamScanner:
+    return SSEStreamScanner(HealthPatternMatcher(unhealthy_response_body_patterns=BODY_PATTERNS), **kwargs)
+
+
+def _event(name: str, data: dict) -> bytes:
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def _text(text: str) -> bytes:
+    return _event("content_block_delta", {
+        "type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text}
+    })
+
+
+def _feed_in_pieces(scanner: SSEStreamScanner, data: bytes, size: int):
+    for start in range(0, len(data), size):
+        scanner.feed(data[start:start + size])
+
+
+class TestSSEStreamScanner:
+    def test_healthy_stream_split_anywhere(self):
+        stream = (
+            _event("message_start", {"type": "message_start", "message": {"usage": {"output_tokens": 1}}})
+            + b"".join(_text(f"chunk {i} 你好 ") for i in range(200))
+            + _event("message_delta", {"type": "message_delta", "usage": {"output_tokens": 321}})
+            + _event("message_stop", {"type": "message_stop"})
+        )
+        for size in (1, 7, 4096):
+            scanner = _scanner()
+            _feed_in_pieces(scanner, stream, size)
+            assert scanner.finish() is None
+            assert scanner.has_text
+            assert scanner.output_tokens == 321
+            assert scanner.event_count == 203
+
+    def test_error_event_detected_before_content(self):
+        scanner = _scanner()
+        assert scanner.feed(_event("error", {"type": "error", "error": {"type": "overloaded_error"}})) is not None
+        assert not scanner.content_started
+        assert scanner.error_reason.startswith("response_body_pattern_")
+
+    def test_text_pattern_spanning_events(self):
+        scanner = _scanner(check_interval=1 << 20)
+        scanner.feed(_event("message_start", {"type": "message_start"}))
+        scanner.feed(_text("sorry, rate "))
+        scanner.feed(_text("limit reached"))
+        # Batched after content starts: reported once enough text piles up or at the end
+        assert scanner.error_reason is None
+        assert scanner.finish() == "response_body_pattern_rate.?limit"
+
+    def test_crlf_boundaries_and_trailing_partial_event(self):
+        scanner = _scanner()
+        scanner.feed(b"event: ping\r\ndata: {\"type\": \"ping\"}\r\n\r\nevent: error\r\n")
+        assert scanner.event_count == 1
+        assert scanner.error_reason is None
+        # The partial event is only complete at the end of the stream
+        assert scanner.finish() == "response_body_pattern_event:\\s*error"
+
+    def test_non_sse_body(self):
+        scanner = _scanner(window_size=64)
+        scanner.feed(("x" * 1000 + "当前分组没有可用渠道").encode("utf-8"))
+        assert scanner.finish() == "response_body_pattern_没有可用"
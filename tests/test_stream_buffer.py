@@ -0,0 +1,147 @@
+"""
+Tests for the shared, memory-bounded stream buffer.
+
+Covers:
+- In-memory storage, spill to a temp file past the per-stream / global budget
+- Truncation past max_stream_bytes (or the memory budget without spilling)
+- Budget released when the buffer is closed or garbage collected
+- The global budget is applied at configuration load, not by from_settings
+- Broadcaster replay ends with an error once the buffer is truncated
+"""
+
+import asyncio
+import gc
+from types import SimpleNamespace
+
+import pytest
+
+from caching import deduplication
+from core.streaming import stream_buffer
+from core.streaming.parallel_broadcaster import ParallelBroadcaster
+from core.streaming.stream_buffer import MemoryBudget, StreamBuffer
+
+
+def _chunks(count, size=100):
+    return [bytes([65 + i % 26]) * size for i in range(count)]
+
+
+class TestStreamBuffer:
+    def test_chunks_stay_in_memory_within_budget(self):
+        budget = MemoryBudget(10_000)
+        buffer = StreamBuffer(memory_limit=1_000, budget=budget)
+        buffer.append(b"event: ping\n\n")
+        buffer.append("data: 你好\n\n")
+
+        assert not buffer.spilled
+        assert list(buffer) == [b"event: ping\n\n", "data: 你好\n\n".encode()]
+        assert buffer.text() == "event: ping\n\ndata: 你好\n\n"
+        assert budget.used == buffer.size
+
+    def test_spills_past_per_stream_limit(self):
+        budget = MemoryBudget(10_000)
+        buffer = StreamBuffer(memory_limit=450, budget=budget)
+        chunks = _chunks(10)
+        for chunk in chunks:
+            buffer.append(chunk)
+
+        assert buffer.spilled
+        assert budget.used == 0 and buffer.memory_bytes == 0
+        assert len(buffer) == 10 and buffer.size == 1000
+        assert list(buffer) == chunks
+        assert buffer[-1] == chunks[-1]
+
+    def test_spills_past_global_budget(self):
+        budget = MemoryBudget(500)
+        first = StreamBuffer(memory_limit=1_000, budget=budget)
+        second = StreamBuffer(memory_limit=1_000, budget=budget)
+        for chunk in _chunks(4):
+            first.append(chunk)
+        for chunk in _chunks(2):
+            second.append(chunk)
+
+        assert not first.spilled and second.spilled
+        assert budget.used == 400
+
+        first.close()
+        assert budget.used == 0
+
+    def test_truncates_past_max_bytes(self):
+        buffer = StreamBuffer(memory_limit=200, max_bytes=550, budget=MemoryBudget(10_000))
+        for chunk in _chunks(10):
+            buffer.append(chunk)
+
+        assert buffer.truncated
+        assert buffer.size == 500 and buffer.dropped_bytes == 500
+        assert len(buffer) == 5
+
+    def test_truncates_without_spilling(self):
+        buffer = StreamBuffer(memory_limit=250, spill_to_disk=False, budget=MemoryBudget(10_000))
+        for chunk in _chunks(5):
+            buffer.append(chunk)
+        assert not buffer.spilled and buffer.truncated and len(buffer) == 2
+
+    def test_budget_released_on_garbage_collection(self):
+        budget = MemoryBudget(10_000)
+        buffer = StreamBuffer(budget=budget)
+        buffer.append(b"x" * 1000)
+        assert budget.used == 1000
+        del buffer
+        gc.collect()
+        assert budget.used == 0
+
+    def test_global_budget_applied_at_config_load(self, monkeypatch):
+        budget = MemoryBudget(10_000)
+        monkeypatch.setattr(stream_buffer, "shared_memory_budget", budget)
+        monkeypatch.setattr(deduplication, "_provider_manager", None)
+        settings = {"global_memory_bytes": 500, "memory_bytes_per_stream": 2000}
+
+        buffer = StreamBuffer.from_settings(settings)
+        assert buffer.memory_limit == 2000
+        assert budget.limit == 10_000
+
+        manager = SimpleNamespace(
+            settings={},
+            get_response_cache_settings=lambda: {},
+            get_stream_buffer_settings=lambda: settings,
+        )
+        deduplication.set_provider_manager(manager)
+        assert budget.limit == 500
+
+
+class TestBroadcasterReplayBuffer:
+    @pytest.mark.asyncio
+    async def test_duplicate_gets_error_when_replay_is_truncated(self):
+        buffer = StreamBuffer(memory_limit=1_000, max_bytes=250, budget=MemoryBudget(10_000))
+        broadcaster = ParallelBroadcaster(None, "original", "provider", buffer)
+        release = asyncio.Event()
+
+        async def provider_stream():
+            for chunk in _chunks(2):
+                yield chunk
+            await release.wait()
+            for chunk in _chunks(3):
+                yield chunk
+
+        original = []
+
+        async def consume():
+            async for chunk in broadcaster.stream_from_provider(provider_stream()):
+                original.append(chunk)
+
+        original_task = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        duplicate = []
+
+        async def follow():
+            async for chunk in broadcaster.add_duplicate_request(None, "dup"):
+                duplicate.append(chunk)
+
+        follower = asyncio.create_task(follow())
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.wait_for(asyncio.gather(original_task, follower), timeout=1)
+
+        # The original client is unaffected; the duplicate ends with an error event
+        assert len(original) == 5
+        assert duplicate[:2] == _chunks(2)
+        assert "event: error" in duplicate[-1]
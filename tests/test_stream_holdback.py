@@ -0,0 +1,140 @@
+"""
+Tests for the streaming hold-back buffer (pre-first-byte failover).
+
+Covers:
+- An error event before the first content fails over to the next provider
+- With no option left (or hold-back disabled) the stream is sent unchanged
+- Release on max_wait keeps the in-progress upstream read
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from framework import Scenario, ProviderConfig, ProviderBehavior, Environment
+from core.provider_manager.health import HealthPatternMatcher
+from core.streaming import SSEStreamScanner
+from routers.messages.routes import AnthropicStreamStart
+
+
+ERROR_EVENT_PATTERNS = {
+    "unhealthy_response_body_patterns": ['"type"\\s*:\\s*"error"', "event:\\s*error", "rate.?limit"]
+}
+
+
+def _providers(*configs):
+    return [
+        ProviderConfig(
+            "holdback_error_provider", ProviderBehavior.STREAMING_ERROR_EVENT, priority=1,
+            error_message="no available channel"
+        ),
+        *configs,
+    ]
+
+
+async def _stream(env) -> httpx.Response:
+    request_data = {
+        "model": env.model_name,
+        "max_tokens": 100,
+        "stream": True,
+        "messages": [{"role": "user", "content": "Test stream hold-back"}],
+    }
+    async with httpx.AsyncClient() as client:
+        response = await client.post(f"{env.balancer_url}/v1/messages", json=request_data, timeout=30.0)
+        await response.aread()
+        return response
+
+
+class TestStreamHoldbackFailover:
+    @pytest.mark.asyncio
+    async def test_error_event_fails_over_before_first_byte(self):
+        scenario = Scenario(
+            name="stream_holdback_failover",
+            providers=_providers(
+                ProviderConfig(
+                    "holdback_success_provider", ProviderBehavior.STREAMING_SUCCESS, priority=2,
+                    response_data={"content": "Hold-back failover success"}
+                )
+            ),
+            settings_override=ERROR_EVENT_PATTERNS,
+        )
+
+        async with Environment(scenario) as env:
+            response = await _stream(env)
+
+            assert response.status_code == 200
+            assert response.headers["x-provider-used"] == "holdback_success_provider"
+            assert "overloaded_error" not in response.text
+            assert "Hold-back" in response.text
+
+    @pytest.mark.asyncio
+    async def test_last_option_sends_stream_unchanged(self):
+        scenario = Scenario(
+            name="stream_holdback_last_option",
+            providers=_providers(),
+            settings_override=ERROR_EVENT_PATTERNS,
+        )
+
+        async with Environment(scenario) as env:
+            response = await _stream(env)
+
+            assert response.status_code == 200
+            assert "overloaded_error" in response.text
+
+    @pytest.mark.asyncio
+    async def test_disabled_holdback_commits_to_first_provider(self):
+        scenario = Scenario(
+            name="stream_holdback_disabled",
+            providers=_providers(
+                ProviderConfig("holdback_success_provider", ProviderBehavior.STREAMING_SUCCESS, priority=2)
+            ),
+            settings_override={**ERROR_EVENT_PATTERNS, "stream_holdback": {"enabled": False}},
+        )
+
+        async with Environment(scenario) as env:
+            response = await _stream(env)
+
+            assert response.headers["x-provider-used"] == "holdback_error_provider"
+            assert "overloaded_error" in response.text
+
+
+class _SlowResponse:
+    def __init__(self, chunks, delay):
+        self.chunks = chunks
+        self.delay = delay
+
+    async def aiter_bytes(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield chunk
+
+
+async def _no_more_responses():
+    return
+    yield
+
+
+class TestAnthropicStreamStart:
+    @pytest.mark.asyncio
+    async def test_max_wait_release_keeps_pending_read(self):
+        chunks = [b"event: ping\ndata: {}\n\n", b'data: {"type": "content_block_delta"}\n\n']
+        start = AnthropicStreamStart(
+            _no_more_responses(), _SlowResponse(chunks, delay=0.2), SSEStreamScanner(HealthPatternMatcher())
+        )
+
+        assert await start.hold_back(max_bytes=16384, max_wait=0.3) is None
+        assert start.held_chunks == chunks[:1]
+        assert [chunk async for chunk in start.chunks()] == chunks[1:]
+        await start.aclose()
+
+    @pytest.mark.asyncio
+    async def test_releases_on_first_content_event(self):
+        chunks = [b'data: {"type": "content_block_delta"}\n\n', b"data: {}\n\n"]
+        start = AnthropicStreamStart(
+            _no_more_responses(), _SlowResponse(chunks, delay=0), SSEStreamScanner(HealthPatternMatcher())
+        )
+
+        await start.hold_back(max_bytes=16384, max_wait=5)
+        assert start.held_chunks == chunks[:1]
+        await start.aclose()